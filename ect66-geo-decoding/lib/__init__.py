@@ -0,0 +1 @@
+# ect66-geo-decoding library modules
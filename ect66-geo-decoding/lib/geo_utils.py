@@ -0,0 +1,42 @@
+"""Vectorized distance helpers for WGS84 coordinate arrays."""
+
+import numpy as np
+
+# Mean Earth radius (IUGG), in kilometers
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _as_float_array(values) -> np.ndarray:
+    """Convert scalars, lists, NumPy arrays or pandas Series to a float array."""
+    if hasattr(values, "to_numpy"):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    return np.asarray(values, dtype=float)
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Great-circle distance in kilometers between two sets of coordinates.
+
+    Inputs broadcast against each other, so one point can be compared against
+    a whole array (e.g. nearest-station lookups). Missing coordinates (NaN or
+    None) produce NaN distances instead of raising.
+
+    Args:
+        lat1: Latitude(s) of the origin points
+        lng1: Longitude(s) of the origin points
+        lat2: Latitude(s) of the destination points
+        lng2: Longitude(s) of the destination points
+
+    Returns:
+        Array of distances in kilometers
+    """
+    lat1, lng1, lat2, lng2 = (
+        np.radians(_as_float_array(v)) for v in (lat1, lng1, lat2, lng2)
+    )
+
+    with np.errstate(invalid="ignore"):
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
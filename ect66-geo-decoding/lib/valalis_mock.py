@@ -0,0 +1,146 @@
+"""Local stand-in for the Valalis API, for offline upload testing and tuning."""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import httpx
+
+MOCK_URL = "http://valalis.mock/api"
+
+
+@dataclass
+class MockStats:
+    """Counters collected by MockValalisAPI during a run."""
+
+    requests: int = 0
+    units: int = 0
+    rate_limited: int = 0  # 429 responses
+    server_errors: int = 0  # injected 5xx responses
+    peak_in_flight: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+class MockValalisAPI:
+    """
+    In-memory replacement for VA_Elect_API with a simple server model.
+
+    Implements the methods the upload script calls (create_features, update,
+    delete, delete_all) and simulates:
+
+    - latency: latency + per_unit_latency * units, with +/- jitter
+    - capacity: at most `capacity` requests are processed at once; the rest
+      queue on the server, so latency grows once the client overshoots
+    - rate limit: a token bucket of rate_limit requests/s (0 = unlimited);
+      requests that find it empty get a 429 with Retry-After
+    - failures: a fraction error_rate of requests are refused with a 503
+      before anything is applied
+
+    Errors are raised as httpx.HTTPStatusError, like the real client.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        per_unit_latency: float = 0.001,
+        jitter: float = 0.2,
+        capacity: int = 16,
+        rate_limit: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.per_unit_latency = per_unit_latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.objects: dict[str, dict] = {}
+        self.stats = MockStats()
+        self._capacity = asyncio.Semaphore(capacity)
+        self._in_flight = 0
+        self._tokens = rate_limit
+        self._refilled_at = time.monotonic()
+        self._random = random.Random(seed)
+
+    def _error(self, method: str, status: int, headers: dict | None = None):
+        request = httpx.Request(method, MOCK_URL)
+        response = httpx.Response(status, headers=headers, request=request)
+        return httpx.HTTPStatusError(
+            f"Mock server returned {status}", request=request, response=response
+        )
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit, self._tokens + (now - self._refilled_at) * self.rate_limit
+        )
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _handle(self, method: str, n_units: int):
+        """Apply rate limiting, server queueing, latency and failure injection."""
+        self.stats.requests += 1
+        if not self._take_token():
+            self.stats.rate_limited += 1
+            raise self._error(method, 429, {"Retry-After": "1"})
+
+        start = time.monotonic()
+        self._in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self._in_flight)
+        try:
+            async with self._capacity:
+                delay = self.latency + self.per_unit_latency * n_units
+                await asyncio.sleep(
+                    delay * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+                )
+        finally:
+            self._in_flight -= 1
+        self.stats.latencies.append(time.monotonic() - start)
+
+        if self._random.random() < self.error_rate:
+            self.stats.server_errors += 1
+            raise self._error(method, 503)
+
+    async def create_features(self, body: bytes) -> dict:
+        features = json.loads(body)["features"]
+        await self._handle("POST", len(features))
+        for feature in features:
+            object_id = uuid.uuid4().hex
+            feature["properties"]["_id"] = object_id
+            self.objects[object_id] = feature
+        self.stats.units += len(features)
+        return {"type": "FeatureCollection", "features": features}
+
+    async def create(self, units: list) -> dict:
+        features = [
+            {"type": "Feature", "properties": dict(unit)} for unit in units
+        ]
+        body = json.dumps({"type": "FeatureCollection", "features": features})
+        return await self.create_features(body.encode("utf-8"))
+
+    async def update(self, object_ids: list[str], units: list) -> dict:
+        await self._handle("PATCH", len(units))
+        for object_id, unit in zip(object_ids, units):
+            self.objects[object_id] = {"type": "Feature", "properties": dict(unit)}
+        self.stats.units += len(units)
+        return {"updated": len(units)}
+
+    async def delete(self, object_ids: list[str]) -> dict:
+        await self._handle("DELETE", len(object_ids))
+        for object_id in object_ids:
+            self.objects.pop(object_id, None)
+        return {"deleted": len(object_ids)}
+
+    async def delete_all(self) -> dict:
+        await self._handle("DELETE", 0)
+        deleted = len(self.objects)
+        self.objects.clear()
+        return {"deleted": deleted}
@@ -0,0 +1,179 @@
+"""Columnar GeoJSON payload builder for Valalis uploads."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .models import create_google_url
+
+# Parquet column -> UnitData property name
+PROPERTY_COLUMNS = {
+    "UnitId": "unit_id",
+    "UnitName": "unit_name",
+    "ProvinceName": "province_name",
+    "DivisionNumber": "division_number",
+    "DistrictName": "district_name",
+    "SubDistrictName": "sub_district_name",
+    "UnitNumber": "unit_number",
+    "Lat": "latitude",
+    "Lng": "longitude",
+    "TierLocation": "tier_location",
+}
+
+SOURCE_COLUMNS = [*PROPERTY_COLUMNS, "PlaceId"]
+
+
+def _concat(*parts) -> pa.Array:
+    """Element-wise string concatenation of Arrow arrays and scalar strings."""
+    return pc.binary_join_element_wise(*parts, "")
+
+
+def _coord_strings(values) -> pa.Array:
+    """Shortest round-trip decimal strings for a float column, null for NaN."""
+    return pc.cast(pa.array(values, type=pa.float64(), from_pandas=True), pa.string())
+
+
+def google_map_urls(lat, lng, place_id) -> pa.Array:
+    """
+    Google Maps URLs for whole coordinate columns at once.
+
+    create_google_url (lib/models.py) is called once per distinct
+    (lat, lng, PlaceId) and its results are broadcast back with a take, so the
+    URLs are exactly the ones the per-row upload produced while repeated
+    locations are only formatted once. Both creates (build_features) and
+    updates of the upload script take their URLs from here. Missing Place IDs
+    are passed as "".
+
+    Returns:
+        Arrow string array of URLs, one per row
+    """
+    keys = pd.MultiIndex.from_arrays(
+        [
+            np.asarray(lat, dtype=float),
+            np.asarray(lng, dtype=float),
+            pd.Series(np.asarray(place_id, dtype=object)).fillna(""),
+        ]
+    )
+    codes, uniques = keys.factorize()
+    urls = [
+        create_google_url((float(a), float(b)), placeId=str(pid))
+        for a, b, pid in uniques
+    ]
+    return pa.array(urls, type=pa.string()).take(pa.array(codes))
+
+
+def _to_frame(data: pa.Table | pd.DataFrame) -> pd.DataFrame:
+    if isinstance(data, pa.Table):
+        columns = [c for c in SOURCE_COLUMNS if c in data.column_names]
+        return data.select(columns).to_pandas()
+    return data
+
+
+def _json_values(values: pd.Series) -> pa.Array:
+    """
+    Encode a column as JSON literals.
+
+    Numbers go through Arrow casts; strings are JSON-escaped once per distinct
+    value (province, district and tier columns repeat heavily) and broadcast
+    back with a take.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(
+        values
+    ):
+        arr = pa.array(values, from_pandas=True)
+        if pa.types.is_floating(arr.type):
+            arr = pc.if_else(pc.is_nan(arr), None, arr)
+        return pc.fill_null(pc.cast(arr, pa.string()), "null")
+
+    codes, uniques = pd.factorize(values)
+    encoded = pa.array(
+        [json.dumps(v, ensure_ascii=False) for v in uniques.tolist()] + ["null"],
+        type=pa.string(),
+    )
+    # factorize marks missing values with -1 -> trailing "null"
+    codes[codes < 0] = len(uniques)
+    return encoded.take(pa.array(codes))
+
+
+def build_features(data: pa.Table | pd.DataFrame) -> pa.Array:
+    """
+    Serialize every unit to a GeoJSON Feature string in one columnar pass.
+
+    Each property column is encoded to JSON literals as a whole, then spliced
+    into Point features with Arrow string kernels, so no per-row Python
+    objects are created.
+
+    Args:
+        data: Validated dataset as an Arrow table or DataFrame
+
+    Returns:
+        Arrow string array of serialized Feature JSON, one per unit
+    """
+    df = _to_frame(data)
+    if df.empty:
+        return pa.array([], type=pa.string())
+
+    place_id = df["PlaceId"] if "PlaceId" in df.columns else [""] * len(df)
+    urls = google_map_urls(df["Lat"], df["Lng"], place_id)
+
+    # Units without coordinates get null geometry and URL rather than null
+    # features (the string kernels propagate nulls)
+    point = _concat(
+        '{"type":"Point","coordinates":[',
+        _coord_strings(df["Lng"]),
+        ",",
+        _coord_strings(df["Lat"]),
+        "]}",
+    )
+    geometry = pc.fill_null(point, "null")
+    urls = pc.if_else(pc.is_null(point), None, urls)
+    url_values = _json_values(pd.Series(urls.to_pylist(), dtype=object))
+
+    parts = []
+    for column, prop in PROPERTY_COLUMNS.items():
+        parts += ["," if parts else "{", f'"{prop}":', _json_values(df[column])]
+    parts += [',"google_map_url":', url_values, "}"]
+
+    return _concat('{"type":"Feature","geometry":', geometry, ',"properties":', *parts, "}")
+
+
+def feature_collection(features: pa.Array) -> bytes:
+    """Wrap serialized features into a FeatureCollection request body."""
+    body = '{"type":"FeatureCollection","features":[' + ",".join(features.to_pylist())
+    return (body + "]}").encode("utf-8")
+
+
+def iter_feature_batches(
+    data: pa.Table | pd.DataFrame, batch_size: int
+) -> Iterator[tuple[int, bytes]]:
+    """
+    Yield (unit_count, FeatureCollection body) batches ready to POST.
+
+    Args:
+        data: Validated dataset as an Arrow table or DataFrame
+        batch_size: Number of units per FeatureCollection
+    """
+    features = build_features(data)
+    for start in range(0, len(features), batch_size):
+        batch = features.slice(start, batch_size)
+        yield len(batch), feature_collection(batch)
+
+
+def iter_parquet_batches(path: Path, batch_size: int) -> Iterator[pa.Table]:
+    """
+    Read the payload columns of a parquet file lazily, batch_size rows at a time.
+
+    Batches never span row groups, so some may be shorter than batch_size.
+    """
+    parquet_file = pq.ParquetFile(path)
+    columns = [c for c in SOURCE_COLUMNS if c in parquet_file.schema_arrow.names]
+    for record_batch in parquet_file.iter_batches(
+        batch_size=batch_size, columns=columns
+    ):
+        yield pa.Table.from_batches([record_batch])
@@ -0,0 +1,147 @@
+"""Differential sync planning between the validated dataset and Valalis."""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+# Parquet columns that end up in a UnitData payload (google_map_url is derived
+# from Lat/Lng/PlaceId, so hashing those covers it)
+PAYLOAD_COLUMNS = [
+    "UnitId",
+    "UnitName",
+    "ProvinceName",
+    "DivisionNumber",
+    "DistrictName",
+    "SubDistrictName",
+    "UnitNumber",
+    "Lat",
+    "Lng",
+    "PlaceId",
+    "TierLocation",
+]
+
+MAPPING_COLUMNS = ["object_id", "unit_id", "province_name", "content_hash"]
+
+
+@dataclass
+class SyncPlan:
+    """Units to create, update and delete to bring Valalis in line with df."""
+
+    create: pd.DataFrame  # rows of the validated dataset
+    update: pd.DataFrame  # rows of the validated dataset + object_id
+    delete: pd.DataFrame  # rows of the previous mapping
+    unchanged: pd.DataFrame  # rows of the previous mapping (kept as-is)
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "create": len(self.create),
+            "update": len(self.update),
+            "delete": len(self.delete),
+            "unchanged": len(self.unchanged),
+        }
+
+
+def content_hash(df: pd.DataFrame) -> pd.Series:
+    """
+    Content hash of each unit's payload fields.
+
+    Returns:
+        uint64 Series aligned to df, stable across runs for identical content
+    """
+    payload = df.reindex(columns=PAYLOAD_COLUMNS)
+    if "PlaceId" in payload.columns:
+        payload["PlaceId"] = payload["PlaceId"].fillna("")
+    return pd.util.hash_pandas_object(payload, index=False)
+
+
+def read_mapping(path: Path) -> pd.DataFrame | None:
+    """
+    Read the previous upload mapping for a diff.
+
+    Mappings without a content_hash column (written before hashes were
+    recorded) are accepted; plan_sync updates every unit once for them.
+
+    Returns:
+        Mapping DataFrame, or None if path does not exist
+
+    Raises:
+        ValueError: if the file is not a readable parquet file or lacks the
+            object_id/unit_id columns
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        mapping_df = pd.read_parquet(path)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path} is not a readable mapping: {e}") from e
+    missing = {"object_id", "unit_id"} - set(mapping_df.columns)
+    if missing:
+        raise ValueError(f"{path} is missing mapping columns: {sorted(missing)}")
+    return mapping_df
+
+
+def plan_sync(df: pd.DataFrame, mapping_df: pd.DataFrame) -> SyncPlan:
+    """
+    Compare the validated dataset with the previous upload mapping.
+
+    Units missing from the mapping are created, mapped units whose content
+    hash changed (or was never recorded) are updated, and mapped units no
+    longer in the dataset - or duplicate uploads of the same unit - are deleted.
+
+    Args:
+        df: Validated dataset (ect66_geocoded_validated.parquet)
+        mapping_df: Previous valalis_upload_response.parquet
+
+    Returns:
+        SyncPlan
+    """
+    df = df.copy()
+    df["content_hash"] = content_hash(df)
+    df["_unit_id"] = pd.to_numeric(df["UnitId"], errors="coerce").astype("Int64")
+
+    mapping_df = mapping_df.copy()
+    if "content_hash" not in mapping_df.columns:
+        mapping_df["content_hash"] = pd.NA
+    # Nullable, so the left merge below cannot round hashes through float64
+    mapping_df["content_hash"] = mapping_df["content_hash"].astype("UInt64")
+    mapping_df["_unit_id"] = pd.to_numeric(
+        mapping_df["unit_id"], errors="coerce"
+    ).astype("Int64")
+
+    # Keep one object per unit; extra copies on the platform get deleted
+    duplicated = mapping_df.duplicated("_unit_id", keep="first")
+    mapped = mapping_df[~duplicated]
+
+    current_ids = set(df["_unit_id"].dropna())
+    stale = ~mapped["_unit_id"].isin(current_ids)
+    delete = pd.concat([mapping_df[duplicated], mapped[stale]])
+
+    merged = df.merge(
+        mapped[~stale][["_unit_id", "object_id", "content_hash"]],
+        on="_unit_id",
+        how="left",
+        suffixes=("", "_prev"),
+        indicator=True,
+    )
+    is_new = merged["_merge"] == "left_only"
+    # Mappings written before hashes were recorded force a one-off update
+    has_prev = merged["content_hash_prev"].notna()
+    changed = ~is_new & ~has_prev
+    changed[has_prev] = (
+        merged.loc[has_prev, "content_hash_prev"].astype("uint64")
+        != merged.loc[has_prev, "content_hash"]
+    )
+
+    unchanged_ids = set(merged.loc[~is_new & ~changed, "_unit_id"])
+
+    drop = ["_unit_id", "_merge", "content_hash_prev"]
+    return SyncPlan(
+        create=merged[is_new].drop(columns=drop + ["object_id"]),
+        update=merged[changed].drop(columns=drop),
+        delete=delete.drop(columns=["_unit_id"]),
+        unchanged=mapped[mapped["_unit_id"].isin(unchanged_ids)].drop(
+            columns=["_unit_id"]
+        ),
+    )
@@ -0,0 +1,398 @@
+"""Adaptive-concurrency, retrying and resumable batch uploads to Valalis."""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+import httpx
+import pandas as pd
+import pyarrow as pa
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Failures after which a request has certainly not been applied, so even a
+# create can be sent again without risking a duplicate
+NOT_APPLIED_STATUS = {429, 503}
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class UploadError(Exception):
+    """A batch was rejected or could not be delivered."""
+
+
+class UncertainUploadError(UploadError):
+    """A create may or may not have been applied; sending it again could duplicate."""
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for in-flight API requests.
+
+    The limit grows by roughly one slot per window of successful requests and
+    is halved on 429/5xx responses or when latency exceeds target_latency.
+    Decreases are applied at most once per cooldown so a burst of failures from
+    requests that were already in flight only counts as one congestion signal.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        target_latency: float = 5.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, congested: bool = False):
+        async with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested or latency > self.target_latency:
+                if now - self._last_decrease > self.target_latency:
+                    self.limit = max(
+                        self.min_limit, self.limit * self.decrease_factor
+                    )
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff delay for a retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _retry_after(error: httpx.HTTPStatusError) -> float | None:
+    value = error.response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def send_with_retry(
+    call: Callable[[], Awaitable],
+    limiter: AdaptiveLimiter,
+    max_retries: int = 5,
+    require_features: bool = False,
+    idempotent: bool = True,
+):
+    """
+    Run one API call under the limiter, retrying transient failures.
+
+    429/5xx responses, transport errors and (with require_features) responses
+    without a "features" list are retried with jittered exponential backoff;
+    other HTTP errors are raised immediately.
+
+    Calls that are not idempotent (creates) are only retried when the request
+    cannot have been applied: 429/503 responses and connection failures before
+    anything was sent. Any other transient failure leaves the outcome unknown
+    and raises UncertainUploadError rather than risk creating units twice.
+
+    Raises:
+        UncertainUploadError: if a non-idempotent call may have been applied
+        UploadError: if the call still fails after max_retries retries
+    """
+    error = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            delay = backoff_delay(attempt - 1)
+            if isinstance(error, httpx.HTTPStatusError):
+                delay = max(delay, _retry_after(error) or 0)
+            await asyncio.sleep(delay)
+
+        await limiter.acquire()
+        start = time.monotonic()
+        congested = False
+        try:
+            result = await call()
+            if require_features and "features" not in (result or {}):
+                congested = True
+                message = f"Response without features: {str(result)[:200]}"
+                if not idempotent:
+                    raise UncertainUploadError(message)
+                error = UploadError(message)
+                continue
+            return result
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status not in RETRYABLE_STATUS:
+                raise UploadError(str(e)) from e
+            congested = True
+            if not idempotent and status not in NOT_APPLIED_STATUS:
+                raise UncertainUploadError(f"Outcome unknown after {e}") from e
+            error = e
+        except httpx.TransportError as e:
+            congested = True
+            if not idempotent and not isinstance(e, NOT_SENT_ERRORS):
+                raise UncertainUploadError(
+                    f"Outcome unknown after {type(e).__name__}: {e}"
+                ) from e
+            error = e
+        finally:
+            await limiter.release(time.monotonic() - start, congested)
+
+    raise UploadError(f"Giving up after {max_retries} retries: {error}") from error
+
+
+class Batch(NamedTuple):
+    """
+    One API call and the ledger keys of the items it sends.
+
+    unit_hashes annotates the mapping rows a create returns.
+    """
+
+    keys: list[str]
+    call: Callable[[], Awaitable]
+    unit_hashes: dict[str, int] | None = None
+
+
+def response_rows(result: dict, unit_hashes: dict[str, int] | None = None) -> list[dict]:
+    """Extract object_id <-> unit_id mapping rows from a create response."""
+    unit_hashes = unit_hashes or {}
+    return [
+        {
+            "object_id": feature["properties"].get("_id", ""),
+            "unit_id": feature["properties"].get("unit_id", ""),
+            "province_name": feature["properties"].get("province_name", ""),
+            "content_hash": unit_hashes.get(
+                str(feature["properties"].get("unit_id", ""))
+            ),
+        }
+        for feature in result.get("features", [])
+    ]
+
+
+class UploadLedger:
+    """
+    Append-only record of acknowledged items for resuming an upload.
+
+    The first line is a header naming the upload mode and the hash of the
+    input it uploads; every following line stores the keys of one
+    acknowledged batch together with the mapping rows the API returned for
+    it. Keys name single items ("create:<unit_id>", "update:<object_id>",
+    "delete:<object_id>"), so a resumed run skips exactly the items already
+    sent even when it batches them differently (e.g. another --batch-size).
+    Only the keys are kept in memory; rows are streamed back from disk when
+    the final mapping is written.
+
+    Keys do not cover an item's content, so resuming is refused when the
+    input hash differs from the header. Creates whose outcome is unknown
+    (UncertainUploadError, or units missing from a create response) are
+    recorded as uncertain; the platform cannot be queried by unit_id, so a
+    ledger with uncertain creates is not resumed either: only a fresh full
+    upload (delete_all() first) is sure to leave no duplicates.
+    """
+
+    def __init__(self, path: Path, mode: str, input_hash: str | None = None):
+        self.path = Path(path)
+        self.mode = mode
+        self.input_hash = input_hash
+        self.acked: set[str] = set()
+        self.uncertain: set[str] = set()
+        self.resuming = False
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header and header.get("mode") != mode:
+                    raise UploadError(
+                        f"{self.path} belongs to an interrupted "
+                        f"'{header.get('mode')}' upload; finish it or start over "
+                        f"with --restart"
+                    )
+                if header and header.get("input_hash") != input_hash:
+                    raise UploadError(
+                        f"{self.path} belongs to an interrupted upload of a "
+                        f"different input; start over with --restart"
+                    )
+                for line in f:
+                    # A crash mid-write can leave a truncated last line
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if "key" in entry:
+                        raise UploadError(
+                            f"{self.path} was written with per-batch keys by an "
+                            f"older version; start over with --restart"
+                        )
+                    self.acked.update(entry.get("keys", []))
+                    self.uncertain.update(entry.get("uncertain", []))
+            if self.uncertain - self.acked:
+                raise UploadError(
+                    f"{self.path}: {len(self.uncertain - self.acked):,} creates of "
+                    f"the interrupted upload have an unknown outcome and may "
+                    f"already exist on the platform; start a full upload over with "
+                    f"--restart (without --diff) so delete_all() removes them"
+                )
+            self.resuming = bool(header)
+
+    @staticmethod
+    def input_key(path: Path) -> str:
+        """Hash of an input file's bytes, for the ledger header."""
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha1").hexdigest()
+
+    def start(self):
+        """Begin a new ledger (after any destructive setup has completed)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            header = {
+                "mode": self.mode,
+                "input_hash": self.input_hash,
+                "started_at": time.time(),
+            }
+            f.write(json.dumps(header) + "\n")
+        self.acked = set()
+        self.uncertain = set()
+
+    def record(self, keys: list[str], rows: list[dict]):
+        entry = {"keys": keys, "rows": rows}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.acked.update(keys)
+
+    def record_uncertain(self, keys: list[str]):
+        """Record creates that may or may not have been applied."""
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"uncertain": keys}, ensure_ascii=False) + "\n")
+        self.uncertain.update(keys)
+
+    def iter_rows(self, chunk_size: int = 50_000) -> Iterator[list[dict]]:
+        """Stream acknowledged mapping rows from disk in chunks."""
+        chunk = []
+        with open(self.path, encoding="utf-8") as f:
+            f.readline()  # header
+            for line in f:
+                try:
+                    chunk.extend(json.loads(line)["rows"])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def pending_items(
+    frames: Iterable[pa.Table | pd.DataFrame],
+    ledger: UploadLedger,
+    action: str,
+    id_column: str,
+) -> Iterator[tuple[pd.DataFrame, list[str]]]:
+    """
+    Drop the rows the ledger already acknowledged for action.
+
+    Yields:
+        (rows still to send, their ledger keys) for every frame with rows left
+    """
+    for frame in frames:
+        if isinstance(frame, pa.Table):
+            frame = frame.to_pandas()
+        keys = [f"{action}:{item_id}" for item_id in frame[id_column]]
+        pending = [key not in ledger.acked for key in keys]
+        if not any(pending):
+            continue
+        if not all(pending):
+            frame = frame[pending]
+            keys = [key for key, keep in zip(keys, pending) if keep]
+        yield frame, keys
+
+
+async def run_pipeline(
+    batches: Iterable[Batch],
+    workers: int,
+    limiter: AdaptiveLimiter,
+    ledger: UploadLedger,
+    max_retries: int = 5,
+    require_features: bool = False,
+    idempotent: bool = True,
+) -> list[UploadError]:
+    """
+    Stream batches through a bounded queue to a fixed pool of workers.
+
+    The producer pulls batches lazily (skipping any whose items the ledger
+    has all acknowledged), so at most 2 x workers request bodies are held in
+    memory. Build batches from pending_items() so a resumed run never resends
+    items, however it batches them. Each acknowledged batch's keys are
+    appended to the ledger as soon as it returns.
+
+    Creates (idempotent=False) are never sent twice when their outcome is
+    unknown: such batches, and units missing from a create response, are
+    recorded as uncertain in the ledger and reported as UncertainUploadError.
+
+    Failures do not stop the remaining batches; they are returned so the
+    caller can report them and keep the ledger for a resumed run.
+    """
+    queue: asyncio.Queue[Batch | None] = asyncio.Queue(maxsize=2 * workers)
+    failures: list[UploadError] = []
+
+    async def produce():
+        try:
+            for batch in batches:
+                if not ledger.acked.issuperset(batch.keys):
+                    await queue.put(batch)
+        finally:
+            for _ in range(workers):
+                await queue.put(None)
+
+    async def consume():
+        while (batch := await queue.get()) is not None:
+            try:
+                result = await send_with_retry(
+                    batch.call, limiter, max_retries, require_features, idempotent
+                )
+            except UncertainUploadError as e:
+                ledger.record_uncertain(batch.keys)
+                failures.append(e)
+                continue
+            except UploadError as e:
+                failures.append(e)
+                continue
+            rows = (
+                response_rows(result, batch.unit_hashes)
+                if isinstance(result, dict)
+                else []
+            )
+            keys = batch.keys
+            if not idempotent:
+                # Keys are "<action>:<unit_id>"; units missing from the
+                # response may or may not have been created
+                returned = {str(row["unit_id"]) for row in rows}
+                keys = [k for k in batch.keys if k.partition(":")[2] in returned]
+                missing = [k for k in batch.keys if k.partition(":")[2] not in returned]
+                if missing:
+                    ledger.record_uncertain(missing)
+                    failures.append(
+                        UncertainUploadError(
+                            f"{len(missing)} of {len(batch.keys)} units missing "
+                            f"from the create response"
+                        )
+                    )
+            ledger.record(keys, rows)
+
+    await asyncio.gather(produce(), *(consume() for _ in range(workers)))
+    return failures
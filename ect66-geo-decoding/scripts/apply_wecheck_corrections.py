@@ -24,7 +24,10 @@ from typing import Dict, Tuple
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
-from geopy.distance import geodesic
+
+# Add parent directory to path to import lib modules
+sys.path.append(str(Path(__file__).parent.parent))
+from lib.geo_utils import haversine_km
 
 
 def create_backup(input_path: Path, backup_dir: Path) -> Path:
@@ -148,9 +151,37 @@ def validate_coordinate(
     }
 
 
-def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """Calculate distance in kilometers between two coordinates."""
-    return geodesic((lat1, lng1), (lat2, lng2)).km
+def calculate_displacements(
+    main_df: pd.DataFrame, corrections_df: pd.DataFrame
+) -> pd.Series:
+    """
+    Calculate old→new distance for every correction in one vectorized pass.
+
+    Distances are measured from the coordinates in main_df, i.e. before any
+    correction of this run. A unit corrected more than once needs its later
+    corrections measured from the already-corrected position instead (see
+    apply_corrections).
+
+    Args:
+        main_df: Main dataset with UnitId, Lat, Lng
+        corrections_df: WeCheck rows with UnitId, Latitude, Longitude
+
+    Returns:
+        Series of distances in kilometers aligned to corrections_df
+        (NaN when the unit is missing or has no coordinates)
+    """
+    old_coords = (
+        main_df.drop_duplicates("UnitId")
+        .set_index("UnitId")[["Lat", "Lng"]]
+        .reindex(corrections_df["UnitId"].astype(int))
+    )
+    distances = haversine_km(
+        old_coords["Lat"],
+        old_coords["Lng"],
+        corrections_df["Latitude"],
+        corrections_df["Longitude"],
+    )
+    return pd.Series(distances, index=corrections_df.index)
 
 
 def apply_corrections(args) -> Tuple[pd.DataFrame, Dict]:
@@ -222,6 +253,11 @@ def apply_corrections(args) -> Tuple[pd.DataFrame, Dict]:
     print(f"Processing {len(wecheck_valid)} validated corrections...")
     print()
 
+    # Distance moved from the pre-correction coordinates; units corrected
+    # more than once are re-measured from their corrected position below
+    displacements = calculate_displacements(main_df, wecheck_valid)
+    corrected_ids = set()
+
     # Apply corrections
     for idx, wecheck_row in wecheck_valid.iterrows():
         unit_id = int(wecheck_row["UnitId"])
@@ -261,7 +297,10 @@ def apply_corrections(args) -> Tuple[pd.DataFrame, Dict]:
         old_lng = unit_row["Lng"]
         new_lat = wecheck_row["Latitude"]
         new_lng = wecheck_row["Longitude"]
-        distance_km = calculate_distance(old_lat, old_lng, new_lat, new_lng)
+        if unit_id in corrected_ids:
+            distance_km = haversine_km(old_lat, old_lng, new_lat, new_lng).item()
+        else:
+            distance_km = displacements.loc[idx]
 
         # Update unit
         if not args.dry_run:
@@ -279,6 +318,7 @@ def apply_corrections(args) -> Tuple[pd.DataFrame, Dict]:
                 main_df.loc[main_idx, "DisplayUnitName"] = (
                     f"{unit_row['UnitNumber']} - {corrected_name}"
                 )
+            corrected_ids.add(unit_id)
 
         # Record correction
         corrections_applied.append(
@@ -288,7 +328,9 @@ def apply_corrections(args) -> Tuple[pd.DataFrame, Dict]:
                 "tambon": unit_row["SubDistrictName"],
                 "old_coord": {"lat": old_lat, "lng": old_lng},
                 "new_coord": {"lat": new_lat, "lng": new_lng},
-                "distance_moved_km": round(distance_km, 2),
+                "distance_moved_km": round(distance_km, 2)
+                if pd.notna(distance_km)
+                else None,
                 "tier_before": unit_row["TierLocation"],
                 "tier_after": "A+",
                 "source_before": unit_row.get("CorrectionSource", "Unknown"),
@@ -0,0 +1,244 @@
+"""
+Benchmark Valalis upload throughput against the local API stand-in.
+
+Runs the full upload of scripts/upload_to_valalis.py against MockValalisAPI
+(lib/valalis_mock.py) for every combination of batch size and concurrency,
+and reports units/second together with the number of 429/5xx responses the
+mock server returned. The mock's latency, capacity, rate limit and error rate
+can be set to match what the live service shows, so batch size and
+concurrency can be tuned offline.
+
+Each run works in a temporary directory, so the real response mapping and
+upload ledger in outputs/ are never touched.
+
+Usage:
+    uv run python scripts/benchmark_valalis_upload.py
+    uv run python scripts/benchmark_valalis_upload.py --batch-sizes 100,200,500 --concurrency 4,16
+    uv run python scripts/benchmark_valalis_upload.py --units 10000 --rate-limit 20 --error-rate 0.01
+
+Requirements:
+    - outputs/ect66_geocoded_validated.parquet exists
+
+Output:
+    - Results table on stdout
+    - outputs/valalis_upload_benchmark.csv
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import lib modules
+sys.path.append(str(Path(__file__).parent.parent))
+from lib.valalis_mock import MockValalisAPI
+
+UPLOAD_SCRIPT = Path(__file__).parent / "upload_to_valalis.py"
+DATA_PATH = Path("outputs/ect66_geocoded_validated.parquet")
+RESULTS_PATH = Path("outputs/valalis_upload_benchmark.csv")
+
+
+def load_upload_script():
+    """Import scripts/upload_to_valalis.py as a module."""
+    spec = importlib.util.spec_from_file_location("upload_to_valalis", UPLOAD_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def run_once(upload, batch_size: int, concurrency: int, mock_options: dict) -> dict:
+    """Run one full upload against a fresh mock server and collect metrics."""
+    api_client = MockValalisAPI(**mock_options)
+    log = io.StringIO()
+    start = time.monotonic()
+    try:
+        with contextlib.redirect_stdout(log):
+            asyncio.run(
+                upload.main(
+                    batch_size=batch_size,
+                    concurrency=concurrency,
+                    max_concurrency=concurrency,
+                    restart=True,
+                    api_client=api_client,
+                )
+            )
+        ok = True
+    except SystemExit:
+        ok = False
+    elapsed = time.monotonic() - start
+
+    stats = api_client.stats
+    latencies = np.array(stats.latencies) if stats.latencies else np.array([np.nan])
+    return {
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "ok": ok,
+        "seconds": round(elapsed, 2),
+        "units_per_s": round(len(api_client.objects) / elapsed, 1),
+        "requests": stats.requests,
+        "http_429": stats.rate_limited,
+        "http_5xx": stats.server_errors,
+        "peak_in_flight": stats.peak_in_flight,
+        "p50_latency_s": round(float(np.percentile(latencies, 50)), 3),
+        "p95_latency_s": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def main(
+    batch_sizes: list[int],
+    concurrency_levels: list[int],
+    units: int,
+    mock_options: dict,
+):
+    """
+    Benchmark every batch size x concurrency combination.
+
+    Args:
+        batch_sizes: Units per request to try
+        concurrency_levels: Concurrency limits (upload workers) to try
+        units: Upload only the first N units (0 = all)
+        mock_options: Keyword arguments for MockValalisAPI
+    """
+    if not DATA_PATH.exists():
+        print(f"ERROR: {DATA_PATH} not found")
+        print("Please run the geocoding and validation pipeline first")
+        sys.exit(1)
+
+    df = pd.read_parquet(DATA_PATH)
+    if units:
+        df = df.head(units)
+    print(f"Benchmarking uploads of {len(df):,} units")
+    print(f"Mock server: {mock_options}")
+
+    upload = load_upload_script()
+    cwd = Path.cwd()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # upload_to_valalis.py uses paths relative to the working directory
+        (Path(tmp) / "outputs").mkdir()
+        df.to_parquet(Path(tmp) / DATA_PATH, index=False)
+        os.chdir(tmp)
+        try:
+            for batch_size in batch_sizes:
+                for concurrency in concurrency_levels:
+                    result = run_once(upload, batch_size, concurrency, mock_options)
+                    results.append(result)
+                    status = "" if result["ok"] else "  FAILED"
+                    print(
+                        f"  batch={batch_size:>5}  concurrency={concurrency:>3}  "
+                        f"{result['units_per_s']:>9,.1f} units/s  "
+                        f"429s={result['http_429']}  5xx={result['http_5xx']}{status}"
+                    )
+        finally:
+            os.chdir(cwd)
+
+    results_df = pd.DataFrame(results)
+    print("\nResults:")
+    print(results_df.to_string(index=False))
+
+    best = results_df[results_df["ok"]].sort_values("units_per_s").tail(1)
+    if not best.empty:
+        row = best.iloc[0]
+        print(
+            f"\nBest: --batch-size {row['batch_size']} --max-concurrency "
+            f"{row['concurrency']} ({row['units_per_s']:,.1f} units/s)"
+        )
+
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    results_df.to_csv(RESULTS_PATH, index=False)
+    print(f"Saved results to {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark Valalis upload throughput against a local mock API",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run python scripts/benchmark_valalis_upload.py
+  uv run python scripts/benchmark_valalis_upload.py --batch-sizes 200,500 --concurrency 8,16,32
+  uv run python scripts/benchmark_valalis_upload.py --units 5000 --latency 0.5 --capacity 8
+        """,
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=parse_ints,
+        default=[100, 200, 500],
+        help="Comma-separated batch sizes to try (default: 100,200,500)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=parse_ints,
+        default=[4, 8, 16, 32],
+        help="Comma-separated concurrency limits to try (default: 4,8,16,32)",
+    )
+    parser.add_argument(
+        "--units",
+        type=int,
+        default=0,
+        help="Only upload the first N units (default: all)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.2,
+        help="Mock base latency per request in seconds (default: 0.2)",
+    )
+    parser.add_argument(
+        "--per-unit-latency",
+        type=float,
+        default=0.001,
+        help="Mock extra latency per unit in seconds (default: 0.001)",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=16,
+        help="Requests the mock processes in parallel (default: 16)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Mock rate limit in requests/second, 0 = unlimited (default: 0)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of mock requests refused with 503 (default: 0)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for mock jitter and failures (default: 0)",
+    )
+    args = parser.parse_args()
+
+    main(
+        batch_sizes=args.batch_sizes,
+        concurrency_levels=args.concurrency,
+        units=args.units,
+        mock_options={
+            "latency": args.latency,
+            "per_unit_latency": args.per_unit_latency,
+            "capacity": args.capacity,
+            "rate_limit": args.rate_limit,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+        },
+    )
@@ -4,19 +4,47 @@ Upload geocoded voting units to Valalis API.
 This script reads the final validated voting station data and uploads it
 to the Valalis i-bitz.world election monitoring platform as GeoJSON features.
 
-The upload process:
+The upload process (full mode, default):
 1. Delete all existing units from the collection (fresh start)
-2. Read final parquet file with Tier A+/D quality ratings
-3. Upload in batches (default: 200 units/batch) with async concurrency
-4. Save API response mapping to outputs/
+2. Stream the final parquet file (Tier A+/D quality ratings) batch by batch
+3. Build each batch's UnitData payloads for create() from the columns
+   (lib/valalis_payload.py) and hand the batches through a bounded queue to N
+   upload workers (default: 200 units/batch)
+4. Append the unit ids of each acknowledged batch and its API response to a
+   progress ledger, then write the response mapping to outputs/
+
+Memory stays flat regardless of dataset size: only a few batches are in
+flight at once and responses go to disk as soon as they arrive.
+
+Requests run under an AIMD concurrency limit that backs off on 429/5xx
+responses and slow replies, and failed batches are retried with jittered
+exponential backoff. Acknowledged units are appended to
+outputs/valalis_upload_ledger.jsonl, so an interrupted upload resumes where it
+stopped (without another delete_all()) when the command is re-run on the same
+input, even with a different --batch-size; a ledger left by a different
+version of the parquet file is refused.
+
+Creates are only retried when they cannot have been applied (429/503,
+connection failures). After any other failure their units are marked
+uncertain, since they may already exist, and the upload has to start over
+with --restart.
+
+Diff mode (--diff) skips the delete_all() and instead compares a content hash
+of every unit payload against the previous response mapping, sending only
+creates, updates and deletes for the units that changed. It needs a client
+with update() and delete() (currently only the --mock stand-in).
 
 Usage:
     uv run python scripts/upload_to_valalis.py --batch-size 200
     uv run python scripts/upload_to_valalis.py --batch-size 100  # Smaller batches
+    uv run python scripts/upload_to_valalis.py --diff  # Only changed units
+    uv run python scripts/upload_to_valalis.py --restart  # Ignore an old ledger
+    uv run python scripts/upload_to_valalis.py --mock  # Local stand-in, no API key
 
 Requirements:
     - VA_DB_API_KEY environment variable set in .env file
     - outputs/ect66_geocoded_validated.parquet exists
+    - outputs/valalis_upload_response.parquet exists (for --diff)
 
 Output:
     - outputs/valalis_upload_response.parquet (API response mapping)
@@ -26,130 +54,378 @@ import asyncio
 import argparse
 import os
 import sys
+import time
+from collections.abc import Iterable, Iterator
+from functools import partial
 from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
-from tqdm import tqdm
 
 # Add parent directory to path to import lib modules
 sys.path.append(str(Path(__file__).parent.parent))
 from lib.valalis_client import VA_Elect_API
-from lib.models import UnitData, create_google_url
+from lib.valalis_mock import MockValalisAPI
+from lib.models import UnitData
+from lib.valalis_payload import (
+    PROPERTY_COLUMNS,
+    build_features,
+    feature_collection,
+    google_map_urls,
+    iter_parquet_batches,
+)
+from lib.valalis_sync import MAPPING_COLUMNS, content_hash, plan_sync, read_mapping
+from lib.valalis_uploader import (
+    AdaptiveLimiter,
+    Batch,
+    UploadError,
+    UploadLedger,
+    pending_items,
+    run_pipeline,
+    send_with_retry,
+)
+
+DATA_PATH = Path("outputs/ect66_geocoded_validated.parquet")
+MAPPING_PATH = Path("outputs/valalis_upload_response.parquet")
+LEDGER_PATH = Path("outputs/valalis_upload_ledger.jsonl")
+# Mock runs keep the real mapping and ledger out of reach
+MOCK_MAPPING_PATH = Path("outputs/valalis_mock_response.parquet")
+MOCK_LEDGER_PATH = Path("outputs/valalis_mock_ledger.jsonl")
 
 
-async def main(batch_size: int):
+def build_units(df: pd.DataFrame) -> list[UnitData]:
+    """
+    Convert validated dataset rows to UnitData payloads for create() and update().
+
+    URLs come from google_map_urls (create_google_url, once per distinct
+    location), like those of created features.
+    """
+    place_id = df["PlaceId"] if "PlaceId" in df.columns else [""] * len(df)
+    urls = google_map_urls(df["Lat"], df["Lng"], place_id).to_pylist()
+    columns = {prop: df[column].tolist() for column, prop in PROPERTY_COLUMNS.items()}
+    return [
+        UnitData(**dict(zip(columns, values)), google_map_url=url)
+        for *values, url in zip(*columns.values(), urls)
+    ]
+
+
+def batched(items: list, batch_size: int) -> list[list]:
+    """Split items into consecutive batches of at most batch_size."""
+    return [items[i : i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def create_batches(
+    api_client: VA_Elect_API,
+    frames: Iterable[pa.Table | pd.DataFrame],
+    ledger: UploadLedger,
+) -> Iterator[Batch]:
+    """
+    Lazily turn chunks of the dataset into create calls for units not yet sent.
+
+    VA_Elect_API takes UnitData payloads through create(). Clients that also
+    accept a ready FeatureCollection body (create_features(), e.g.
+    MockValalisAPI) get one built straight from the columns instead. Units the
+    ledger already acknowledged are dropped first, so a resumed upload may
+    send some shorter batches.
+    """
+    create_features = getattr(api_client, "create_features", None)
+    for frame, keys in pending_items(frames, ledger, "create", "UnitId"):
+        unit_hashes = dict(
+            zip(frame["UnitId"].astype(str), content_hash(frame).tolist())
+        )
+        if create_features is not None:
+            call = partial(create_features, feature_collection(build_features(frame)))
+        else:
+            call = partial(api_client.create, build_units(frame))
+        yield Batch(keys, call, unit_hashes)
+
+
+def check_failures(failures: list[UploadError], ledger: UploadLedger):
+    """Abort (keeping the ledger) if any batch failed or has an unknown outcome."""
+    if not failures:
+        return
+    print(f"ERROR: {len(failures)} batches failed:")
+    for error in failures[:5]:
+        print(f"  {error}")
+    print(f"Acknowledged units are recorded in {ledger.path}")
+    if ledger.uncertain - ledger.acked:
+        print(
+            f"{len(ledger.uncertain - ledger.acked):,} units may have been created "
+            f"without a response, so the upload cannot be resumed safely"
+        )
+        print("Start a full upload over with --restart (without --diff)")
+    else:
+        print("Re-run the same command to resume from where it stopped")
+    sys.exit(1)
+
+
+def write_mapping(
+    ledger: UploadLedger, mapping_path: Path, known: pd.DataFrame | None = None
+) -> int:
+    """
+    Stream the response mapping to mapping_path.
+
+    Rows are written chunk by chunk (known rows first, then every row in the
+    ledger) to a temporary file that replaces the old mapping only once it is
+    complete.
+
+    Returns:
+        Number of mapping rows written
+    """
+
+    def frames():
+        if known is not None:
+            yield known
+        for rows in ledger.iter_rows():
+            yield pd.DataFrame(rows, columns=MAPPING_COLUMNS)
+
+    tmp_path = mapping_path.with_suffix(".parquet.tmp")
+    writer = None
+    total = 0
+    for frame in frames():
+        if frame.empty:
+            continue
+        frame = frame[MAPPING_COLUMNS].astype(
+            {"object_id": str, "content_hash": "UInt64"}
+        )
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        else:
+            table = table.cast(writer.schema)
+        writer.write_table(table)
+        total += len(frame)
+
+    if writer is not None:
+        writer.close()
+        tmp_path.replace(mapping_path)
+    return total
+
+
+async def full_upload(
+    api_client: VA_Elect_API,
+    batch_size: int,
+    workers: int,
+    limiter: AdaptiveLimiter,
+    max_retries: int,
+    ledger_path: Path,
+) -> UploadLedger:
+    """Delete everything on the platform and stream all units from DATA_PATH."""
+    ledger = UploadLedger(
+        ledger_path, mode="full", input_hash=UploadLedger.input_key(DATA_PATH)
+    )
+    if ledger.resuming:
+        print(
+            f"Resuming interrupted upload: {len(ledger.acked):,} units "
+            f"already acknowledged, skipping delete_all()"
+        )
+    else:
+        # Delete all existing units (fresh start)
+        print("Deleting all existing units from Valalis...")
+        await send_with_retry(api_client.delete_all, limiter, max_retries)
+        ledger.start()
+        print("Deletion complete")
+
+    total = pq.ParquetFile(DATA_PATH).metadata.num_rows
+    print(f"Uploading {total:,} units in batches of {batch_size}...")
+    failures = await run_pipeline(
+        create_batches(
+            api_client, iter_parquet_batches(DATA_PATH, batch_size), ledger
+        ),
+        workers,
+        limiter,
+        ledger,
+        max_retries,
+        require_features=True,
+        idempotent=False,
+    )
+    check_failures(failures, ledger)
+    print("Upload complete!")
+    return ledger
+
+
+async def diff_upload(
+    api_client: VA_Elect_API,
+    mapping_df: pd.DataFrame,
+    batch_size: int,
+    workers: int,
+    limiter: AdaptiveLimiter,
+    max_retries: int,
+    ledger_path: Path,
+) -> tuple[UploadLedger, pd.DataFrame]:
+    """Send only creates, updates and deletes for units that changed."""
+    df = pd.read_parquet(DATA_PATH)
+    print(f"Loaded {len(df):,} voting units")
+
+    plan = plan_sync(df, mapping_df)
+    print("Sync plan:")
+    for action, n in plan.summary().items():
+        print(f"  {action}: {n:,}")
+
+    ledger = UploadLedger(
+        ledger_path, mode="diff", input_hash=UploadLedger.input_key(DATA_PATH)
+    )
+    if ledger.resuming:
+        print(f"Resuming interrupted sync: {len(ledger.acked):,} items done")
+    else:
+        ledger.start()
+
+    batches = []
+    for rows, keys in pending_items([plan.delete], ledger, "delete", "object_id"):
+        for ids, batch_keys in zip(
+            batched(rows["object_id"].tolist(), batch_size), batched(keys, batch_size)
+        ):
+            batches.append(Batch(batch_keys, partial(api_client.delete, ids)))
+
+    for rows, keys in pending_items([plan.update], ledger, "update", "object_id"):
+        for ids, units, batch_keys in zip(
+            batched(rows["object_id"].tolist(), batch_size),
+            batched(build_units(rows), batch_size),
+            batched(keys, batch_size),
+        ):
+            batches.append(Batch(batch_keys, partial(api_client.update, ids, units)))
+
+    # Deletes and updates don't return mapping rows, creates do
+    failures = await run_pipeline(batches, workers, limiter, ledger, max_retries)
+    creates = (
+        plan.create.iloc[i : i + batch_size]
+        for i in range(0, len(plan.create), batch_size)
+    )
+    failures += await run_pipeline(
+        create_batches(api_client, creates, ledger),
+        workers,
+        limiter,
+        ledger,
+        max_retries,
+        require_features=True,
+        idempotent=False,
+    )
+    check_failures(failures, ledger)
+
+    updated = pd.DataFrame(
+        {
+            "object_id": plan.update["object_id"].values,
+            "unit_id": plan.update["UnitId"].values,
+            "province_name": plan.update["ProvinceName"].values,
+            "content_hash": plan.update["content_hash"].values,
+        }
+    )
+    known = pd.concat([plan.unchanged[MAPPING_COLUMNS], updated], ignore_index=True)
+    return ledger, known
+
+
+async def main(
+    batch_size: int,
+    diff: bool = False,
+    concurrency: int = 4,
+    max_concurrency: int = 32,
+    max_retries: int = 5,
+    restart: bool = False,
+    api_client: VA_Elect_API | MockValalisAPI | None = None,
+    mapping_path: Path = MAPPING_PATH,
+    ledger_path: Path = LEDGER_PATH,
+):
     """
     Upload voting units to Valalis API in batches.
 
     Args:
         batch_size: Number of units to upload per API request (default: 200)
+        diff: Only upload units that changed since the previous mapping
+        concurrency: Initial number of concurrent requests
+        max_concurrency: Number of upload workers, and upper bound for the
+            adaptive concurrency limit
+        max_retries: Retries per batch for 429/5xx/transport errors
+        restart: Discard the progress ledger of an interrupted upload
+        api_client: Client to upload with (e.g. MockValalisAPI); defaults to
+            VA_Elect_API with the key from VA_DB_API_KEY
+        mapping_path: Response mapping to diff against and write
+        ledger_path: Progress ledger of this upload
     """
-    # Load environment variables
-    load_dotenv()
-    api_key = os.getenv("VA_DB_API_KEY")
+    if api_client is None:
+        # Load environment variables
+        load_dotenv()
+        api_key = os.getenv("VA_DB_API_KEY")
 
-    if not api_key:
-        print("ERROR: VA_DB_API_KEY not found in environment variables")
-        print("Please set it in your .env file")
-        sys.exit(1)
+        if not api_key:
+            print("ERROR: VA_DB_API_KEY not found in environment variables")
+            print("Please set it in your .env file")
+            sys.exit(1)
+
+        # Initialize API client
+        api_client = VA_Elect_API(api_key)
 
-    # Read final validated data
-    data_path = Path("outputs/ect66_geocoded_validated.parquet")
-    if not data_path.exists():
-        print(f"ERROR: {data_path} not found")
+    # Check final validated data
+    if not DATA_PATH.exists():
+        print(f"ERROR: {DATA_PATH} not found")
         print("Please run the geocoding and validation pipeline first")
         sys.exit(1)
 
-    print(f"Loading data from {data_path}...")
-    df = pd.read_parquet(data_path)
-    print(f"Loaded {len(df):,} voting units")
+    if diff and not all(hasattr(api_client, m) for m in ("update", "delete")):
+        print(f"ERROR: {type(api_client).__name__} has no update()/delete() for --diff")
+        print("Run without --diff for a full upload")
+        sys.exit(1)
 
-    # Initialize API client
-    api_client = VA_Elect_API(api_key)
-
-    # Delete all existing units (fresh start)
-    print("Deleting all existing units from Valalis...")
-    await api_client.delete_all()
-    print("Deletion complete")
-
-    # Prepare for batch upload
-    units = []
-    count = 0
-    tasks = []
-    semaphore = asyncio.Semaphore(4)  # Limit concurrent requests
-
-    async def create_units(units_batch):
-        """Upload a batch of units with semaphore control."""
-        async with semaphore:
-            return await api_client.create(units_batch)
-
-    # Process each unit
-    print(f"Uploading {len(df):,} units in batches of {batch_size}...")
-    for i, row in tqdm(df.iterrows(), total=df.shape[0], desc="Processing units"):
-        r = row.to_dict()
-
-        # Create UnitData instance
-        u = UnitData(
-            unit_id=r["UnitId"],
-            unit_name=r["UnitName"],
-            province_name=r["ProvinceName"],
-            division_number=r["DivisionNumber"],
-            district_name=r["DistrictName"],
-            sub_district_name=r["SubDistrictName"],
-            unit_number=r["UnitNumber"],
-            latitude=r["Lat"],
-            longitude=r["Lng"],
-            google_map_url=create_google_url(
-                (r["Lat"], r["Lng"]), placeId=r.get("PlaceId", "")
-            ),
-            tier_location=r["TierLocation"],
-        )
-        units.append(u)
-
-        # If batch is full, upload it
-        if len(units) == batch_size:
-            count += len(units)
-            tasks.append(create_units(units))
-            units = []
-
-    # Upload any remaining units
-    if units:
-        count += len(units)
-        tasks.append(create_units(units))
-
-    # Wait for all uploads to complete
-    print(f"Uploading {count:,} total units across {len(tasks)} batches...")
-    result = await asyncio.gather(*tasks)
-    print("Upload complete!")
+    if restart and ledger_path.exists():
+        print(f"Discarding progress ledger {ledger_path}")
+        ledger_path.unlink()
+
+    limiter = AdaptiveLimiter(initial=concurrency, max_limit=max_concurrency)
+
+    mapping_df = None
+    if diff:
+        try:
+            mapping_df = read_mapping(mapping_path)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            print("Restore it, or run without --diff for a full upload")
+            sys.exit(1)
+
+    start = time.monotonic()
+    known = None
+    try:
+        if mapping_df is not None:
+            print(f"Loaded {len(mapping_df):,} previous mappings from {mapping_path}")
+            ledger, known = await diff_upload(
+                api_client,
+                mapping_df,
+                batch_size,
+                max_concurrency,
+                limiter,
+                max_retries,
+                ledger_path,
+            )
+        else:
+            if diff:
+                print(f"WARNING: {mapping_path} not found, falling back to full upload")
+            ledger = await full_upload(
+                api_client,
+                batch_size,
+                max_concurrency,
+                limiter,
+                max_retries,
+                ledger_path,
+            )
+    except UploadError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
 
     # Save API response mapping
     print("Saving API response mapping...")
-    output_path = Path("outputs/valalis_upload_response.parquet")
-
-    # Parse result (list of API responses)
-    response_data = []
-    for batch_result in result:
-        if "features" in batch_result:
-            for feature in batch_result["features"]:
-                response_data.append(
-                    {
-                        "object_id": feature["properties"].get("_id", ""),
-                        "unit_id": feature["properties"].get("unit_id", ""),
-                        "province_name": feature["properties"].get("province_name", ""),
-                    }
-                )
-
-    if response_data:
-        response_df = pd.DataFrame(response_data)
-        response_df.to_parquet(output_path)
-        print(f"Saved {len(response_df):,} response records to {output_path}")
+    n_rows = write_mapping(ledger, mapping_path, known)
+    if n_rows:
+        print(f"Saved {n_rows:,} response records to {mapping_path}")
     else:
         print("WARNING: No response data to save")
+    ledger.clear()
+    elapsed = time.monotonic() - start
 
     print("\nUpload summary:")
-    print(f"  Total units uploaded: {count:,}")
+    print(f"  Mode: {'diff' if diff else 'full'}")
+    print(f"  Units on platform: {n_rows:,}")
     print(f"  Batch size: {batch_size}")
-    print(f"  Number of batches: {len(tasks)}")
+    print(f"  Final concurrency limit: {limiter.limit:.1f}")
+    print(f"  Elapsed: {elapsed:.1f}s ({n_rows / elapsed:,.0f} units/s)")
 
 
 if __name__ == "__main__":
@@ -160,6 +436,8 @@ if __name__ == "__main__":
 Examples:
   uv run python scripts/upload_to_valalis.py --batch-size 200
   uv run python scripts/upload_to_valalis.py --batch-size 100
+  uv run python scripts/upload_to_valalis.py --diff
+  uv run python scripts/upload_to_valalis.py --mock --batch-size 500
         """,
     )
     parser.add_argument(
@@ -168,7 +446,54 @@ Examples:
         default=200,
         help="Number of units to upload per API request (default: 200)",
     )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Only create/update/delete units that changed since the last upload",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Initial number of concurrent requests (default: 4)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=32,
+        help="Upload workers / upper bound for the adaptive concurrency limit "
+        "(default: 32)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries per batch on 429/5xx/network errors (default: 5)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the progress ledger of an interrupted upload and start over",
+    )
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="Upload to a local in-memory stand-in (lib/valalis_mock.py) instead "
+        "of the live API",
+    )
     args = parser.parse_args()
 
     # Run async main function
-    asyncio.run(main(batch_size=args.batch_size))
+    asyncio.run(
+        main(
+            batch_size=args.batch_size,
+            diff=args.diff,
+            concurrency=args.concurrency,
+            max_concurrency=args.max_concurrency,
+            max_retries=args.max_retries,
+            restart=args.restart,
+            api_client=MockValalisAPI() if args.mock else None,
+            mapping_path=MOCK_MAPPING_PATH if args.mock else MAPPING_PATH,
+            ledger_path=MOCK_LEDGER_PATH if args.mock else LEDGER_PATH,
+        )
+    )
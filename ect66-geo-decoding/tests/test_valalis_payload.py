@@ -0,0 +1,86 @@
+import json
+import math
+
+import pandas as pd
+import pytest
+
+# valalis_payload builds URLs with lib.models.create_google_url
+models = pytest.importorskip("lib.models")
+
+from lib.valalis_payload import (  # noqa: E402
+    build_features,
+    feature_collection,
+    google_map_urls,
+    iter_feature_batches,
+)
+
+
+@pytest.fixture
+def units():
+    return pd.DataFrame(
+        {
+            "UnitId": [1, 2, 3],
+            "UnitName": ['โรงเรียน "บ้านนา"', "วัดบางพลี", "ศาลาประชาคม"],
+            "ProvinceName": ["สมุทรปราการ"] * 3,
+            "DivisionNumber": [1, 1, 2],
+            "DistrictName": ["บางพลี"] * 3,
+            "SubDistrictName": ["บางพลีใหญ่"] * 3,
+            "UnitNumber": [1, 2, 3],
+            "Lat": [13.6, math.nan, 13.7],
+            "Lng": [100.7, 100.8, math.nan],
+            "TierLocation": ["A+", "D", "D"],
+            "PlaceId": ["ChIJabc", None, ""],
+        }
+    )
+
+
+def test_features_are_valid_geojson(units):
+    features = [json.loads(f) for f in build_features(units).to_pylist()]
+
+    assert features[0]["geometry"] == {"type": "Point", "coordinates": [100.7, 13.6]}
+    assert features[0]["properties"]["unit_name"] == 'โรงเรียน "บ้านนา"'
+    assert features[0]["properties"]["google_map_url"] == models.create_google_url(
+        (13.6, 100.7), placeId="ChIJabc"
+    )
+
+
+def test_missing_coordinates_give_null_geometry_and_url(units):
+    features = build_features(units)
+
+    assert features.null_count == 0
+    for feature in [json.loads(f) for f in features.to_pylist()[1:]]:
+        assert feature["geometry"] is None
+        assert feature["properties"]["google_map_url"] is None
+    assert json.loads(features[1].as_py())["properties"]["latitude"] is None
+
+
+def test_feature_collection_with_missing_coordinates(units):
+    batches = list(iter_feature_batches(units, batch_size=2))
+
+    assert [count for count, _ in batches] == [2, 1]
+    bodies = [json.loads(body) for _, body in batches]
+    assert [len(body["features"]) for body in bodies] == [2, 1]
+    assert json.loads(feature_collection(build_features(units.iloc[:0])))[
+        "features"
+    ] == []
+
+
+def test_urls_match_create_google_url():
+    lat = [13.6, 13.6, 14.25, 15.0, 15.0]
+    lng = [100.7, 100.7, 101.0, 99.125, 99.125]
+    place_id = ["ChIJabc", "ChIJabc", None, "", "ChIJxyz"]
+
+    urls = google_map_urls(lat, lng, place_id).to_pylist()
+
+    assert urls == [
+        models.create_google_url((a, b), placeId=pid or "")
+        for a, b, pid in zip(lat, lng, place_id)
+    ]
+
+
+def test_urls_match_features(units):
+    urls = google_map_urls(units["Lat"], units["Lng"], units["PlaceId"]).to_pylist()
+    features = [json.loads(f) for f in build_features(units).to_pylist()]
+
+    assert features[0]["properties"]["google_map_url"] == urls[0]
+    assert [f["properties"]["google_map_url"] for f in features[1:]] == [None, None]
@@ -0,0 +1,110 @@
+import pandas as pd
+import pytest
+
+from lib.valalis_sync import (
+    MAPPING_COLUMNS,
+    PAYLOAD_COLUMNS,
+    content_hash,
+    plan_sync,
+    read_mapping,
+)
+
+
+def units(*unit_ids: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "UnitId": list(unit_ids),
+            "UnitName": [f"หน่วย {i}" for i in unit_ids],
+            "ProvinceName": "ชลบุรี",
+            "DivisionNumber": 1,
+            "DistrictName": "เมืองชลบุรี",
+            "SubDistrictName": "บางปลาสร้อย",
+            "UnitNumber": list(unit_ids),
+            "Lat": [13.0 + i / 100 for i in unit_ids],
+            "Lng": 100.98,
+            "PlaceId": ["ChIJ" if i % 2 else None for i in unit_ids],
+            "TierLocation": "A+",
+        }
+    )
+
+
+def mapping(df: pd.DataFrame, hashes: bool = True) -> pd.DataFrame:
+    mapping_df = pd.DataFrame(
+        {
+            "object_id": [f"obj-{i}" for i in df["UnitId"]],
+            "unit_id": df["UnitId"].values,
+            "province_name": df["ProvinceName"].values,
+            "content_hash": content_hash(df).values,
+        }
+    )
+    return mapping_df if hashes else mapping_df.drop(columns=["content_hash"])
+
+
+def test_units_are_classified():
+    previous = units(1, 2, 3, 4)
+    current = units(1, 2, 3, 5)
+    current.loc[current["UnitId"] == 2, "Lat"] = 14.0
+
+    plan = plan_sync(current, mapping(previous))
+
+    assert plan.create["UnitId"].tolist() == [5]
+    assert plan.update["UnitId"].tolist() == [2]
+    assert plan.update["object_id"].tolist() == ["obj-2"]
+    assert plan.delete["object_id"].tolist() == ["obj-4"]
+    assert plan.unchanged["object_id"].tolist() == ["obj-1", "obj-3"]
+    assert list(plan.unchanged.columns) == MAPPING_COLUMNS
+
+
+def test_duplicate_uploads_are_deleted():
+    previous = mapping(units(1, 2))
+    duplicate = previous.iloc[[0]].assign(object_id="obj-1-copy")
+    plan = plan_sync(units(1, 2), pd.concat([previous, duplicate]))
+
+    assert plan.delete["object_id"].tolist() == ["obj-1-copy"]
+    assert plan.unchanged["object_id"].tolist() == ["obj-1", "obj-2"]
+
+
+def test_mapping_without_hashes_updates_every_unit():
+    plan = plan_sync(units(1, 2), mapping(units(1, 2), hashes=False))
+    assert plan.update["UnitId"].tolist() == [1, 2]
+    assert plan.unchanged.empty
+
+
+def test_content_hash_is_stable():
+    # Pinned so a pandas upgrade or a payload change that would silently
+    # trigger a full re-upload in --diff mode shows up here first
+    assert content_hash(units(1)).tolist() == [11676637794454885402]
+
+
+def test_content_hash_ignores_column_order_and_extra_columns():
+    df = units(1, 2, 3)
+    shuffled = df[PAYLOAD_COLUMNS[::-1]].assign(Note="ignored")
+    assert content_hash(shuffled).tolist() == content_hash(df).tolist()
+
+
+def test_content_hash_follows_payload_fields():
+    df = units(1, 2)
+    moved = df.assign(Lng=[100.98, 101.0])
+    assert (content_hash(df) == content_hash(moved)).tolist() == [True, False]
+
+
+def test_read_mapping(tmp_path):
+    assert read_mapping(tmp_path / "missing.parquet") is None
+
+    path = tmp_path / "mapping.parquet"
+    mapping(units(1, 2)).to_parquet(path)
+    assert read_mapping(path)["object_id"].tolist() == ["obj-1", "obj-2"]
+
+
+def test_read_mapping_rejects_corrupt_file(tmp_path):
+    path = tmp_path / "mapping.parquet"
+    path.write_bytes(b"not a parquet file")
+    with pytest.raises(ValueError, match="not a readable mapping"):
+        read_mapping(path)
+
+
+def test_read_mapping_rejects_missing_columns(tmp_path):
+    path = tmp_path / "mapping.parquet"
+    mapping(units(1)).drop(columns=["object_id"]).to_parquet(path)
+    with pytest.raises(ValueError, match="object_id"):
+        read_mapping(path)
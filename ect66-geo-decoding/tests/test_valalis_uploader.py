@@ -0,0 +1,245 @@
+import asyncio
+import json
+from functools import partial
+
+import httpx
+import pandas as pd
+import pytest
+
+from lib.valalis_mock import MockValalisAPI
+from lib.valalis_uploader import (
+    AdaptiveLimiter,
+    Batch,
+    UncertainUploadError,
+    UploadError,
+    UploadLedger,
+    pending_items,
+    run_pipeline,
+    send_with_retry,
+)
+
+
+def chunks(df: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+def test_ledger_resumes_same_input(tmp_path):
+    ledger = UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
+    ledger.start()
+    ledger.record(["create:1", "create:2"], [{"object_id": "x", "unit_id": 1}])
+
+    resumed = UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
+    assert resumed.resuming
+    assert resumed.acked == {"create:1", "create:2"}
+
+
+def test_ledger_refuses_changed_input(tmp_path):
+    ledger = UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
+    ledger.start()
+    ledger.record(["create:1"], [])
+
+    with pytest.raises(UploadError, match="different input"):
+        UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="b")
+
+
+def test_input_key_follows_file_content(tmp_path):
+    path = tmp_path / "units.parquet"
+    path.write_bytes(b"one")
+    before = UploadLedger.input_key(path)
+    path.write_bytes(b"two")
+    assert UploadLedger.input_key(path) != before
+
+
+def test_resume_with_changed_batch_size_skips_sent_units(tmp_path):
+    units = pd.DataFrame({"UnitId": range(1000)})
+    ledger = UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
+    ledger.start()
+    # Interrupted after the first 5 batches of 100
+    first_run = pending_items(chunks(units, 100), ledger, "create", "UnitId")
+    for _, keys in list(first_run)[:5]:
+        ledger.record(keys, [])
+
+    resumed = UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
+    pending = list(pending_items(chunks(units, 75), resumed, "create", "UnitId"))
+
+    sent = [unit_id for frame, _ in pending for unit_id in frame["UnitId"]]
+    assert sent == list(range(500, 1000))
+    # The chunk straddling the interruption point only keeps unsent units
+    assert pending[0][1] == [f"create:{i}" for i in range(500, 525)]
+
+
+def test_ledger_refuses_per_batch_keys(tmp_path):
+    path = tmp_path / "ledger.jsonl"
+    header = {"mode": "full", "input_hash": "a"}
+    path.write_text(json.dumps(header) + "\n" + json.dumps({"key": "ab12", "rows": []}))
+
+    with pytest.raises(UploadError, match="--restart"):
+        UploadLedger(path, mode="full", input_hash="a")
+
+
+class InterruptedAPI(MockValalisAPI):
+    """Mock that rejects every create once `stop_after` objects exist."""
+
+    def __init__(self, stop_after: int):
+        super().__init__(latency=0, per_unit_latency=0, jitter=0)
+        self.stop_after = stop_after
+
+    async def create_features(self, body: bytes) -> dict:
+        if self.stop_after is not None and len(self.objects) >= self.stop_after:
+            raise self._error("POST", 400)
+        return await super().create_features(body)
+
+
+def create_batches(api, frames, ledger):
+    for frame, keys in pending_items(frames, ledger, "create", "UnitId"):
+        features = [
+            {"type": "Feature", "properties": {"unit_id": int(unit_id)}}
+            for unit_id in frame["UnitId"]
+        ]
+        body = json.dumps({"type": "FeatureCollection", "features": features})
+        yield Batch(keys, partial(api.create_features, body.encode()))
+
+
+def upload(api, units, batch_size, ledger_path, idempotent=True):
+    async def run():
+        ledger = UploadLedger(ledger_path, mode="full", input_hash="a")
+        if not ledger.resuming:
+            ledger.start()
+        limiter = AdaptiveLimiter(initial=4, max_limit=8)
+        batches = create_batches(api, chunks(units, batch_size), ledger)
+        return await run_pipeline(
+            batches,
+            8,
+            limiter,
+            ledger,
+            max_retries=0,
+            require_features=True,
+            idempotent=idempotent,
+        )
+
+    return asyncio.run(run())
+
+
+def test_pipeline_resume_with_different_batching(tmp_path):
+    units = pd.DataFrame({"UnitId": range(1000)})
+    api = InterruptedAPI(stop_after=500)
+
+    failures = upload(api, units, 100, tmp_path / "ledger.jsonl")
+    assert failures
+    assert isinstance(failures[0].__cause__, httpx.HTTPStatusError)
+    assert len(api.objects) < 1000
+
+    api.stop_after = None
+    assert upload(api, units, 75, tmp_path / "ledger.jsonl") == []
+
+    unit_ids = [f["properties"]["unit_id"] for f in api.objects.values()]
+    assert sorted(unit_ids) == list(range(1000))
+
+
+def http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://valalis.test")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(str(status), request=request, response=response)
+
+
+def flaky(*errors: Exception):
+    """Async call that raises the given errors in turn, then succeeds."""
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return {"features": []}
+
+    return call, calls
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("lib.valalis_uploader.backoff_delay", lambda attempt: 0)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        http_error(429),
+        http_error(503),
+        httpx.ConnectError("refused"),
+        httpx.PoolTimeout("pool"),
+    ],
+)
+def test_create_is_retried_when_not_applied(no_backoff, error):
+    call, calls = flaky(error)
+    send = send_with_retry(
+        call, AdaptiveLimiter(), require_features=True, idempotent=False
+    )
+    assert asyncio.run(send) == {"features": []}
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    "error",
+    [http_error(500), http_error(502), httpx.ReadTimeout("read"), httpx.ReadError("x")],
+)
+def test_create_with_unknown_outcome_is_not_retried(no_backoff, error):
+    call, calls = flaky(error)
+    with pytest.raises(UncertainUploadError):
+        asyncio.run(send_with_retry(call, AdaptiveLimiter(), idempotent=False))
+    assert len(calls) == 1
+
+    # Updates and deletes are idempotent and keep retrying
+    call, calls = flaky(error)
+    asyncio.run(send_with_retry(call, AdaptiveLimiter()))
+    assert len(calls) == 2
+
+
+class ShortResponseAPI(MockValalisAPI):
+    """Mock whose first create response drops its last feature."""
+
+    def __init__(self):
+        super().__init__(latency=0, per_unit_latency=0, jitter=0)
+        self.short = True
+
+    async def create_features(self, body: bytes) -> dict:
+        result = await super().create_features(body)
+        if self.short:
+            self.short = False
+            result["features"] = result["features"][:-1]
+        return result
+
+
+def test_short_create_response_blocks_resume(tmp_path):
+    units = pd.DataFrame({"UnitId": range(10)})
+    api = ShortResponseAPI()
+
+    failures = upload(api, units, 10, tmp_path / "ledger.jsonl", idempotent=False)
+
+    assert [type(e) for e in failures] == [UncertainUploadError]
+    # The unit is on the platform, only its response was lost
+    assert len(api.objects) == 10
+    with pytest.raises(UploadError, match="unknown outcome"):
+        UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
+
+
+class LostResponseAPI(MockValalisAPI):
+    """Mock that applies every create but answers with a 502."""
+
+    def __init__(self):
+        super().__init__(latency=0, per_unit_latency=0, jitter=0)
+
+    async def create_features(self, body: bytes) -> dict:
+        await super().create_features(body)
+        raise http_error(502)
+
+
+def test_uncertain_create_is_not_resent(tmp_path):
+    units = pd.DataFrame({"UnitId": range(10)})
+    api = LostResponseAPI()
+
+    failures = upload(api, units, 5, tmp_path / "ledger.jsonl", idempotent=False)
+
+    assert [type(e) for e in failures] == [UncertainUploadError] * 2
+    assert len(api.objects) == 10
+    with pytest.raises(UploadError, match="--restart"):
+        UploadLedger(tmp_path / "ledger.jsonl", mode="full", input_hash="a")
@@ -0,0 +1,239 @@
+"""
+Anchor locations of main-day voting units.
+
+`spec/unit name process for main day.md` describes a unit as an anchor
+location (the place to geocode) plus a sub-location (tent, parking lot,
+ศาลา 1, unit number, directions), with one anchor serving many ballot units.
+Names are cleaned (lib/unit_clustering.py), split with the rule-based parser
+(lib/unit_name_parser.py), and units are grouped into anchors by three
+signals:
+
+    1. Tambon: units only share an anchor within the same block
+    2. Normalized name: anchor names equal or near-duplicates after
+       canonicalization (cluster_unit_names)
+    3. Consecutive rows: neighbouring units whose anchor names extend one
+       another by separate words (วิทยาลัยศิลปหัตถกรรมกรุงเทพ / ... ถนนลาดพร้าว),
+       with the same numbers
+
+Geocoding and validation then run once per anchor, and fan_out() maps the
+results back to units.
+"""
+
+import re
+
+import pandas as pd
+
+from .unit_clustering import (
+    DEFAULT_BLOCK_COLUMNS,
+    DEFAULT_SIMILARITY,
+    DIGITS,
+    ORDINAL,
+    WHITESPACE,
+    clean_names,
+    cluster_unit_names,
+    find_root,
+)
+from .unit_name_parser import parse_unit_names
+
+DEFAULT_NUMBER_COLUMN = "unitNumber"
+DEFAULT_NAME_COLUMN = "unitName"
+
+DIRECTION_WORDS = "ตรงข้าม|ใกล้|ติด|ข้าง|หน้า|หลัง|ฝั่ง"
+# Directions after the place name: "... ถนนอัษฎางค์ ตรงข้าม บริษัท ..."
+DIRECTION = re.compile(rf"\s+(?=(?:{DIRECTION_WORDS})\S)")
+# Start of a separate word extending an anchor name: a space, a road or a direction
+EXTENSION = re.compile(rf"\s|ถนน|ถ\.|ซอย|ซ\.|{DIRECTION_WORDS}")
+# Shortest canonical anchor that may extend into a neighbour's name
+MIN_PREFIX_LENGTH = 8
+
+
+def split_anchor_names(names: pd.Series) -> pd.DataFrame:
+    """
+    Split raw unit names into anchor name and sub-location.
+
+    Returns:
+        DataFrame aligned with names: `anchor_name`, `location_type` and
+        `sub_location` (area prefix, buildings, floor, parentheticals and
+        directions, joined with " / "; None when the unit is the anchor itself)
+    """
+    # Once per distinct name, broadcast back
+    codes, uniques = pd.factorize(names.fillna("").astype(str))
+    parsed = parse_unit_names(clean_names(pd.Series(uniques, dtype=object)).tolist())
+    parts = parsed["location_name"].str.split(DIRECTION, n=1, expand=True)
+    # No columns at all when there are no names
+    anchor = parts[0].str.strip() if 0 in parts else parsed["location_name"]
+    direction = parts[1] if 1 in parts else pd.Series(None, index=parts.index)
+
+    sub_parts = pd.DataFrame(
+        {
+            "area_prefix": parsed["area_prefix"],
+            "buildings": parsed["buildings"].str.join(", "),
+            "floor": parsed["floor"],
+            "extra_info": parsed["extra_info"],
+            "direction": direction,
+        }
+    ).astype(object)
+    sub_location = sub_parts.apply(
+        lambda row: " / ".join(part for part in row if isinstance(part, str) and part),
+        axis=1,
+    )
+    split = pd.DataFrame(
+        {
+            "anchor_name": anchor.where(anchor != "", parsed["original"]),
+            "location_type": parsed["location_type"],
+            "sub_location": sub_location.where(sub_location != "", None),
+        }
+    )
+    return split.iloc[codes].set_index(names.index)
+
+
+def _extends(a: str, b: str) -> bool:
+    """
+    Whether one cleaned anchor name is the other plus separate words.
+
+    The canonical (whitespace-free) names must be prefix and extension with
+    the same numbers, and the extension must start a new word in the
+    cleaned name: วัดบางพลี / วัดบางพลี ถนนเทพารักษ์ extend each other,
+    วัดบางพลี / วัดบางพลีใหญ่ใน and ศาลาประชาคมหมู่ 1 / ศาลาประชาคมหมู่ 12 don't.
+    """
+    short, long = sorted((a, b), key=lambda name: len(WHITESPACE.sub("", name)))
+    short_key, long_key = WHITESPACE.sub("", short), WHITESPACE.sub("", long)
+    if len(short_key) < MIN_PREFIX_LENGTH or len(short_key) == len(long_key):
+        return False
+    if not long_key.startswith(short_key):
+        return False
+    if DIGITS.findall(short_key) != DIGITS.findall(long_key):
+        return False
+    # Where the extension starts in the cleaned long name
+    seen = 0
+    for start, char in enumerate(long):
+        if seen == len(short_key):
+            break
+        seen += not char.isspace()
+    return EXTENSION.match(long, start) is not None
+
+
+def group_anchor_locations(
+    units: pd.DataFrame,
+    name_column: str = DEFAULT_NAME_COLUMN,
+    block_columns: list[str] = DEFAULT_BLOCK_COLUMNS,
+    number_column: str | None = DEFAULT_NUMBER_COLUMN,
+    similarity: float = DEFAULT_SIMILARITY,
+) -> pd.DataFrame:
+    """
+    Assign every unit to an anchor location.
+
+    Anchor names are clustered within blocks (cluster_unit_names), then
+    clusters of consecutive units (by number_column within the block, file
+    order if None) are merged when one anchor name extends the other (see
+    _extends).
+
+    Args:
+        units: Voting units
+        name_column: Column with the raw unit name
+        block_columns: Columns that must match for units to share an anchor
+        number_column: Unit order within a block, for the consecutive signal
+        similarity: Minimum edit similarity of near-duplicate anchor names
+
+    Returns:
+        Copy of units with `anchor_name`, `location_type`, `sub_location`,
+        `anchor_id` (int, in order of first appearance), `anchor_size`
+        (units) and `anchor` (most common anchor name variant)
+    """
+    out = units.copy()
+    out[["anchor_name", "location_type", "sub_location"]] = split_anchor_names(
+        out[name_column]
+    )
+    clustered = cluster_unit_names(out, "anchor_name", block_columns, similarity)
+    cluster_id = clustered["cluster_id"].to_numpy()
+    # Cleaned names without unit numbering; whitespace kept for word boundaries
+    anchor_names = clean_names(out["anchor_name"]).str.replace(ORDINAL, "", regex=True)
+    anchor_names = anchor_names.to_numpy()
+
+    # Consecutive units in a block whose anchor names extend one another
+    order = out[block_columns].fillna("").astype(str)
+    if number_column is not None:
+        order["_number"] = pd.to_numeric(out[number_column], errors="coerce")
+    order["_row"] = range(len(out))
+    order = order.sort_values(list(order.columns), kind="stable")
+    rows = order["_row"].to_numpy()
+    blocks = order[block_columns]
+    same_block = (blocks == blocks.shift()).all(axis=1).to_numpy()
+
+    parent = {cluster: cluster for cluster in set(cluster_id.tolist())}
+    for i in range(1, len(rows)):
+        a, b = rows[i - 1], rows[i]
+        if not same_block[i] or cluster_id[a] == cluster_id[b]:
+            continue
+        if _extends(anchor_names[a], anchor_names[b]):
+            root_a = find_root(parent, cluster_id[a])
+            root_b = find_root(parent, cluster_id[b])
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    roots = {cluster: find_root(parent, cluster) for cluster in parent}
+    out["anchor_id"] = pd.factorize(pd.Series(cluster_id).map(roots))[0]
+    out["anchor_size"] = out.groupby("anchor_id")["anchor_id"].transform("size")
+
+    # Most common anchor name variant, first appearance breaking ties
+    names = (
+        clustered.groupby([out["anchor_id"], "representative"], sort=False)
+        .size()
+        .reset_index(name="count")
+        .sort_values("count", ascending=False, kind="stable")
+        .drop_duplicates("anchor_id")
+        .set_index("anchor_id")["representative"]
+    )
+    out["anchor"] = out["anchor_id"].map(names)
+    return out
+
+
+def anchor_locations(
+    grouped: pd.DataFrame,
+    block_columns: list[str] = DEFAULT_BLOCK_COLUMNS,
+) -> pd.DataFrame:
+    """
+    One row per anchor, for geocoding and validation.
+
+    Returns:
+        DataFrame with `anchor_id`, block_columns, `anchor`, `location_type`
+        (most common among its units), `anchor_size` and `sub_locations`
+        (distinct sub-locations of its units)
+    """
+    location_type = (
+        grouped.groupby(["anchor_id", "location_type"], sort=False)
+        .size()
+        .reset_index(name="count")
+        .sort_values("count", ascending=False, kind="stable")
+        .drop_duplicates("anchor_id")
+        .set_index("anchor_id")["location_type"]
+    )
+    sub_locations = grouped.groupby("anchor_id")["sub_location"].nunique()
+    anchors = (
+        grouped.drop_duplicates("anchor_id")[
+            ["anchor_id", *block_columns, "anchor", "anchor_size"]
+        ]
+        .sort_values("anchor_id")
+        .reset_index(drop=True)
+    )
+    anchors.insert(
+        len(block_columns) + 2,
+        "location_type",
+        anchors["anchor_id"].map(location_type),
+    )
+    anchors["sub_locations"] = anchors["anchor_id"].map(sub_locations)
+    return anchors
+
+
+def fan_out(grouped: pd.DataFrame, anchor_results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach per-anchor results (geocodes, validation) to every unit.
+
+    Args:
+        grouped: Output of group_anchor_locations()
+        anchor_results: One row per anchor_id with the columns to attach
+
+    Returns:
+        grouped with the anchor_results columns, one row per unit
+    """
+    return grouped.merge(anchor_results, on="anchor_id", how="left", validate="m:1")
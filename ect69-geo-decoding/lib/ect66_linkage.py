@@ -0,0 +1,185 @@
+"""
+Reuse of ECT66 coordinates for ECT69 voting units.
+
+Most ECT69 polling places are the schools, temples and offices of ECT66,
+where `ect66_geocoded_validated.parquet` already has Tier A+ coordinates
+(a Google result validated inside its tambon). Before any geocoding API
+call, ECT69 units are linked to them:
+
+    1. Blocking: candidates share province, amphoe and tambon (admin
+       prefixes such as จังหวัด/อำเภอ/เขต/ตำบล/แขวง stripped, as ECT66 names
+       carry them), since tambon names repeat across amphoes
+    2. Scoring: normalized edit similarity of the canonical anchor names
+       (lib/anchor_locations.py); names with different numbers score 0
+    3. Best candidate per ECT69 anchor: `accepted` at or above the accept
+       threshold, `review` at or above the review threshold
+
+Each distinct ECT69 (province, amphoe, tambon, anchor) is scored once and the link
+broadcast back to its units. ECT66 units of the same place are collapsed to
+their most common PlaceId first.
+"""
+
+import re
+
+import pandas as pd
+from editdistpy import levenshtein
+
+from .anchor_locations import split_anchor_names
+from .unit_clustering import DIGITS, canonical_names
+
+DEFAULT_ACCEPT = 0.9
+DEFAULT_REVIEW = 0.75
+
+# ECT66 column names (PascalCase)
+ECT66_PROVINCE = "ProvinceName"
+ECT66_DISTRICT = "DistrictName"
+ECT66_SUBDISTRICT = "SubDistrictName"
+ECT66_NAME = "UnitName"
+
+ADMIN_PREFIX = re.compile(r"^(?:จังหวัด|จ\.|อำเภอ|อ\.|เขต|ตำบล|ต\.|แขวง)\s*")
+WHITESPACE = re.compile(r"\s+")
+
+# Candidates must share these (normalized) admin areas
+BLOCK = ["province", "district", "tambon"]
+
+LINK_COLUMNS = [
+    "ect66_unit_id",
+    "ect66_unit_name",
+    "ect66_units",
+    "ect66_lat",
+    "ect66_lng",
+    "ect66_place_id",
+    "link_score",
+    "link_status",
+]
+
+
+def normalize_admin(names: pd.Series) -> pd.Series:
+    """Admin area names without their prefix and whitespace, for blocking."""
+    names = names.fillna("").astype(str).str.strip()
+    names = names.str.replace(ADMIN_PREFIX, "", regex=True)
+    return names.str.replace(WHITESPACE, "", regex=True)
+
+
+def anchor_keys(names: pd.Series) -> pd.Series:
+    """Canonical anchor name of raw unit names (see split_anchor_names)."""
+    return canonical_names(split_anchor_names(names)["anchor_name"])
+
+
+def name_similarity(a: str, b: str) -> float:
+    """
+    Normalized edit similarity of two canonical names, 0 to 1.
+
+    Names with different numbers (ซอย 26 / ซอย 28, หมู่ 3 / หมู่ 5) are
+    different places and score 0.
+    """
+    if not a or not b or DIGITS.findall(a) != DIGITS.findall(b):
+        return 0.0
+    longest = max(len(a), len(b))
+    return 1 - levenshtein.distance(a, b, longest) / longest
+
+
+def ect66_places(ect66: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tier A+ ECT66 places, one row per (province, amphoe, tambon, anchor).
+
+    Tier D points are random points inside the tambon and are never reused.
+    Units of the same place take the coordinates of its most common PlaceId.
+    """
+    tier_a = ect66[ect66["TierLocation"] == "A+"]
+    places = pd.DataFrame(
+        {
+            "province": normalize_admin(tier_a[ECT66_PROVINCE]),
+            "district": normalize_admin(tier_a[ECT66_DISTRICT]),
+            "tambon": normalize_admin(tier_a[ECT66_SUBDISTRICT]),
+            "anchor_66": anchor_keys(tier_a[ECT66_NAME]),
+            "ect66_unit_id": tier_a["UnitId"],
+            "ect66_unit_name": tier_a[ECT66_NAME],
+            "ect66_lat": tier_a["Lat"],
+            "ect66_lng": tier_a["Lng"],
+            "ect66_place_id": tier_a["PlaceId"],
+        }
+    )
+    places = places[places["anchor_66"] != ""]
+    key = [*BLOCK, "anchor_66"]
+    places["ect66_units"] = places.groupby(key)["anchor_66"].transform("size")
+    place_counts = places.groupby([*key, "ect66_place_id"])["anchor_66"].transform(
+        "size"
+    )
+    return (
+        places.assign(_count=place_counts)
+        .sort_values("_count", ascending=False, kind="stable")
+        .drop_duplicates(key)
+        .drop(columns="_count")
+        .reset_index(drop=True)
+    )
+
+
+def link_units(
+    units: pd.DataFrame,
+    ect66: pd.DataFrame,
+    province_column: str = "provinceName",
+    district_column: str = "districtName",
+    subdistrict_column: str = "subDistrictName",
+    name_column: str = "unitName",
+    accept: float = DEFAULT_ACCEPT,
+    review: float = DEFAULT_REVIEW,
+) -> pd.DataFrame:
+    """
+    Propose ECT66 coordinates for ECT69 units.
+
+    Args:
+        units: ECT69 voting units
+        ect66: ECT66 validated units (ect66_geocoded_validated.parquet)
+        province_column: Province column of units
+        district_column: Amphoe column of units
+        subdistrict_column: Tambon column of units
+        name_column: Raw unit name column of units
+        accept: Minimum similarity to accept a link
+        review: Minimum similarity to propose a link for review
+
+    Returns:
+        Copy of units with LINK_COLUMNS; `link_status` is "accepted",
+        "review" or None (no candidate above review), and the ect66_*
+        columns are empty for units without a candidate
+    """
+    keys = pd.DataFrame(
+        {
+            "province": normalize_admin(units[province_column]),
+            "district": normalize_admin(units[district_column]),
+            "tambon": normalize_admin(units[subdistrict_column]),
+            "anchor_69": anchor_keys(units[name_column]),
+        },
+        index=units.index,
+    )
+    distinct = keys.drop_duplicates().reset_index(drop=True)
+
+    # Every ECT69 anchor against every ECT66 place of its tambon
+    pairs = distinct.merge(ect66_places(ect66), on=BLOCK, how="inner")
+    pairs["link_score"] = [
+        name_similarity(a, b) for a, b in zip(pairs["anchor_69"], pairs["anchor_66"])
+    ]
+    best = (
+        pairs[pairs["link_score"] >= review]
+        .sort_values("link_score", ascending=False, kind="stable")
+        .drop_duplicates([*BLOCK, "anchor_69"])
+    )
+    best["link_status"] = "review"
+    best.loc[best["link_score"] >= accept, "link_status"] = "accepted"
+    best["link_score"] = best["link_score"].round(3)
+
+    links = keys.merge(
+        best[[*BLOCK, "anchor_69", *LINK_COLUMNS]],
+        on=[*BLOCK, "anchor_69"],
+        how="left",
+    )
+    out = units.copy()
+    for column in LINK_COLUMNS:
+        out[column] = links[column].to_numpy()
+    out[["ect66_unit_id", "ect66_units"]] = out[
+        ["ect66_unit_id", "ect66_units"]
+    ].astype("Int64")
+    out["link_status"] = out["link_status"].astype(object).where(
+        out["link_status"].notna(), None
+    )
+    return out
@@ -0,0 +1,296 @@
+"""
+Entity extraction from voting location strings, with pluggable backends.
+
+A ModelConfig names a backend and its settings; MODEL_CONFIGS holds the ones
+we use:
+
+    typhoon2  Typhoon2 8B on Ollama
+    glm       GLM-4.7-flash on Ollama
+    rules     Rule-based parser (lib/unit_name_parser.py), no LLM
+    stub      In-process Ollama stand-in (lib/ollama_stub.py), for testing
+
+All backends return entities in the same schema (LocationEntity fields).
+EntityOutput streams them to an append-only CSV that runs can resume from.
+"""
+
+import csv
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+
+from .llm_cache import ExtractionCache
+from .ollama_client import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_OLLAMA_URL,
+    ClientStats,
+    OllamaClient,
+    extract_entities,
+)
+from .ollama_stub import OllamaStub
+from .unit_name_parser import ENTITY_FIELDS, parse_unit_names
+
+SYSTEM_PROMPT = """คุณเป็นผู้เชี่ยวชาญในการแยกข้อมูลสถานที่ภาษาไทย กรุณาแยกข้อมูลจากชื่อสถานที่เลือกตั้งให้อยู่ในรูปแบบ JSON
+
+## Output Schema
+```json
+{
+  "location_name": "string - ชื่อสถานที่หลัก (สำหรับ geocoding)",
+  "location_type": "enum - assembly_hall|school|government_office|temple|dome|university|mall|sports_center|other",
+  "area_prefix": "string|null - บริเวณ, เต็นท์, ลานจอดรถ, etc.",
+  "buildings": ["list - ชื่ออาคาร (รองรับหลายอาคาร)"],
+  "floor": "string|null - ชั้น 1, ชั้นล่าง, etc.",
+  "extra_info": "string|null - ข้อมูลในวงเล็บ",
+  "subdistrict": "string|null - แขวง/ตำบล (ไม่รวมคำนำหน้า)",
+  "district": "string|null - เขต/อำเภอ (ไม่รวมคำนำหน้า)"
+}
+```
+
+## Location Types
+- assembly_hall: หอประชุม
+- school: โรงเรียน, วิทยาลัย
+- government_office: สำนักงาน, ที่ว่าการ
+- temple: วัด
+- dome: โดม
+- university: มหาวิทยาลัย
+- mall: ศูนย์การค้า, โลตัส, บิ๊กซี
+- sports_center: ศูนย์กีฬา, โรงยิม, สนามกีฬา
+- other: อื่นๆ
+
+## Examples
+
+Input: บริเวณวิทยาลัยเทคนิคราชสิทธาราม แขวงบางบอนเหนือ เขตบางบอน
+Output: {"location_name": "วิทยาลัยเทคนิคราชสิทธาราม", "location_type": "school", "area_prefix": "บริเวณ", "buildings": [], "floor": null, "extra_info": null, "subdistrict": "บางบอนเหนือ", "district": "บางบอน"}
+
+Input: เต็นท์บริเวณถนนทางเข้าศูนย์ราชการเฉลิมพระเกียรติฯ (ซอยแจ้งวัฒนะ 7) แขวงทุ่งสองห้อง เขตหลักสี่
+Output: {"location_name": "ศูนย์ราชการเฉลิมพระเกียรติฯ", "location_type": "government_office", "area_prefix": "เต็นท์บริเวณถนนทางเข้า", "buildings": [], "floor": null, "extra_info": "ซอยแจ้งวัฒนะ 7", "subdistrict": "ทุ่งสองห้อง", "district": "หลักสี่"}
+
+Input: บริเวณชั้น 1 อาคารนิมิบุตร แขวงวังใหม่
+Output: {"location_name": "อาคารนิมิบุตร", "location_type": "other", "area_prefix": "บริเวณ", "buildings": ["อาคารนิมิบุตร"], "floor": "ชั้น 1", "extra_info": null, "subdistrict": "วังใหม่", "district": null}
+
+Input: อาคารกีฬาเวสน์ 1 และ อาคารกีฬาเวสน์ 2 ศูนย์เยาวชนกรุงเทพมหานคร (ไทย-ญี่ปุ่น) ดินแดง แขวงดินแดง
+Output: {"location_name": "ศูนย์เยาวชนกรุงเทพมหานคร (ไทย-ญี่ปุ่น) ดินแดง", "location_type": "sports_center", "area_prefix": null, "buildings": ["อาคารกีฬาเวสน์ 1", "อาคารกีฬาเวสน์ 2"], "floor": null, "extra_info": "ไทย-ญี่ปุ่น", "subdistrict": "ดินแดง", "district": null}
+
+Input: หอประชุมโรงเรียนคลองท่อมราษฎร์รังสรรค์ อำเภอคลองท่อม
+Output: {"location_name": "โรงเรียนคลองท่อมราษฎร์รังสรรค์", "location_type": "school", "area_prefix": "หอประชุม", "buildings": [], "floor": null, "extra_info": null, "subdistrict": null, "district": "คลองท่อม"}
+
+Input: เต็นท์ลานจอดรถโลตัสพระราม 3 (ฝั่งถนนนราธิวาสราชนครินทร์) แขวงช่องนนทรี
+Output: {"location_name": "โลตัสพระราม 3", "location_type": "mall", "area_prefix": "เต็นท์ลานจอดรถ", "buildings": [], "floor": null, "extra_info": "ฝั่งถนนนราธิวาสราชนครินทร์", "subdistrict": "ช่องนนทรี", "district": null}
+
+ตอบเป็น JSON เท่านั้น ไม่ต้องมีคำอธิบายเพิ่ม"""
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """Extraction backend and its settings."""
+
+    name: str
+    backend: Literal["ollama", "rules", "stub"]
+    model: str = ""
+    options: dict = field(default_factory=lambda: {"temperature": 0.1})
+    output_suffix: str = ""  # appended to the output file stem
+    description: str = ""
+
+
+MODEL_CONFIGS = {
+    config.name: config
+    for config in [
+        ModelConfig(
+            "typhoon2",
+            "ollama",
+            "scb10x/llama3.1-typhoon2-8b-instruct:latest",
+            output_suffix="_typhoon2",
+            description="Typhoon2 8B (Ollama)",
+        ),
+        ModelConfig(
+            "glm",
+            "ollama",
+            "glm-4.7-flash:latest",
+            output_suffix="_glm",
+            description="GLM-4.7-flash (Ollama)",
+        ),
+        ModelConfig(
+            "rules", "rules", output_suffix="_rules", description="Rule-based parser"
+        ),
+        ModelConfig(
+            "stub",
+            "stub",
+            "stub",
+            output_suffix="_stub",
+            description="Local Ollama stub (testing)",
+        ),
+    ]
+}
+
+
+@dataclass
+class ExtractionRun:
+    """Entities from one extraction run, with timing and request stats."""
+
+    entities: list[dict]
+    seconds: float
+    stats: ClientStats = field(default_factory=ClientStats)
+
+
+def parse_with_rules(texts: list[str]) -> tuple[list[dict], list[int]]:
+    """
+    Parse texts with the rule-based parser.
+
+    Returns:
+        Tuple of (entities, indexes of the low-confidence ones)
+    """
+    parsed = parse_unit_names(texts)
+    entities = parsed[ENTITY_FIELDS].to_dict("records")
+    low = parsed.index[parsed["confidence"] == "low"].tolist()
+    return entities, low
+
+
+async def run_extraction(
+    config: ModelConfig,
+    texts: list[str],
+    ollama_url: str = DEFAULT_OLLAMA_URL,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: ExtractionCache | None = None,
+    batch_size: int = 1,
+    rules_first: bool = False,
+    stub: OllamaStub | None = None,
+    on_result: Callable[[list[str], list[dict]], None] | None = None,
+) -> ExtractionRun:
+    """
+    Extract entities for texts with the given backend.
+
+    Args:
+        config: Backend settings (see MODEL_CONFIGS)
+        texts: Location strings
+        ollama_url: Ollama base URL (ollama backend)
+        concurrency: Concurrent requests (ollama and stub backends)
+        cache: Extraction cache for LLM backends
+        batch_size: Locations per LLM request
+        rules_first: Use the rule-based parser first and only send its
+            low-confidence strings to the LLM; adds a `parser` field
+        stub: Stub instance for the stub backend (default: OllamaStub())
+        on_result: Called with (texts, entities) as results become available,
+            in completion order (see extract_entities)
+
+    Returns:
+        ExtractionRun with one entity dict per text, in order
+    """
+    start = time.monotonic()
+    if config.backend == "rules":
+        entities, _ = parse_with_rules(texts)
+        if on_result is not None:
+            on_result(texts, [dict(entity) for entity in entities])
+        return ExtractionRun(entities, time.monotonic() - start)
+
+    # Rule-based parser first; only low-confidence strings go to the LLM
+    if rules_first:
+        entities, llm_rows = parse_with_rules(texts)
+        for entity in entities:
+            entity["parser"] = "rules"
+        print(
+            f"Rules parsed {len(texts) - len(llm_rows):,} of {len(texts):,} "
+            f"strings, {len(llm_rows):,} go to the LLM"
+        )
+        if on_result is not None:
+            confident = sorted(set(range(len(texts))) - set(llm_rows))
+            on_result(
+                [texts[i] for i in confident], [dict(entities[i]) for i in confident]
+            )
+    else:
+        entities = [None] * len(texts)
+        llm_rows = list(range(len(texts)))
+
+    report = on_result
+    if rules_first and on_result is not None:
+
+        def report(batch: list[str], batch_entities: list[dict]):
+            on_result(batch, [{**entity, "parser": "llm"} for entity in batch_entities])
+
+    transport = None
+    if config.backend == "stub":
+        transport = (stub or OllamaStub()).transport()
+    async with OllamaClient(
+        ollama_url, concurrency=concurrency, transport=transport
+    ) as client:
+        llm_entities = await extract_entities(
+            client,
+            config.model,
+            SYSTEM_PROMPT,
+            [texts[i] for i in llm_rows],
+            options=config.options,
+            cache=cache,
+            batch_size=batch_size,
+            desc=f"Extracting entities ({config.name})",
+            on_result=report,
+        )
+    for i, entity in zip(llm_rows, llm_entities):
+        if rules_first:
+            entity["parser"] = "llm"
+        entities[i] = entity
+    return ExtractionRun(entities, time.monotonic() - start, client.stats)
+
+
+class EntityOutput:
+    """
+    Append-only CSV of extracted entities, one row per distinct input string.
+
+    Rows are written and flushed as results arrive, so an interrupted run
+    keeps everything extracted so far. Strings already in the file (the
+    `original` column) are done; failed extractions are not written, so a
+    re-run retries them. A partly written last line is dropped on open.
+    """
+
+    def __init__(self, path: Path, columns: list[str]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.done: set[str] = set()
+        self.written = 0
+        self.failed = 0
+
+        if self.path.exists():
+            self._drop_partial_line()
+        # After the partial line is gone: a cut-off header leaves an empty file
+        resume = self.path.exists() and self.path.stat().st_size > 0
+        if resume:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                # Keep the existing header, so resumed rows line up with it
+                columns = reader.fieldnames or columns
+                self.done = {row["original"] for row in reader}
+
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(
+            self._file, columns, extrasaction="ignore", lineterminator="\n"
+        )
+        if not resume:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def _drop_partial_line(self):
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, texts: list[str], entities: list[dict]):
+        """Write successful extractions of texts not yet in the file."""
+        for text, entity in zip(texts, entities):
+            if "error" in entity:
+                self.failed += 1
+                continue
+            if text in self.done:
+                continue
+            self._writer.writerow({**entity, "original": text})
+            self.done.add(text)
+            self.written += 1
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,8 +1,20 @@
 """Git subprocess utilities for reading repository history."""
 
+import re
 import subprocess
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import datetime, timezone
 from pathlib import Path
 
+from .models import CommitInfo
+
+# Fields of one commit record in iter_commits(), NUL-separated (git log -z also
+# ends each record with a NUL, so the stream is a flat list of fields)
+COMMIT_FORMAT_FIELDS = ["%H", "%an", "%ae", "%at", "%P", "%s"]
+
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
 
 def run_git(repo_path: Path, *args: str) -> str:
     """Run git command and return stdout."""
@@ -15,6 +27,15 @@ def run_git(repo_path: Path, *args: str) -> str:
     return result.stdout
 
 
+def is_ancestor(repo_path: Path, ancestor: str, commit: str) -> bool:
+    """Check whether ancestor is reachable from commit (e.g. not force-pushed away)."""
+    try:
+        run_git(repo_path, "merge-base", "--is-ancestor", ancestor, commit)
+        return True
+    except subprocess.CalledProcessError:
+        return False
+
+
 def get_commit_list(repo_path: Path, start_commit: str) -> list[str]:
     """
     Get all commit hashes from start_commit to HEAD (inclusive).
@@ -55,6 +76,74 @@ def get_commit_metadata(repo_path: Path, commit_hash: str) -> dict:
     }
 
 
+def _iter_nul_fields(stream, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Split a binary stream into NUL-terminated fields without reading it all."""
+    buffer = b""
+    while chunk := stream.read(chunk_size):
+        *fields, buffer = (buffer + chunk).split(b"\0")
+        yield from fields
+    if buffer:
+        yield buffer
+
+
+def iter_commits(repo_path: Path, *revisions: str) -> Iterator[CommitInfo]:
+    """
+    Stream metadata for every commit in revisions from a single git log process.
+
+    Args:
+        repo_path: Path to the git repository
+        revisions: Revision arguments for git log (e.g. "abc123^..HEAD")
+
+    Yields:
+        CommitInfo records in git log order (newest first)
+    """
+    n_fields = len(COMMIT_FORMAT_FIELDS)
+    process = subprocess.Popen(
+        [
+            "git",
+            "-C",
+            str(repo_path),
+            "log",
+            "-z",
+            "--format=" + "%x00".join(COMMIT_FORMAT_FIELDS),
+            *revisions,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        record = []
+        for field in _iter_nul_fields(process.stdout):
+            record.append(field.decode("utf-8", errors="replace"))
+            if len(record) < n_fields:
+                continue
+
+            commit_hash, author_name, author_email, timestamp, parents, message = record
+            record = []
+            parents = parents.split()
+            yield CommitInfo(
+                commit_hash=commit_hash,
+                author_name=author_name,
+                author_email=author_email,
+                timestamp=int(timestamp),
+                datetime_utc=datetime.fromtimestamp(int(timestamp), tz=timezone.utc),
+                message=message,
+                is_merge=len(parents) > 1,
+                parent_hash=parents[0] if parents else None,
+            )
+
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(
+                process.returncode, process.args, stderr=process.stderr.read()
+            )
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
 def get_file_at_commit(repo_path: Path, commit_hash: str, filepath: str) -> str:
     """
     Get file contents at a specific commit.
@@ -70,6 +159,132 @@ def get_file_at_commit(repo_path: Path, commit_hash: str, filepath: str) -> str:
     return run_git(repo_path, "show", f"{commit_hash}:{filepath}")
 
 
+class GitBlobReader:
+    """
+    Read file contents at many commits through long-lived git cat-file processes.
+
+    One `git cat-file --batch-check` process resolves "commit:path" to blob
+    ids and one `git cat-file --batch` process returns blob contents, so
+    reading a file at thousands of commits costs two process spawns instead
+    of thousands. Recently read blobs are kept by id, so commits that share a
+    file version only fetch it once.
+
+    Usage:
+        with GitBlobReader(repo_path) as reader:
+            content = reader.read(commit_hash, "station66_distinct_clean.csv")
+    """
+
+    def __init__(self, repo_path: Path, cache_size: int = 4):
+        self.repo_path = Path(repo_path)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._check = self._spawn("--batch-check")
+        self._batch = self._spawn("--batch")
+
+    def _spawn(self, mode: str) -> subprocess.Popen:
+        return subprocess.Popen(
+            ["git", "-C", str(self.repo_path), "cat-file", mode],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    @staticmethod
+    def _request(process: subprocess.Popen, name: str) -> list[str]:
+        """Send one object name and parse the "<oid> <type> <size>" reply."""
+        process.stdin.write(name.encode("utf-8") + b"\n")
+        process.stdin.flush()
+        header = process.stdout.readline().decode("utf-8").split()
+        if not header:
+            raise RuntimeError(f"git cat-file exited while reading {name}")
+        return header
+
+    def blob_id(self, commit_hash: str, filepath: str) -> str | None:
+        """
+        Resolve the blob id of a file at a commit.
+
+        Returns:
+            Blob id, or None if the file does not exist at that commit
+        """
+        header = self._request(self._check, f"{commit_hash}:{filepath}")
+        if header[-1] == "missing" or header[1] != "blob":
+            return None
+        return header[0]
+
+    def read_blob(self, blob_id: str) -> bytes:
+        """Get the contents of a blob by id."""
+        if blob_id in self._cache:
+            self._cache.move_to_end(blob_id)
+            return self._cache[blob_id]
+
+        header = self._request(self._batch, blob_id)
+        if header[-1] == "missing":
+            raise FileNotFoundError(f"Blob {blob_id} not found")
+        size = int(header[2])
+        content = self._batch.stdout.read(size)
+        self._batch.stdout.read(1)  # trailing newline
+
+        self._cache[blob_id] = content
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return content
+
+    def read(self, commit_hash: str, filepath: str) -> bytes:
+        """
+        Get file contents at a specific commit.
+
+        Raises:
+            FileNotFoundError: if the file does not exist at that commit
+        """
+        blob_id = self.blob_id(commit_hash, filepath)
+        if blob_id is None:
+            raise FileNotFoundError(f"{filepath} not found at {commit_hash}")
+        return self.read_blob(blob_id)
+
+    def close(self):
+        for process in (self._check, self._batch):
+            process.stdin.close()
+            process.wait()
+            process.stdout.close()
+
+    def __enter__(self) -> "GitBlobReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_blob_diff(
+    repo_path: Path, old_blob: str, new_blob: str
+) -> tuple[list[tuple[int, str]], list[tuple[int, str]]]:
+    """
+    Get the removed and added lines between two blobs (git diff --unified=0).
+
+    Only changed lines are transferred and parsed, so the cost is
+    proportional to the size of the edit rather than the size of the file.
+
+    Returns:
+        Tuple of (removed, added), each a list of (line_number, line) in file
+        order; line numbers refer to the old and new blob respectively
+    """
+    output = run_git(
+        repo_path, "diff", "--unified=0", "--no-color", "--no-ext-diff", old_blob, new_blob
+    )
+    removed, added = [], []
+    old_line = new_line = None
+    for line in output.splitlines():
+        if match := HUNK_HEADER_PATTERN.match(line):
+            old_line, new_line = int(match.group(1)), int(match.group(3))
+        elif old_line is None or line.startswith("\\"):
+            continue  # file headers / "\ No newline at end of file"
+        elif line.startswith("-"):
+            removed.append((old_line, line[1:]))
+            old_line += 1
+        elif line.startswith("+"):
+            added.append((new_line, line[1:]))
+            new_line += 1
+    return removed, added
+
+
 def get_diff_stats(
     repo_path: Path, commit1: str, commit2: str, filepath: str
 ) -> tuple[int, int]:
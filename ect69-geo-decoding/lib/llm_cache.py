@@ -0,0 +1,124 @@
+"""Content-addressed cache for LLM entity extractions."""
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".cache" / "llm_extractions.sqlite"
+
+# SQLite host parameter limit is 999 on older builds
+LOOKUP_CHUNK_SIZE = 500
+
+
+def cache_key(
+    model: str,
+    system: str | None,
+    text: str,
+    options: dict | None,
+    prompt: str | None = None,
+    format: dict | None = None,
+) -> str:
+    """
+    Content address of one extraction request.
+
+    Any change to the model, system prompt, input text, options (temperature,
+    ...), prompt template or output format gives a new key, so stale answers
+    are never reused. Answers to a batch request (one prompt listing many
+    strings, a list-shaped format) therefore never share a key with answers
+    to a single-string request.
+    """
+    request = json.dumps(
+        [model, system, text, options or {}, prompt, format],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent cache of parsed LLM extractions, keyed by cache_key().
+
+    Stored in a single SQLite file (WAL mode), with the parsed entity and the
+    raw model answer for each key. Lookups are done in bulk, so a re-run only
+    pays for strings that were never extracted with the same model and prompt.
+
+    Example:
+        >>> with ExtractionCache(DEFAULT_CACHE_PATH) as cache:
+        ...     hits = cache.get_many(keys)
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                input TEXT NOT NULL,
+                entity TEXT NOT NULL,
+                raw TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, dict]:
+        """
+        Look up many keys at once.
+
+        Returns:
+            Mapping of key -> parsed entity for the keys that are cached
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start : start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, entity FROM extractions WHERE key IN ({placeholders})",
+                chunk,
+            )
+            for key, entity in rows:
+                found[key] = json.loads(entity)
+        return found
+
+    def get(self, key: str) -> dict | None:
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, model: str, text: str, entity: dict, raw: str | None):
+        """Store one parsed extraction and the raw answer it came from."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                model,
+                text,
+                json.dumps(entity, ensure_ascii=False),
+                raw,
+                time.time(),
+            ),
+        )
+        self._db.commit()
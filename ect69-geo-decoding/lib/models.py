@@ -1,8 +1,20 @@
-"""Pydantic models for ETL data structures."""
+"""
+Data models for ETL data structures.
 
+Pydantic models validate single records at the boundaries (git output, JSON
+state, API responses). Hot paths that produce one record per CSV row or
+geocode candidate use the lighter types at the end of this module instead:
+RecordColumns builds Arrow columns directly and checks the schema once per
+batch, and GMapPoint is a plain __slots__ class.
+"""
+
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from pydantic import BaseModel
 from shapely.geometry import Point
 
@@ -50,6 +62,19 @@ class RowChange(BaseModel):
     classification: Literal["manual", "scripted", "uncertain"]
 
 
+class ExtractionWatermark(BaseModel):
+    """Where the last PR contribution extraction stopped, for incremental runs."""
+
+    start_commit: str
+    head_commit: str  # Source repo HEAD the run processed up to
+    last_commit_hash: str | None = None  # Last non-merge commit walked in phase B
+    last_commit_timestamp: int | None = None
+    csv_blob_id: str | None = None  # CSV version (snapshot) after last_commit_hash
+    commit_count: int
+    row_change_count: int
+    updated_at: datetime
+
+
 class Station66Record(BaseModel):
     """Final output record with source attribution."""
 
@@ -97,6 +122,29 @@ class GMapEntry(BaseModel):
         return Point(self.lng, self.lat)
 
 
+class LocationEntity(BaseModel):
+    """Entities extracted from a voting location string (LLM output schema)."""
+
+    location_name: str
+    location_type: Literal[
+        "assembly_hall",
+        "school",
+        "government_office",
+        "temple",
+        "dome",
+        "university",
+        "mall",
+        "sports_center",
+        "other",
+    ]
+    area_prefix: str | None = None
+    buildings: list[str] = []
+    floor: str | None = None
+    extra_info: str | None = None
+    subdistrict: str | None = None
+    district: str | None = None
+
+
 class EarlyVotingLocation(BaseModel):
     """Early voting location with geocoding results."""
 
@@ -110,3 +158,165 @@ class EarlyVotingLocation(BaseModel):
     place_id: str = ""
     formatted_address: str = ""
     tier_location: str = "D"  # A+ (validated) or D (fallback)
+
+
+# Arrow schemas mirroring the pydantic models above, for bulk construction.
+# Types match what the intermediate parquet files have always stored.
+COMMIT_INFO_SCHEMA = pa.schema(
+    [
+        ("commit_hash", pa.string()),
+        ("author_name", pa.string()),
+        ("author_email", pa.string()),
+        ("timestamp", pa.int64()),
+        ("datetime_utc", pa.timestamp("us", tz="UTC")),
+        ("message", pa.string()),
+        ("is_merge", pa.bool_()),
+        ("parent_hash", pa.string()),
+        ("rows_changed", pa.int64()),
+        ("classification", pa.string()),
+        ("classification_reason", pa.string()),
+        ("time_since_prev_seconds", pa.int64()),
+    ]
+)
+
+ROW_CHANGE_SCHEMA = pa.schema(
+    [
+        ("province_number", pa.int64()),
+        ("registrar_code", pa.int64()),
+        ("subdis_code", pa.int64()),
+        ("electorate", pa.int64()),
+        ("location", pa.string()),
+        ("lat_before", pa.float64()),
+        ("lng_before", pa.float64()),
+        ("lat_after", pa.float64()),
+        ("lng_after", pa.float64()),
+        ("commit_hash", pa.string()),
+        ("author_name", pa.string()),
+        ("author_email", pa.string()),
+        ("timestamp", pa.int64()),
+        ("classification", pa.string()),
+    ]
+)
+
+# Literal fields, checked per column in RecordColumns.to_table()
+COMMIT_INFO_VALUES = {"classification": ["manual", "scripted", "uncertain", "none"]}
+ROW_CHANGE_VALUES = {"classification": ["manual", "scripted", "uncertain"]}
+
+
+class RecordColumns:
+    """
+    Columnar record builder: one Python list per field instead of one model
+    per record.
+
+    Records are appended as plain values; types are enforced once for the
+    whole batch when the columns are converted with the Arrow schema, which
+    raises on values that cannot be cast (e.g. a string in an int column).
+    Fields listed in `allowed` are checked against their permitted values.
+
+    Example:
+        >>> changes = RecordColumns(ROW_CHANGE_SCHEMA, allowed=ROW_CHANGE_VALUES)
+        >>> changes.extend(diff_rows, commit_hash="abc123", timestamp=1700000000)
+        >>> changes.to_pandas()
+    """
+
+    __slots__ = ("schema", "defaults", "allowed", "_columns", "_length")
+
+    def __init__(
+        self,
+        schema: pa.Schema,
+        defaults: Mapping[str, Any] | None = None,
+        allowed: Mapping[str, list] | None = None,
+    ):
+        self.schema = schema
+        self.defaults = dict(defaults or {})
+        self.allowed = dict(allowed or {})
+        self._columns: dict[str, list] = {name: [] for name in schema.names}
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, **values):
+        """Add one record; missing fields take their default (or null)."""
+        for name, column in self._columns.items():
+            column.append(values.get(name, self.defaults.get(name)))
+        self._length += 1
+
+    def extend(
+        self,
+        records: list[Mapping[str, Any]],
+        aliases: Mapping[str, str] | None = None,
+        **shared,
+    ):
+        """
+        Add many records at once, column by column.
+
+        Args:
+            records: Records as mappings; keys not in the schema are ignored
+            aliases: Field name -> key to read it from in each record
+            **shared: Values broadcast to every record (e.g. commit attribution)
+        """
+        aliases = aliases or {}
+        n = len(records)
+        for name, column in self._columns.items():
+            if name in shared:
+                column.extend([shared[name]] * n)
+            else:
+                key = aliases.get(name, name)
+                default = self.defaults.get(name)
+                column.extend(record.get(key, default) for record in records)
+        self._length += n
+
+    def to_table(self) -> pa.Table:
+        """Convert to an Arrow table, enforcing the schema for all records."""
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        for name, values in self.allowed.items():
+            column = table.column(name)
+            valid = pc.is_in(column, value_set=pa.array(values, type=column.type))
+            if not pc.all(pc.or_(valid, pc.is_null(column))).as_py():
+                bad = pc.unique(pc.filter(column, pc.invert(valid))).to_pylist()
+                raise ValueError(f"Invalid {name} values {bad}, expected {values}")
+        return table
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.to_table().to_pandas()
+
+
+class GMapPoint:
+    """
+    Lightweight GMapEntry for parsing many geocode candidates.
+
+    Same fields, constructor and point property as GMapEntry, without
+    per-instance validation; use GMapEntry where a single API response needs
+    to be validated.
+    """
+
+    __slots__ = ("lat", "lng", "place_id", "formatted_address")
+
+    def __init__(self, lat: float, lng: float, place_id: str, formatted_address: str):
+        self.lat = lat
+        self.lng = lng
+        self.place_id = place_id
+        self.formatted_address = formatted_address
+
+    def __repr__(self) -> str:
+        return (
+            f"GMapPoint(lat={self.lat}, lng={self.lng}, place_id={self.place_id!r}, "
+            f"formatted_address={self.formatted_address!r})"
+        )
+
+    @classmethod
+    def from_geocode_result(cls, result: dict) -> "GMapPoint":
+        """Parse Google Maps API geocoding response."""
+        location = result["geometry"]["location"]
+        return cls(
+            location["lat"],
+            location["lng"],
+            result["place_id"],
+            result["formatted_address"],
+        )
+
+    @property
+    def point(self) -> Point:
+        """Get Shapely Point geometry (lng, lat order for GIS)."""
+        return Point(self.lng, self.lat)
@@ -0,0 +1,378 @@
+"""Async Ollama client for LLM entity extraction."""
+
+import asyncio
+import json
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import httpx
+from pydantic import ValidationError
+from tqdm.asyncio import tqdm
+
+from .llm_cache import ExtractionCache, cache_key
+from .models import LocationEntity
+
+# Ollama base URL; for a server on another host, point this at it directly or
+# forward the port once (ssh -N -L 11434:localhost:11434 vedas)
+DEFAULT_OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+
+# Should match OLLAMA_NUM_PARALLEL on the server; requests beyond it only queue
+DEFAULT_CONCURRENCY = 4
+
+SINGLE_PROMPT = "แยกข้อมูลจากสถานที่นี้:\n{text}"
+BATCH_PROMPT = (
+    "แยกข้อมูลจากสถานที่ต่อไปนี้ทีละรายการ ตอบเป็น JSON ที่มี items "
+    "หนึ่งรายการต่อหนึ่งสถานที่ โดยใส่ id ตามเลขลำดับ:\n{lines}"
+)
+
+
+def batch_format() -> dict:
+    """
+    Ollama structured-output schema for a batch answer.
+
+    {"items": [{"id": 1, <LocationEntity fields>}, ...]}; every field is
+    required so the model cannot silently skip one.
+    """
+    entity = LocationEntity.model_json_schema()
+    item = {
+        "type": "object",
+        "properties": {"id": {"type": "integer"}, **entity["properties"]},
+        "required": ["id", *entity["properties"]],
+    }
+    return {
+        "type": "object",
+        "properties": {"items": {"type": "array", "items": item}},
+        "required": ["items"],
+    }
+
+
+BATCH_FORMAT = batch_format()
+
+
+def parse_json_answer(answer: str) -> dict:
+    """
+    Parse the JSON object out of a model answer.
+
+    Returns:
+        Parsed object, or {"error": ..., "raw": answer} if none can be parsed
+    """
+    start = answer.find("{")
+    end = answer.rfind("}") + 1
+    if start < 0 or end <= start:
+        return {"error": "No JSON found", "raw": answer}
+    try:
+        return json.loads(answer[start:end])
+    except json.JSONDecodeError as e:
+        return {"error": str(e), "raw": answer}
+
+
+@dataclass
+class ClientStats:
+    """Counters collected by OllamaClient, for throughput reporting."""
+
+    requests: int = 0
+    errors: int = 0
+    latencies: list[float] = field(default_factory=list)  # per successful request
+    eval_tokens: int = 0  # generated tokens, as reported by Ollama
+    eval_seconds: float = 0.0  # server-side generation time
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.eval_seconds:
+            return None
+        return self.eval_tokens / self.eval_seconds
+
+
+class OllamaClient:
+    """
+    Pooled async client for the Ollama HTTP API.
+
+    One httpx.AsyncClient (keep-alive connection pool) is shared by all
+    requests, and at most `concurrency` generate calls are in flight at once,
+    so requests queue here instead of on the server.
+
+    Example:
+        >>> async with OllamaClient("http://vedas:11434", concurrency=4) as client:
+        ...     response = await client.generate(MODEL, prompt, system=SYSTEM_PROMPT)
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_OLLAMA_URL,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = 120.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """
+        Args:
+            base_url: Ollama server URL, e.g. http://localhost:11434
+            concurrency: Maximum concurrent requests (server parallel slots)
+            timeout: Per-request timeout in seconds
+            transport: Custom httpx transport (e.g. OllamaStub().transport())
+        """
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.stats = ClientStats()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        system: str | None = None,
+        options: dict | None = None,
+        format: dict | str | None = None,
+    ) -> dict:
+        """
+        Call /api/generate without streaming.
+
+        Args:
+            model: Model name, e.g. "scb10x/llama3.1-typhoon2-8b-instruct:latest"
+            prompt: User prompt
+            system: System prompt
+            options: Model options, e.g. {"temperature": 0.1}
+            format: "json" or a JSON schema for structured output
+
+        Returns:
+            Ollama response body (answer text in "response")
+
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts and non-2xx responses
+        """
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if system is not None:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+        if format is not None:
+            payload["format"] = format
+
+        async with self._slots:
+            self.stats.requests += 1
+            start = time.monotonic()
+            try:
+                response = await self._client.post("/api/generate", json=payload)
+                response.raise_for_status()
+            except httpx.HTTPError:
+                self.stats.errors += 1
+                raise
+        self.stats.latencies.append(time.monotonic() - start)
+        body = response.json()
+        self.stats.eval_tokens += body.get("eval_count", 0)
+        self.stats.eval_seconds += body.get("eval_duration", 0) / 1e9
+        return body
+
+
+async def extract_entity(
+    client: OllamaClient,
+    model: str,
+    system: str,
+    text: str,
+    options: dict | None = None,
+    cache: ExtractionCache | None = None,
+) -> dict:
+    """
+    Extract location entities from one voting location string.
+
+    Successful extractions are stored in cache (if given) together with the
+    raw answer; failures are not cached, so they are retried on the next run.
+
+    Returns:
+        Parsed entity dict, or a dict with an "error" key on failure
+    """
+    prompt = SINGLE_PROMPT.format(text=text)
+    try:
+        response = await client.generate(model, prompt, system=system, options=options)
+    except httpx.HTTPError as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    answer = response.get("response", "")
+    entity = parse_json_answer(answer)
+    if cache is not None and "error" not in entity:
+        key = cache_key(model, system, text, options, SINGLE_PROMPT)
+        cache.put(key, model, text, entity, answer)
+    return entity
+
+
+async def extract_batch(
+    client: OllamaClient,
+    model: str,
+    system: str,
+    texts: list[str],
+    options: dict | None = None,
+    cache: ExtractionCache | None = None,
+) -> list[dict | None]:
+    """
+    Extract entities for several strings in one request.
+
+    The strings are numbered in the prompt and the answer is constrained to
+    BATCH_FORMAT. Each item is matched back by id and validated on its own
+    against LocationEntity; valid ones are cached under the batch prompt and
+    format (see cache_key).
+
+    Returns:
+        One entity dict per text, None where the item is missing or invalid
+    """
+    lines = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, 1))
+    results: list[dict | None] = [None] * len(texts)
+    try:
+        response = await client.generate(
+            model,
+            BATCH_PROMPT.format(lines=lines),
+            system=system,
+            options=options,
+            format=BATCH_FORMAT,
+        )
+        items = json.loads(response.get("response", ""))["items"]
+    except (httpx.HTTPError, json.JSONDecodeError, KeyError, TypeError):
+        return results
+    if not isinstance(items, list):
+        return results
+
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("id", None)
+        if not isinstance(index, int) or not 1 <= index <= len(texts):
+            continue
+        if results[index - 1] is not None:
+            continue
+        try:
+            entity = LocationEntity.model_validate(item).model_dump()
+        except ValidationError:
+            continue
+        results[index - 1] = entity
+        if cache is not None:
+            text = texts[index - 1]
+            raw = json.dumps(item, ensure_ascii=False)
+            key = cache_key(model, system, text, options, BATCH_PROMPT, BATCH_FORMAT)
+            cache.put(key, model, text, entity, raw)
+    return results
+
+
+async def _extract_batch_with_retry(
+    client: OllamaClient,
+    model: str,
+    system: str,
+    texts: list[str],
+    options: dict | None,
+    cache: ExtractionCache | None,
+) -> list[dict]:
+    results = await extract_batch(client, model, system, texts, options, cache)
+    # Items the batch answer got wrong are retried one by one
+    retries = [i for i, entity in enumerate(results) if entity is None]
+    retried = await asyncio.gather(
+        *[
+            extract_entity(client, model, system, texts[i], options, cache)
+            for i in retries
+        ]
+    )
+    for i, entity in zip(retries, retried):
+        results[i] = entity
+    return results
+
+
+async def extract_entities(
+    client: OllamaClient,
+    model: str,
+    system: str,
+    texts: list[str],
+    options: dict | None = None,
+    desc: str = "Extracting entities",
+    cache: ExtractionCache | None = None,
+    batch_size: int = 1,
+    on_result: Callable[[list[str], list[dict]], None] | None = None,
+) -> list[dict]:
+    """
+    Extract entities for many strings concurrently, bounded by the client.
+
+    A pool of client.concurrency workers sends the requests one after the
+    other, so memory and pending coroutines stay flat however many strings
+    are missing.
+
+    With a cache, all texts are looked up in one pass first and only the
+    misses are sent to the model; repeated texts are extracted once. With
+    batch_size > 1, misses are sent batch_size per request (extract_batch),
+    so the system prompt is processed once per batch instead of per string,
+    and items that fail validation are retried individually. Batch and
+    single answers are cached under different keys (see cache_key), so each
+    mode only reuses its own answers.
+
+    on_result, if given, is called with (texts, entities) of each distinct
+    text as soon as it is known: cache hits up front, then per request as
+    requests complete, so callers can stream results out of order.
+
+    Returns:
+        One entity dict per input text, in input order
+    """
+    if batch_size > 1:
+        keys = [
+            cache_key(model, system, text, options, BATCH_PROMPT, BATCH_FORMAT)
+            for text in texts
+        ]
+    else:
+        keys = [
+            cache_key(model, system, text, options, SINGLE_PROMPT) for text in texts
+        ]
+    entities = cache.get_many(keys) if cache is not None else {}
+    if cache is not None:
+        print(f"LLM cache: {len(entities):,} of {len(set(keys)):,} strings cached")
+
+    missing = {key: text for key, text in zip(keys, texts) if key not in entities}
+    if on_result is not None and entities:
+        cached = {key: text for key, text in zip(keys, texts) if key in entities}
+        on_result(list(cached.values()), [dict(entities[key]) for key in cached])
+
+    async def extract(batch: list[str]) -> list[dict]:
+        if batch_size > 1:
+            results = await _extract_batch_with_retry(
+                client, model, system, batch, options, cache
+            )
+        else:
+            results = [
+                await extract_entity(client, model, system, batch[0], options, cache)
+            ]
+        if on_result is not None:
+            on_result(batch, [dict(entity) for entity in results])
+        return results
+
+    missing_texts = list(missing.values())
+    starts = range(0, len(missing_texts), batch_size)
+    pending = iter(starts)
+    results: list[dict | None] = [None] * len(missing_texts)
+    if batch_size > 1:
+        desc = f"{desc} ({batch_size}/request)"
+
+    async def work(progress: tqdm):
+        # Workers pull batch offsets from a shared iterator, so only as many
+        # requests exist at a time as the client can run
+        for start in pending:
+            batch = missing_texts[start : start + batch_size]
+            results[start : start + len(batch)] = await extract(batch)
+            progress.update()
+
+    workers = min(client.concurrency, len(starts))
+    with tqdm(total=len(starts), desc=desc) as progress:
+        await asyncio.gather(*(work(progress) for _ in range(workers)))
+    entities.update(zip(missing, results))
+
+    # Copies, so callers can annotate results of repeated texts independently
+    return [dict(entities[key]) for key in keys]
@@ -0,0 +1,176 @@
+"""
+Local stand-in for the Ollama API, for testing extraction without a GPU.
+
+Use it in-process through an httpx transport:
+
+    >>> stub = OllamaStub(latency=0.05, parallel=4)
+    >>> client = OllamaClient(transport=stub.transport())
+
+or as a local HTTP server that scripts can be pointed at with --ollama-url:
+
+    uv run python ect69-geo-decoding/lib/ollama_stub.py --port 11435
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+PROMPT_PREFIX = "แยกข้อมูลจากสถานที่นี้:\n"
+BATCH_LINE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+
+def stub_entity(text: str) -> dict:
+    """Echo-style extraction: the whole string as location_name, in the real schema."""
+    return {
+        "location_name": text,
+        "location_type": "other",
+        "area_prefix": None,
+        "buildings": [],
+        "floor": None,
+        "extra_info": None,
+        "subdistrict": None,
+        "district": None,
+    }
+
+
+@dataclass
+class StubStats:
+    """Counters collected by OllamaStub during a run."""
+
+    requests: int = 0
+    peak_in_flight: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+
+class OllamaStub:
+    """
+    Answers /api/generate with canned extractions.
+
+    Simulates a server with `parallel` slots (OLLAMA_NUM_PARALLEL) and a
+    `latency` per request, plus `item_latency` per extracted item. `entity`
+    maps the input string to the answer object; the default echoes it back as
+    location_name. Requests with a structured `format` get a batch answer
+    ({"items": [...]}), from which a fraction `drop_rate` of the items is
+    left out to exercise retries.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        parallel: int = 4,
+        entity=stub_entity,
+        tokens_per_item: int = 60,
+        item_latency: float = 0.0,
+        drop_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.parallel = parallel
+        self.entity = entity
+        self.tokens_per_item = tokens_per_item
+        self.item_latency = item_latency
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self.stats = StubStats()
+        self._slots: asyncio.Semaphore | None = None
+        self._in_flight = 0
+
+    def answer(self, payload: dict) -> dict:
+        """Build the /api/generate response body for a request payload."""
+        prompt = payload.get("prompt", "")
+        if isinstance(payload.get("format"), dict):
+            items = [
+                {"id": int(number), **self.entity(text)}
+                for number, text in BATCH_LINE.findall(prompt)
+                if self._random.random() >= self.drop_rate
+            ]
+            n_items = len(BATCH_LINE.findall(prompt))
+            answer = json.dumps({"items": items}, ensure_ascii=False)
+        else:
+            n_items = 1
+            text = prompt.removeprefix(PROMPT_PREFIX)
+            answer = json.dumps(self.entity(text), ensure_ascii=False)
+        return {
+            "model": payload.get("model", ""),
+            "response": answer,
+            "done": True,
+            "prompt_eval_count": len(payload.get("system", "")) + len(prompt),
+            "eval_count": self.tokens_per_item * n_items,
+            "eval_duration": int(self.delay(payload) * 1e9),
+        }
+
+    def delay(self, payload: dict) -> float:
+        """Simulated processing time of a request."""
+        n_items = len(BATCH_LINE.findall(payload.get("prompt", ""))) or 1
+        return self.latency + self.item_latency * n_items
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/api/generate":
+            return httpx.Response(404, json={"error": "not found"})
+        payload = json.loads(request.content)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+        self.stats.requests += 1
+        start = time.monotonic()
+        self._in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self._in_flight)
+        try:
+            async with self._slots:
+                await asyncio.sleep(self.delay(payload))
+        finally:
+            self._in_flight -= 1
+        self.stats.latencies.append(time.monotonic() - start)
+        return httpx.Response(200, json=self.answer(payload))
+
+    def transport(self) -> httpx.MockTransport:
+        """httpx transport that routes requests to this stub in-process."""
+        return httpx.MockTransport(self.handle)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 11435):
+        """Serve the stub over HTTP until interrupted."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(stub.delay(payload))
+                body = json.dumps(stub.answer(payload), ensure_ascii=False).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        print(f"Ollama stub listening on http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Ollama stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per request (default: 0)"
+    )
+    args = parser.parse_args()
+    OllamaStub(latency=args.latency).serve(args.host, args.port)
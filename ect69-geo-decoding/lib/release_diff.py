@@ -0,0 +1,200 @@
+"""
+Change data capture between ECT voting unit releases.
+
+ECT publishes dated snapshots of the voting unit list. Units of two releases
+are matched first by id, then (for ids that appear in only one release) by
+tambon and normalized name (canonical_names), and each unit of either
+release is classified:
+
+    unchanged  same place: same tambon and canonical name
+    renamed    same id and tambon, name edited but near-duplicate
+    moved      same id, different tambon or a different place name
+    added      only in the new release
+    removed    only in the old release
+
+Only added, renamed and moved units need extraction, geocoding, validation
+and upload again; unchanged units inherit their prior results
+(inherit_results).
+"""
+
+import pandas as pd
+
+from .unit_clustering import (
+    DEFAULT_BLOCK_COLUMNS,
+    DEFAULT_SIMILARITY,
+    canonical_names,
+    is_near_duplicate,
+)
+
+CHANGES = ["unchanged", "renamed", "moved", "added", "removed"]
+WORK_CHANGES = ["added", "renamed", "moved"]
+
+
+def _check_unique_ids(units: pd.DataFrame, id_column: str, label: str):
+    """
+    Refuse units with repeated ids, which would make id matches many-to-many.
+
+    Raises:
+        ValueError: naming up to five repeated ids of `label`
+    """
+    ids = units[id_column].dropna()
+    repeated = ids[ids.duplicated()].unique()
+    if len(repeated):
+        sample = ", ".join(str(i) for i in repeated[:5])
+        raise ValueError(
+            f"{len(repeated):,} {id_column} values repeat in {label} (e.g. {sample}); "
+            f"ids must be unique to match releases"
+        )
+
+
+def _keys(
+    units: pd.DataFrame, id_column: str, name_column: str, block_columns: list[str]
+) -> pd.DataFrame:
+    keys = units[[id_column, *block_columns, name_column]].copy()
+    # Nullable ids, so unmatched units don't turn integer ids into floats
+    keys[id_column] = keys[id_column].convert_dtypes()
+    keys[block_columns] = keys[block_columns].fillna("").astype(str)
+    keys["canonical_name"] = canonical_names(keys[name_column])
+    return keys
+
+
+def diff_releases(
+    old: pd.DataFrame,
+    new: pd.DataFrame,
+    id_column: str = "unitId",
+    name_column: str = "unitName",
+    block_columns: list[str] = DEFAULT_BLOCK_COLUMNS,
+    similarity: float = DEFAULT_SIMILARITY,
+) -> pd.DataFrame:
+    """
+    Match and classify the units of two releases.
+
+    Args:
+        old: Units of the previous release
+        new: Units of the new release
+        id_column: Unit id column, expected to be stable across releases
+        name_column: Raw unit name column
+        block_columns: Location columns (tambon) of a unit
+        similarity: Minimum edit similarity for a name edit to count as
+            renamed rather than moved
+
+    Returns:
+        One row per unit of either release: id_column, block_columns and
+        name_column of the new release (old release for removed units),
+        `old_<column>` for the matched old unit, `match` ("id", "name" or
+        None) and `change` (see CHANGES)
+
+    Raises:
+        ValueError: if either release repeats a unit id
+    """
+    _check_unique_ids(old, id_column, "the old release")
+    _check_unique_ids(new, id_column, "the new release")
+    old_keys = _keys(old, id_column, name_column, block_columns)
+    new_keys = _keys(new, id_column, name_column, block_columns)
+    columns = [id_column, *block_columns, name_column, "canonical_name"]
+    old_keys = old_keys.rename(columns={c: f"old_{c}" for c in columns})
+
+    # 1. Same id
+    by_id = new_keys.merge(
+        old_keys, left_on=id_column, right_on=f"old_{id_column}", how="inner"
+    )
+    by_id["match"] = "id"
+    by_id["_merge"] = "both"
+
+    # 2. Ids in one release only: same tambon and canonical name, pairing
+    # repeated names in order
+    new_rest = new_keys[~new_keys[id_column].isin(by_id[id_column])]
+    old_rest = old_keys[~old_keys[f"old_{id_column}"].isin(by_id[f"old_{id_column}"])]
+    name_key = [*block_columns, "canonical_name"]
+    old_name_key = [f"old_{c}" for c in name_key]
+    new_rest = new_rest.assign(_n=new_rest.groupby(name_key).cumcount())
+    old_rest = old_rest.assign(_n=old_rest.groupby(old_name_key).cumcount())
+    by_name = new_rest.merge(
+        old_rest,
+        left_on=[*name_key, "_n"],
+        right_on=[*old_name_key, "_n"],
+        how="outer",
+        indicator=True,
+    ).drop(columns="_n")
+    by_name["match"] = by_name["_merge"].map({"both": "name"})
+    by_name["_merge"] = by_name["_merge"].astype(str)
+
+    diff = pd.concat([by_id, by_name], ignore_index=True)
+    diff["match"] = diff["match"].astype(object).where(diff["match"].notna(), None)
+    old_block = diff[[f"old_{c}" for c in block_columns]].to_numpy()
+    same_block = pd.Series(
+        (diff[block_columns].to_numpy() == old_block).all(axis=1), index=diff.index
+    )
+    same_name = diff["canonical_name"] == diff["old_canonical_name"]
+
+    change = pd.Series("moved", index=diff.index, dtype=object)
+    change[same_block & same_name] = "unchanged"
+    # Name edits within a tambon: a spelling fix or a different place
+    edited = diff.index[same_block & ~same_name & (diff["_merge"] == "both")]
+    renamed = [
+        i
+        for i, a, b in zip(
+            edited,
+            diff.loc[edited, "canonical_name"],
+            diff.loc[edited, "old_canonical_name"],
+        )
+        if is_near_duplicate(a, b, similarity)
+    ]
+    change[renamed] = "renamed"
+    change[diff["_merge"] == "left_only"] = "added"
+    change[diff["_merge"] == "right_only"] = "removed"
+    diff["change"] = change
+
+    # Removed units keep their old id, location and name in the main columns
+    removed = diff["change"] == "removed"
+    for column in [id_column, *block_columns, name_column]:
+        diff.loc[removed, column] = diff.loc[removed, f"old_{column}"]
+
+    return diff[
+        [
+            id_column,
+            *block_columns,
+            name_column,
+            f"old_{id_column}",
+            *[f"old_{c}" for c in block_columns],
+            f"old_{name_column}",
+            "match",
+            "change",
+        ]
+    ].reset_index(drop=True)
+
+
+def work_list(diff: pd.DataFrame) -> pd.DataFrame:
+    """Units of the new release that need processing (WORK_CHANGES)."""
+    return diff[diff["change"].isin(WORK_CHANGES)].reset_index(drop=True)
+
+
+def inherit_results(
+    diff: pd.DataFrame,
+    prior_results: pd.DataFrame,
+    id_column: str = "unitId",
+) -> pd.DataFrame:
+    """
+    Carry prior per-unit results over to unchanged units of the new release.
+
+    Args:
+        diff: Output of diff_releases()
+        prior_results: Results of the previous release, one row per old
+            unit id (id_column plus result columns)
+        id_column: Unit id column
+
+    Returns:
+        Unchanged units (new id_column) with the result columns of their
+        matched old unit
+
+    Raises:
+        ValueError: if prior_results has more than one row for a unit id
+    """
+    _check_unique_ids(prior_results, id_column, "the prior results")
+    unchanged = diff.loc[diff["change"] == "unchanged", [id_column, f"old_{id_column}"]]
+    prior = prior_results.rename(columns={id_column: f"old_{id_column}"})
+    return (
+        unchanged.merge(prior, on=f"old_{id_column}", how="inner", validate="1:1")
+        .drop(columns=f"old_{id_column}")
+        .reset_index(drop=True)
+    )
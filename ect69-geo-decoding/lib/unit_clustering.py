@@ -0,0 +1,184 @@
+"""
+Near-duplicate clustering of voting unit names.
+
+Consecutive units are often the same place written slightly differently
+(`spec/unit name process for main day.md`): `#` in arbitrary positions, with
+or without spaces, "(ย้ายมาจาก...)" notes, numbered tents "(1)", "(2)", and
+typos. Names are canonicalized, then compared only within a block (a tambon),
+and near-duplicates are linked by bounded edit distance (editdistpy).
+Downstream extraction and geocoding only need one representative per cluster.
+"""
+
+import re
+from itertools import groupby
+
+import pandas as pd
+from editdistpy import levenshtein
+
+DEFAULT_BLOCK_COLUMNS = ["provinceName", "districtName", "subDistrictName"]
+DEFAULT_SIMILARITY = 0.9
+
+# '#' markers, with stray Thai vowel/tone marks typed right after them
+HASH_MARK = re.compile(r"#[ัิ-ฺ็-๎]*")
+# "(ย้ายมาจาก...)" relocation notes, also with '#' inside ("(ย้าย#มาจาก...)")
+MOVED_FROM = re.compile(r"\(\s*ย้าย[^()]*\)")
+# Numbered units of the same place: "(1)", "( 2 )"
+ORDINAL = re.compile(r"\(\s*\d+\s*\)")
+WHITESPACE = re.compile(r"\s+")
+DIGITS = re.compile(r"\d+")
+
+
+def _per_distinct(names: pd.Series, transform) -> pd.Series:
+    """Apply a column transform once per distinct name, broadcast back."""
+    codes, uniques = pd.factorize(names.fillna("").astype(str))
+    result = transform(pd.Series(uniques, dtype=object)).to_numpy()
+    return pd.Series(result[codes], index=names.index, dtype=object)
+
+
+def _clean(names: pd.Series) -> pd.Series:
+    names = names.str.replace(MOVED_FROM, " ", regex=True)
+    names = names.str.replace(HASH_MARK, " ", regex=True)
+    return names.str.replace(WHITESPACE, " ", regex=True).str.strip()
+
+
+def _without_ordinal(names: pd.Series) -> pd.Series:
+    names = _clean(names).str.replace(ORDINAL, " ", regex=True)
+    return names.str.replace(WHITESPACE, " ", regex=True).str.strip()
+
+
+def _canonical(names: pd.Series) -> pd.Series:
+    names = _clean(names).str.replace(ORDINAL, "", regex=True)
+    return names.str.replace(WHITESPACE, "", regex=True)
+
+
+def clean_names(names: pd.Series) -> pd.Series:
+    """Readable form: no '#' markers or relocation notes, single spaces."""
+    return _per_distinct(names, _clean)
+
+
+def canonical_names(names: pd.Series) -> pd.Series:
+    """
+    Comparison key: clean_names() without unit numbering and whitespace.
+
+    `โรงเรียนอัสสัมชัญ แผนกประถม#` and
+    `โรงเรียนอัสสัมชัญแผนกประถม#(ย้ายมาจากโรงเรียนอัสสัมชัญพาณิชยการ)` give
+    the same key.
+    """
+    return _per_distinct(names, _canonical)
+
+
+def is_near_duplicate(a: str, b: str, similarity: float = DEFAULT_SIMILARITY) -> bool:
+    """
+    Whether two canonical names are the same place.
+
+    Names must have the same numbers (ซอย 26 and ซอย 28 are different places)
+    and an edit distance within (1 - similarity) of the longer length.
+    """
+    if DIGITS.findall(a) != DIGITS.findall(b):
+        return False
+    max_distance = int((1 - similarity) * max(len(a), len(b)))
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    # Bounded distance; -1 when above max_distance
+    return levenshtein.distance(a, b, max_distance) >= 0
+
+
+def find_root(parent: dict, key):
+    """Root of key in a union-find parent map, compressing the path on the way."""
+    while parent[key] != key:
+        parent[key] = parent[parent[key]]
+        key = parent[key]
+    return key
+
+
+def cluster_unit_names(
+    df: pd.DataFrame,
+    name_column: str = "unitName",
+    block_columns: list[str] = DEFAULT_BLOCK_COLUMNS,
+    similarity: float = DEFAULT_SIMILARITY,
+) -> pd.DataFrame:
+    """
+    Assign every unit to a near-duplicate cluster within its block.
+
+    Exact canonical matches are grouped first; distinct canonical names in
+    the same block are then compared pairwise and linked (transitively) when
+    is_near_duplicate(). Within a block, names are compared in order of
+    length and only while the lengths are close enough to match.
+
+    Args:
+        df: Voting units
+        name_column: Column with the raw unit name
+        block_columns: Columns that must match for units to cluster (tambon)
+        similarity: Minimum normalized edit similarity for near-duplicates
+
+    Returns:
+        Copy of df with `canonical_name`, `cluster_id` (int, in order of first
+        appearance), `cluster_size` and `representative` (cleaned name of the
+        most common variant in the cluster, without unit numbering). Units
+        with a missing or empty name are not clustered: each gets a cluster
+        of its own.
+    """
+    out = df.copy()
+    out["canonical_name"] = canonical_names(out[name_column])
+    keys = out[block_columns + ["canonical_name"]].fillna("").astype(str)
+    key_tuples = list(keys.itertuples(index=False, name=None))
+    unnamed = (out["canonical_name"] == "").to_numpy()
+
+    # Union-find over distinct (block..., canonical_name) keys, compared
+    # within each block in order of length
+    parent = {key: key for key, skip in zip(key_tuples, unnamed) if not skip}
+    by_block = sorted(parent, key=lambda key: (key[:-1], len(key[-1])))
+    for _, block in groupby(by_block, key=lambda key: key[:-1]):
+        block = list(block)
+        names = [key[-1] for key in block]
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                # Later names are only longer, so only further apart
+                if len(names[i]) < similarity * len(names[j]):
+                    break
+                if is_near_duplicate(names[i], names[j], similarity):
+                    root_i = find_root(parent, block[i])
+                    root_j = find_root(parent, block[j])
+                    if root_i != root_j:
+                        parent[root_j] = root_i
+
+    # Unnamed units are keyed by their position, so none share a cluster
+    roots = [
+        ("", i) if skip else find_root(parent, key)
+        for i, (key, skip) in enumerate(zip(key_tuples, unnamed))
+    ]
+    out["cluster_id"] = pd.factorize(pd.Series(roots, dtype=object))[0]
+    out["cluster_size"] = out.groupby("cluster_id")["cluster_id"].transform("size")
+
+    # Most common cleaned variant per cluster, first appearance breaking ties;
+    # tent numbers "(1)" belong to the unit, not the place
+    cleaned = _per_distinct(out[name_column], _without_ordinal)
+    counts = (
+        pd.DataFrame({"cluster_id": out["cluster_id"], "name": cleaned})
+        .groupby(["cluster_id", "name"], sort=False)
+        .size()
+        .reset_index(name="count")
+        .sort_values("count", ascending=False, kind="stable")
+        .drop_duplicates("cluster_id")
+        .set_index("cluster_id")["name"]
+    )
+    out["representative"] = out["cluster_id"].map(counts)
+    return out
+
+
+def cluster_representatives(
+    clustered: pd.DataFrame, block_columns: list[str] = DEFAULT_BLOCK_COLUMNS
+) -> pd.DataFrame:
+    """
+    One row per cluster, for extraction and geocoding.
+
+    Results computed per representative are fanned back out to units with a
+    merge on cluster_id.
+    """
+    return (
+        clustered.drop_duplicates("cluster_id")[
+            ["cluster_id", *block_columns, "representative", "cluster_size"]
+        ]
+        .sort_values("cluster_id")
+        .reset_index(drop=True)
+    )
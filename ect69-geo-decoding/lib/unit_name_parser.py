@@ -0,0 +1,247 @@
+"""
+Rule-based parser for voting location strings.
+
+Implements the deterministic rules of `spec/unit name process.md` with
+precompiled regular expressions applied column-wise (pandas .str methods), and
+produces the same fields as the LLM extraction prompt. Each row gets a
+confidence flag; only "low" rows need to go to the LLM.
+
+Rules, in order:
+    1. Administrative suffix: trailing แขวง/ตำบล (subdistrict) and เขต/อำเภอ
+       (district); also picked up from names like ที่ว่าการอำเภอX
+    2. Parentheticals: extra_info; removed from the name when trailing
+    3. Floor: ชั้น N, ชั้นล่าง, ...
+    4. Area prefix: leading descriptors (บริเวณ, เต็นท์, ลานจอดรถ, ...)
+    5. Buildings: named buildings before the main venue, split on และ/กับ/comma
+"""
+
+import re
+
+import pandas as pd
+
+ENTITY_FIELDS = [
+    "location_name",
+    "location_type",
+    "area_prefix",
+    "buildings",
+    "floor",
+    "extra_info",
+    "subdistrict",
+    "district",
+]
+
+# Rule 1: trailing administrative markers (spaced), outermost last
+ADMIN_SUFFIX = re.compile(
+    r"\s+(?:(?:แขวง|ตำบล|ต\.)\s*(?P<subdistrict>[^\s()]+))?"
+    r"\s*(?:(?:เขต|อำเภอ|อ\.)\s*(?P<district>[^\s()]+))?"
+    r"\s*(?:(?:จังหวัด|จ\.)\s*[^\s()]+)?\s*$"
+)
+# District named inside the venue, e.g. ที่ว่าการอำเภอสิชล, สำนักงานเขตพระนคร
+ADMIN_IN_NAME = re.compile(
+    r"(?:ที่ว่าการ|สำนักงาน|หอประชุม|ศาลาประชาคม)(?:อำเภอ|เขต)(?P<district>[^\s()]+)"
+)
+
+# Rule 2: parentheticals and quotes
+PARENTHETICAL = re.compile(r"\(([^()]*)\)")
+TRAILING_PARENTHETICAL = re.compile(r"\s*\([^()]*\)\s*$")
+QUOTES = re.compile(r"[\"“”]")
+
+# Rule 3: floor
+FLOOR = re.compile(r"ชั้น\s*(?:\d+|ล่าง|บน|ใต้ดิน|ลอย|[Gg])")
+
+# Rule 4: leading descriptors that place the unit relative to the venue
+DESCRIPTOR_WORDS = (
+    "เต็นท์|บริเวณ|ลาน(?:จอดรถ|หน้า|กีฬา|อเนกประสงค์|เอนกประสงค์)?|ภายใน|ในร่ม|"
+    "ถนนทางเข้า|พื้นที่|ด้านหน้า|ด้านหลัง|ด้านข้าง|หน้า|ข้าง|ใต้ถุน|ใต้|โถง|ทางเข้า|ริม"
+)
+AREA_PREFIX = re.compile(rf"^(?:(?:{DESCRIPTOR_WORDS})\s*)+")
+
+# Generic (unnamed) halls before a venue are part of the area prefix
+# (หอประชุมโรงเรียน X); named ones are buildings (อาคารเฉลิมพระเกียรติ โรงเรียน X)
+GENERIC_HALL = re.compile(
+    rf"^(?:(?:หอประชุม|ห้องประชุม|อาคาร|โดม|ศาลา|ประรำ|อเนกประสงค์|กิจกรรม|"
+    rf"{DESCRIPTOR_WORDS})\s*)+$"
+)
+BUILDING_WORDS = "อาคาร|ตึก|โดม|หอประชุม|ห้อง|ศาลา|โรงยิม|ประรำ"
+BUILDING_START = re.compile(rf"^(?:{BUILDING_WORDS})")
+
+# Rule 5: multiple buildings
+CONJUNCTION = re.compile(r"\s*(?:และ|กับ|,)\s*")
+
+# Main venue keywords -> location type; at the same position the longest
+# keyword wins, so specific ones (ศูนย์การค้า) beat generic ones (ศูนย์)
+VENUE_TYPES = {
+    "มหาวิทยาลัย": "university",
+    "ม.": "university",
+    "โรงเรียน": "school",
+    "วิทยาลัย": "school",
+    "ที่ว่าการ": "government_office",
+    "สำนักงาน": "government_office",
+    "ศูนย์ราชการ": "government_office",
+    "ศาลากลาง": "government_office",
+    "องค์การบริหารส่วน": "government_office",
+    "เทศบาล": "government_office",
+    "วัด": "temple",
+    "ศูนย์การค้า": "mall",
+    "โลตัส": "mall",
+    "บิ๊กซี": "mall",
+    "เซ็นทรัล": "mall",
+    "ศูนย์กีฬา": "sports_center",
+    "ศูนย์เยาวชน": "sports_center",
+    "โรงยิม": "sports_center",
+    "สนามกีฬา": "sports_center",
+    "อาคารกีฬา": "sports_center",
+    "หอประชุม": "assembly_hall",
+    "ศาลาประชาคม": "assembly_hall",
+    "โดม": "dome",
+}
+VENUE = re.compile(
+    "|".join(re.escape(k) for k in sorted(VENUE_TYPES, key=len, reverse=True))
+    .replace("วัด", "(?<!จังห)วัด")  # not the วัด in จังหวัด (province)
+)
+# Venues that can anchor the location name after a prefix or buildings
+ANCHOR_WORDS = (
+    "มหาวิทยาลัย|ม\\.|โรงเรียน|วิทยาลัย|ที่ว่าการ|สำนักงาน|ศูนย์|ศาลากลาง|"
+    "องค์การบริหารส่วน|เทศบาล|(?<!จังห)วัด|โลตัส|บิ๊กซี|เซ็นทรัล|สนามกีฬา|สวน"
+)
+# What a location name starts with when the rules split it correctly
+LOCATION_START = re.compile(rf"^(?:{VENUE.pattern}|{ANCHOR_WORDS}|{BUILDING_WORDS})")
+ANCHOR_SPLIT = re.compile(rf"^(?P<pre>.+?)\s*(?P<name>(?:{ANCHOR_WORDS}).*)$")
+
+# The gold file names a district's assembly hall after the district itself
+# (หอประชุมอำเภอX -> อำเภอX) and leaves `district` empty
+DISTRICT_HALL = re.compile(r"^หอประชุม(?P<name>อำเภอ[^\s()]+)$")
+
+# Signs that the rules probably misread the string
+UNCERTAIN = re.compile(r"#|ย้าย|ตรงข้าม|ใกล้|ซอย|ถนน|และ|กับ|[()\"“”]")
+# Labelled inconsistently in the gold file, so left to the LLM: provinces
+# (district or extra_info?), abbreviated markers (อ.X) and a district name
+# glued to a venue other than ที่ว่าการ/สำนักงาน/ศาลาประชาคม (หอประชุมXอำเภอY)
+AMBIGUOUS = re.compile(r"\(|จังหวัด|(?:^|\s)[อตจ]\.")
+ADMIN_WORD = re.compile(r"อำเภอ|เขต")
+MAX_CONFIDENT_NAME_LENGTH = 60
+
+
+def _none(series: pd.Series) -> pd.Series:
+    """Empty strings and NaN -> None, as in the LLM output."""
+    series = series.astype(object)
+    return series.where(series.notna() & (series != ""), None)
+
+
+def _parse(raw: pd.Series) -> pd.DataFrame:
+    text = raw.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    # Rule 1: administrative suffix
+    admin = text.str.extract(ADMIN_SUFFIX)
+    text = text.str.replace(ADMIN_SUFFIX, "", regex=True)
+    in_name = text.str.extract(ADMIN_IN_NAME)["district"]
+    district = admin["district"].fillna(in_name)
+
+    # Rule 2: parentheticals; trailing ones are details, inner ones part of the name
+    extra_info = text.str.findall(PARENTHETICAL).str.join(", ")
+    text = text.str.replace(TRAILING_PARENTHETICAL, "", regex=True)
+
+    # Rule 3: floor
+    floor = text.str.extract(f"({FLOOR.pattern})")[0]
+    text = text.str.replace(FLOOR, " ", regex=True)
+    text = text.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    # Rule 4: area prefix
+    area_prefix = text.str.extract(f"({AREA_PREFIX.pattern})")[0].str.strip()
+    text = text.str.replace(AREA_PREFIX, "", regex=True).str.strip()
+
+    # Rule 5: split off halls/buildings in front of the main venue
+    split = text.str.extract(ANCHOR_SPLIT)
+    has_pre = split["pre"].notna() & split["pre"].str.match(BUILDING_START)
+    generic = has_pre & split["pre"].str.match(GENERIC_HALL)
+    named = has_pre & ~generic
+
+    area_prefix = area_prefix.where(
+        ~generic, area_prefix.fillna("") + split["pre"].str.replace(" ", "")
+    )
+    location_name = text.where(~has_pre, split["name"])
+    buildings = pd.Series([[] for _ in range(len(text))], dtype=object)
+    buildings[named] = split.loc[named, "pre"].str.split(CONJUNCTION)
+    # A building on its own is the location (อาคารนิมิบุตร)
+    lone = ~has_pre & text.str.match(r"^(?:อาคาร|ตึก)") & ~text.str.contains(
+        CONJUNCTION
+    )
+    buildings[lone] = text[lone].map(lambda name: [name])
+    location_name = location_name.str.replace(QUOTES, "", regex=True).str.strip()
+
+    district_hall = location_name.str.extract(DISTRICT_HALL)["name"]
+    is_district_hall = district_hall.notna()
+    location_name = location_name.where(~is_district_hall, district_hall)
+    district = district.where(~is_district_hall | admin["district"].notna())
+
+    # Location type from the first venue keyword in the name
+    keyword = location_name.str.extract(f"({VENUE.pattern})")[0]
+    location_type = keyword.map(VENUE_TYPES).fillna("other")
+    location_type[is_district_hall] = "assembly_hall"
+
+    confidence = pd.Series("high", index=text.index)
+    low = (
+        (location_type == "other")
+        | (location_name == "")
+        | location_name.str.contains(UNCERTAIN)
+        | raw.str.contains("#|ย้าย")
+        | (raw.str.count(r"\(") != raw.str.count(r"\)"))
+        | (location_name.str.len() > MAX_CONFIDENT_NAME_LENGTH)
+        | ~(location_name.str.match(LOCATION_START) | is_district_hall)
+        # Several venues (โดมหน้าที่ทำการองค์การบริหารส่วนตำบล...,
+        # หอประชุมที่ว่าการอำเภอ...): which one is the location is ambiguous
+        | (text.str.count(VENUE.pattern) > 1)
+        # Halls and buildings in front of the venue (or misread segments such
+        # as บริเวณลานหน้า): the gold file splits them between area_prefix
+        # and buildings inconsistently
+        | has_pre
+        | lone
+        | raw.str.contains(AMBIGUOUS)
+        | (
+            location_name.str.contains(ADMIN_WORD)
+            & ~location_name.str.match(ADMIN_IN_NAME)
+            & ~is_district_hall
+        )
+    )
+    confidence[low] = "low"
+
+    return pd.DataFrame(
+        {
+            "location_name": location_name,
+            "location_type": location_type,
+            "area_prefix": _none(area_prefix),
+            "buildings": buildings,
+            "floor": _none(floor),
+            "extra_info": _none(extra_info),
+            "subdistrict": _none(admin["subdistrict"]),
+            "district": _none(district),
+            "confidence": confidence,
+        }
+    )
+
+
+def parse_unit_names(texts) -> pd.DataFrame:
+    """
+    Parse many location strings at once.
+
+    Each distinct string is parsed once (unit names repeat heavily within a
+    polling location) and the result broadcast back to its rows.
+
+    Args:
+        texts: Iterable of raw location strings
+
+    Returns:
+        DataFrame with one row per input: the ENTITY_FIELDS of the LLM schema
+        (buildings as a list), `confidence` ("high" or "low") and `original`
+    """
+    original = pd.Series(list(texts), dtype=object)
+    codes, uniques = pd.factorize(original.fillna(""))
+    parsed = _parse(pd.Series(uniques, dtype=str))
+    parsed = parsed.iloc[codes].reset_index(drop=True)
+    parsed["original"] = original
+    return parsed
+
+
+def parse_unit_name(text: str) -> dict:
+    """Parse one location string; see parse_unit_names()."""
+    return parse_unit_names([text]).iloc[0].to_dict()
@@ -0,0 +1,256 @@
+"""
+Benchmark entity extraction backends on speed and accuracy.
+
+Runs any set of backends from lib/entity_extraction.py (MODEL_CONFIGS) over a
+gold-labelled sample and reports, per backend:
+
+  - accuracy per entity field and for whole records (all fields equal)
+  - request latency percentiles (p50/p95/p99)
+  - generated tokens/second (as reported by Ollama) and items/second
+
+The gold sample is drawn from inputs/vote69_early_voting_entities.csv, the
+reviewed Typhoon2 extraction of the early-voting list; pass --gold for
+another file with the same columns. Since the labels started as Typhoon2
+answers, typhoon2 scores on it are an upper bound rather than an independent
+measure; extract_entities.py writes to intermediate/, never to this file.
+Nothing is cached, so every run measures the backend itself.
+
+Usage:
+    uv run python ect69-geo-decoding/scripts/benchmark_extraction.py
+    uv run python ect69-geo-decoding/scripts/benchmark_extraction.py --models rules,typhoon2,glm --sample 100
+    uv run python ect69-geo-decoding/scripts/benchmark_extraction.py --models glm --batch-size 8
+
+Output:
+    - Results table on stdout
+    - outputs/extraction_benchmark.csv
+"""
+
+import argparse
+import ast
+import asyncio
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from lib.entity_extraction import MODEL_CONFIGS, run_extraction
+from lib.ollama_client import DEFAULT_CONCURRENCY, DEFAULT_OLLAMA_URL
+from lib.ollama_stub import OllamaStub
+from lib.unit_name_parser import ENTITY_FIELDS
+
+BASE_DIR = Path(__file__).parent.parent
+GOLD_PATH = BASE_DIR / "inputs" / "vote69_early_voting_entities.csv"
+RESULTS_PATH = BASE_DIR / "outputs" / "extraction_benchmark.csv"
+
+
+def normalize(field: str, value):
+    """Comparable form of a field value: None for empty, tuples for buildings."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if field == "buildings":
+        if isinstance(value, str):
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                value = [value]
+        return tuple(sorted(str(v).strip() for v in value if str(v).strip()))
+    value = str(value).strip()
+    return value or None
+
+
+def load_gold(path: Path, sample: int, seed: int) -> pd.DataFrame:
+    gold = pd.read_csv(path)
+    gold = gold[gold["original"].notna() & gold["location_name"].notna()]
+    if sample and sample < len(gold):
+        gold = gold.sample(sample, random_state=seed)
+    return gold.reset_index(drop=True)
+
+
+def score(gold: pd.DataFrame, entities: list[dict]) -> dict:
+    """Per-field and whole-record accuracy against the gold labels."""
+    matches = {field: [] for field in ENTITY_FIELDS}
+    for (_, expected), entity in zip(gold.iterrows(), entities):
+        for field in ENTITY_FIELDS:
+            matches[field].append(
+                normalize(field, expected[field]) == normalize(field, entity.get(field))
+            )
+    accuracy = {f"acc_{field}": np.mean(hits) for field, hits in matches.items()}
+    accuracy["acc_record"] = np.mean(np.all(list(matches.values()), axis=0))
+    return {key: round(float(value), 3) for key, value in accuracy.items()}
+
+
+async def run_once(
+    model: str,
+    gold: pd.DataFrame,
+    ollama_url: str,
+    concurrency: int,
+    batch_size: int,
+    stub_options: dict,
+) -> dict:
+    config = MODEL_CONFIGS[model]
+    texts = gold["original"].tolist()
+    run = await run_extraction(
+        config,
+        texts,
+        ollama_url=ollama_url,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        stub=OllamaStub(**stub_options),
+    )
+
+    latencies = np.array(run.stats.latencies) if run.stats.latencies else None
+    tokens_per_s = run.stats.tokens_per_second
+    result = {
+        "model": model,
+        "items": len(texts),
+        "errors": sum("error" in entity for entity in run.entities),
+        "seconds": round(run.seconds, 2),
+        "items_per_s": round(len(texts) / run.seconds, 1) if run.seconds else None,
+        "tokens_per_s": round(tokens_per_s, 1) if tokens_per_s else None,
+        "requests": run.stats.requests,
+    }
+    for p in (50, 95, 99):
+        result[f"p{p}_latency_s"] = (
+            round(float(np.percentile(latencies, p)), 3) if latencies is not None else None
+        )
+    result.update(score(gold, run.entities))
+    return result
+
+
+async def main(
+    models: list[str],
+    gold_path: Path,
+    sample: int,
+    seed: int,
+    ollama_url: str,
+    concurrency: int,
+    batch_size: int,
+    stub_options: dict,
+):
+    """
+    Benchmark every backend in models on the same gold sample.
+
+    Args:
+        models: MODEL_CONFIGS names to run
+        gold_path: Gold-labelled CSV (original + entity field columns)
+        sample: Gold rows to use (0 = all)
+        seed: Random seed for the sample
+        ollama_url: Ollama base URL for LLM backends
+        concurrency: Concurrent requests for LLM backends
+        batch_size: Locations per LLM request
+        stub_options: Keyword arguments for OllamaStub
+    """
+    unknown = [m for m in models if m not in MODEL_CONFIGS]
+    if unknown:
+        print(f"ERROR: Unknown models {unknown}, choose from {list(MODEL_CONFIGS)}")
+        sys.exit(1)
+    if not gold_path.exists():
+        print(f"ERROR: {gold_path} not found")
+        sys.exit(1)
+
+    gold = load_gold(gold_path, sample, seed)
+    print(f"Gold sample: {len(gold)} rows from {gold_path.name}")
+
+    results = []
+    for model in models:
+        result = await run_once(
+            model, gold, ollama_url, concurrency, batch_size, stub_options
+        )
+        results.append(result)
+        print(
+            f"  {model:<10} {result['items_per_s'] or 0:>8,.1f} items/s  "
+            f"record acc={result['acc_record']:.3f}  errors={result['errors']}"
+        )
+
+    results_df = pd.DataFrame(results)
+    print("\nResults:")
+    print(results_df.T.to_string(header=False))
+
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    results_df.to_csv(RESULTS_PATH, index=False)
+    print(f"Saved results to {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark entity extraction backends on speed and accuracy",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run python ect69-geo-decoding/scripts/benchmark_extraction.py
+  uv run python ect69-geo-decoding/scripts/benchmark_extraction.py --models rules,typhoon2,glm
+  uv run python ect69-geo-decoding/scripts/benchmark_extraction.py --models glm --batch-size 8
+        """,
+    )
+    parser.add_argument(
+        "--models",
+        type=lambda value: [m.strip() for m in value.split(",") if m.strip()],
+        default=["rules", "stub"],
+        help=f"Comma-separated backends from {','.join(MODEL_CONFIGS)} "
+        "(default: rules,stub)",
+    )
+    parser.add_argument(
+        "--gold",
+        type=Path,
+        default=GOLD_PATH,
+        help="Gold-labelled CSV (default: inputs/vote69_early_voting_entities.csv)",
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=100,
+        help="Gold rows to benchmark on, 0 = all (default: 100)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed for the sample (default: 0)"
+    )
+    parser.add_argument(
+        "--ollama-url",
+        default=DEFAULT_OLLAMA_URL,
+        help=f"Ollama base URL, or set $OLLAMA_URL (default: {DEFAULT_OLLAMA_URL})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Concurrent LLM requests (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Locations per LLM request (default: 1)",
+    )
+    parser.add_argument(
+        "--stub-latency",
+        type=float,
+        default=0.5,
+        help="Stub seconds per request (default: 0.5)",
+    )
+    parser.add_argument(
+        "--stub-item-latency",
+        type=float,
+        default=0.0,
+        help="Stub extra seconds per item in a batch (default: 0)",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            models=args.models,
+            gold_path=args.gold,
+            sample=args.sample,
+            seed=args.seed,
+            ollama_url=args.ollama_url,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            stub_options={
+                "latency": args.stub_latency,
+                "item_latency": args.stub_item_latency,
+                "parallel": args.concurrency,
+            },
+        )
+    )
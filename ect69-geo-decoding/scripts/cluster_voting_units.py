@@ -0,0 +1,121 @@
+"""
+Cluster near-duplicate voting unit names before extraction and geocoding.
+
+Consecutive units of the main-day list are often the same place written with
+`#` markers, missing spaces, "(ย้ายมาจาก...)" notes or unit numbers. This
+script groups them per tambon (lib/unit_clustering.py) so that extraction and
+geocoding run once per cluster representative instead of once per unit.
+
+Requirements:
+  - inputs/ect69-voting-units-20260121.csv (dvc pull)
+
+Output:
+  - intermediate/voting_unit_clusters.parquet (every unit with its cluster_id)
+  - intermediate/voting_unit_cluster_representatives.csv (one row per cluster)
+
+Usage:
+    uv run python ect69-geo-decoding/scripts/cluster_voting_units.py
+    uv run python ect69-geo-decoding/scripts/cluster_voting_units.py --similarity 0.85
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from lib.unit_clustering import (
+    DEFAULT_BLOCK_COLUMNS,
+    DEFAULT_SIMILARITY,
+    cluster_representatives,
+    cluster_unit_names,
+)
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_INPUT = BASE_DIR / "inputs" / "ect69-voting-units-20260121.csv"
+CLUSTERS_PATH = BASE_DIR / "intermediate" / "voting_unit_clusters.parquet"
+REPRESENTATIVES_PATH = (
+    BASE_DIR / "intermediate" / "voting_unit_cluster_representatives.csv"
+)
+
+
+def main(
+    input_file: Path,
+    name_column: str,
+    block_columns: list[str],
+    similarity: float,
+):
+    if not input_file.exists():
+        print(f"ERROR: {input_file} not found")
+        print("Run `dvc pull` or pass --input")
+        sys.exit(1)
+
+    df = pd.read_csv(input_file)
+    missing = [c for c in [name_column, *block_columns] if c not in df.columns]
+    if missing:
+        print(f"ERROR: Columns {missing} not in {input_file.name}")
+        print(f"Available columns: {list(df.columns)}")
+        sys.exit(1)
+    print(f"Loaded {len(df):,} units from {input_file.name}")
+
+    clustered = cluster_unit_names(df, name_column, block_columns, similarity)
+    representatives = cluster_representatives(clustered, block_columns)
+
+    n_units = len(clustered)
+    n_names = clustered[name_column].nunique()
+    n_clusters = len(representatives)
+    print(f"Distinct raw names: {n_names:,}")
+    print(f"Clusters: {n_clusters:,} ({n_units / max(n_clusters, 1):.1f} units each)")
+
+    CLUSTERS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    clustered.to_parquet(CLUSTERS_PATH, index=False)
+    representatives.to_csv(REPRESENTATIVES_PATH, index=False)
+    print(f"Saved clusters to {CLUSTERS_PATH}")
+    print(f"Saved representatives to {REPRESENTATIVES_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Cluster near-duplicate voting unit names per tambon",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run python ect69-geo-decoding/scripts/cluster_voting_units.py
+  uv run python ect69-geo-decoding/scripts/cluster_voting_units.py --similarity 0.85
+  uv run python ect69-geo-decoding/scripts/cluster_voting_units.py \\
+      --input units.csv --name-column name --block-columns province,amphoe,tambon
+        """,
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=DEFAULT_INPUT,
+        help="Voting units CSV (default: inputs/ect69-voting-units-20260121.csv)",
+    )
+    parser.add_argument(
+        "--name-column",
+        default="unitName",
+        help="Column with the unit name (default: unitName)",
+    )
+    parser.add_argument(
+        "--block-columns",
+        type=lambda value: [c.strip() for c in value.split(",") if c.strip()],
+        default=DEFAULT_BLOCK_COLUMNS,
+        help="Comma-separated columns units must share to cluster "
+        f"(default: {','.join(DEFAULT_BLOCK_COLUMNS)})",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help=f"Minimum edit similarity for near-duplicates (default: {DEFAULT_SIMILARITY})",
+    )
+    args = parser.parse_args()
+
+    main(
+        input_file=args.input,
+        name_column=args.name_column,
+        block_columns=args.block_columns,
+        similarity=args.similarity,
+    )
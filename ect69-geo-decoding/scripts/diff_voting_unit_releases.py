@@ -0,0 +1,187 @@
+"""
+Diff two ECT voting unit releases and list the units that need processing.
+
+Units are matched by id, then by tambon and normalized name, and classified
+as unchanged, renamed, moved, added or removed (lib/release_diff.py). Only
+added, renamed and moved units go to the work list for extraction,
+geocoding, validation and upload; unchanged units inherit the results of
+the previous release when --prior-results is given.
+
+Requirements:
+  - The previous release, e.g. from an older revision of the DVC-tracked input:
+    dvc get . ect69-geo-decoding/inputs/ect69-voting-units-20260121.csv \\
+        --rev <commit> -o /tmp/ect69-voting-units-old.csv
+  - inputs/ect69-voting-units-20260121.csv (or --new)
+
+Output:
+  - intermediate/release_diff.parquet (every unit of both releases with its change)
+  - intermediate/release_work_list.csv (units to process)
+  - intermediate/release_inherited.parquet (with --prior-results)
+
+Usage:
+    uv run python ect69-geo-decoding/scripts/diff_voting_unit_releases.py \\
+        --old /tmp/ect69-voting-units-old.csv
+    uv run python ect69-geo-decoding/scripts/diff_voting_unit_releases.py \\
+        --old /tmp/ect69-voting-units-old.csv \\
+        --prior-results ect69-geo-decoding/intermediate/voting_unit_anchors.parquet
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from lib.release_diff import CHANGES, diff_releases, inherit_results, work_list
+from lib.unit_clustering import DEFAULT_BLOCK_COLUMNS, DEFAULT_SIMILARITY
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_NEW = BASE_DIR / "inputs" / "ect69-voting-units-20260121.csv"
+DIFF_PATH = BASE_DIR / "intermediate" / "release_diff.parquet"
+WORK_LIST_PATH = BASE_DIR / "intermediate" / "release_work_list.csv"
+INHERITED_PATH = BASE_DIR / "intermediate" / "release_inherited.parquet"
+
+
+def read_table(path: Path) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main(
+    old_file: Path,
+    new_file: Path,
+    id_column: str,
+    name_column: str,
+    block_columns: list[str],
+    similarity: float,
+    prior_results: Path | None,
+):
+    releases = {}
+    for label, path in [("old", old_file), ("new", new_file)]:
+        if not path.exists():
+            print(f"ERROR: {path} not found")
+            sys.exit(1)
+        df = pd.read_csv(path)
+        missing = [
+            c for c in [id_column, name_column, *block_columns] if c not in df.columns
+        ]
+        if missing:
+            print(f"ERROR: Columns {missing} not in {path.name}")
+            print(f"Available columns: {list(df.columns)}")
+            sys.exit(1)
+        releases[label] = df
+        print(f"Loaded {len(df):,} units from {path.name} ({label})")
+
+    try:
+        diff = diff_releases(
+            releases["old"],
+            releases["new"],
+            id_column=id_column,
+            name_column=name_column,
+            block_columns=block_columns,
+            similarity=similarity,
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    todo = work_list(diff)
+
+    print("\nChanges:")
+    counts = diff["change"].value_counts().reindex(CHANGES, fill_value=0)
+    for change, count in counts.items():
+        print(f"  {change:<10} {count:>8,}")
+    matched_by_name = (diff["match"] == "name").sum()
+    if matched_by_name:
+        print(f"  ({matched_by_name:,} unchanged units matched by name under a new id)")
+    print(f"Work list: {len(todo):,} of {len(releases['new']):,} new units")
+
+    DIFF_PATH.parent.mkdir(parents=True, exist_ok=True)
+    diff.to_parquet(DIFF_PATH, index=False)
+    todo.to_csv(WORK_LIST_PATH, index=False)
+    print(f"\nSaved diff to {DIFF_PATH}")
+    print(f"Saved work list to {WORK_LIST_PATH}")
+
+    if prior_results is not None:
+        if not prior_results.exists():
+            print(f"ERROR: {prior_results} not found")
+            sys.exit(1)
+        prior = read_table(prior_results)
+        if id_column not in prior.columns:
+            print(f"ERROR: Column {id_column!r} not in {prior_results.name}")
+            sys.exit(1)
+        try:
+            inherited = inherit_results(diff, prior, id_column)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        inherited.to_parquet(INHERITED_PATH, index=False)
+        print(
+            f"Inherited results for {len(inherited):,} of "
+            f"{counts['unchanged']:,} unchanged units"
+        )
+        print(f"Saved inherited results to {INHERITED_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Diff two ECT voting unit releases into a work list",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run python ect69-geo-decoding/scripts/diff_voting_unit_releases.py \\
+      --old /tmp/ect69-voting-units-old.csv
+  uv run python ect69-geo-decoding/scripts/diff_voting_unit_releases.py \\
+      --old /tmp/ect69-voting-units-old.csv --new units-20260201.csv \\
+      --prior-results ect69-geo-decoding/intermediate/voting_unit_anchors.parquet
+        """,
+    )
+    parser.add_argument("--old", type=Path, required=True, help="Previous release CSV")
+    parser.add_argument(
+        "--new",
+        type=Path,
+        default=DEFAULT_NEW,
+        help="New release CSV (default: inputs/ect69-voting-units-20260121.csv)",
+    )
+    parser.add_argument(
+        "--id-column",
+        default="unitId",
+        help="Column with the unit id (default: unitId)",
+    )
+    parser.add_argument(
+        "--name-column",
+        default="unitName",
+        help="Column with the unit name (default: unitName)",
+    )
+    parser.add_argument(
+        "--block-columns",
+        type=lambda value: [c.strip() for c in value.split(",") if c.strip()],
+        default=DEFAULT_BLOCK_COLUMNS,
+        help="Comma-separated location columns of a unit "
+        f"(default: {','.join(DEFAULT_BLOCK_COLUMNS)})",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help="Minimum edit similarity for a name edit to count as renamed "
+        f"rather than moved (default: {DEFAULT_SIMILARITY})",
+    )
+    parser.add_argument(
+        "--prior-results",
+        type=Path,
+        help="Per-unit results of the previous release (parquet or CSV with "
+        "the id column), carried over to unchanged units",
+    )
+    args = parser.parse_args()
+
+    main(
+        old_file=args.old,
+        new_file=args.new,
+        id_column=args.id_column,
+        name_column=args.name_column,
+        block_columns=args.block_columns,
+        similarity=args.similarity,
+        prior_results=args.prior_results,
+    )
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Extract entities from voting location strings.
+
+One extractor for all backends in lib/entity_extraction.py (MODEL_CONFIGS):
+typhoon2 and glm on Ollama, the rule-based parser, and a local stub.
+
+Each distinct string of the input column is extracted once. Results are
+appended to the output CSV as they complete, so an interrupted run can be
+restarted with the same command and continues with the strings not yet in
+the output; failed strings are retried on the next run.
+
+Usage:
+    uv run python ect69-geo-decoding/scripts/extract_entities.py --model typhoon2
+    uv run python ect69-geo-decoding/scripts/extract_entities.py --model glm --batch-size 8
+    uv run python ect69-geo-decoding/scripts/extract_entities.py --model typhoon2 --rules-first
+    uv run python ect69-geo-decoding/scripts/extract_entities.py --model typhoon2 \\
+        --input ect69-geo-decoding/inputs/ect69-voting-units-20260121.csv \\
+        --column unitName --output ect69-geo-decoding/intermediate/voting_unit_entities.csv
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from lib.entity_extraction import MODEL_CONFIGS, EntityOutput, run_extraction
+from lib.llm_cache import DEFAULT_CACHE_PATH, ExtractionCache
+from lib.ollama_client import DEFAULT_CONCURRENCY, DEFAULT_OLLAMA_URL
+from lib.unit_name_parser import ENTITY_FIELDS
+
+BASE_DIR = Path(__file__).parent.parent
+INPUT_FILE = BASE_DIR / "inputs" / "vote69_early_voting_เลือกตั้งล่วงหน้า.csv"
+OUTPUT_DIR = BASE_DIR / "intermediate"
+OUTPUT_STEM = "vote69_early_voting_entities"
+LOCATION_COLUMN = "สถานที่เลือกตั้งกลาง"
+
+
+def default_output(model: str) -> Path:
+    # Never inputs/: inputs/vote69_early_voting_entities.csv is the reviewed gold file
+    return OUTPUT_DIR / f"{OUTPUT_STEM}{MODEL_CONFIGS[model].output_suffix}.csv"
+
+
+async def main(
+    model: str = "typhoon2",
+    input_file: Path = INPUT_FILE,
+    output_file: Path | None = None,
+    column: str = LOCATION_COLUMN,
+    ollama_url: str = DEFAULT_OLLAMA_URL,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache_path: Path | None = DEFAULT_CACHE_PATH,
+    rules_first: bool = False,
+    batch_size: int = 1,
+    restart: bool = False,
+):
+    """
+    Extract entities for every distinct string in a CSV column.
+
+    Args:
+        model: Backend name from MODEL_CONFIGS
+        input_file: CSV with the location strings
+        output_file: Append-only output CSV (default: per-model file in
+            intermediate/)
+        column: Column of input_file with the location strings
+        ollama_url: Ollama base URL
+        concurrency: Concurrent LLM requests
+        cache_path: Extraction cache file, None to disable
+        rules_first: Send only low-confidence rule parses to the LLM
+        batch_size: Locations per LLM request
+        restart: Discard an existing output file instead of resuming it
+    """
+    config = MODEL_CONFIGS[model]
+    output_file = output_file or default_output(model)
+
+    if not input_file.exists():
+        print(f"ERROR: {input_file} not found")
+        sys.exit(1)
+    header = pd.read_csv(input_file, nrows=0).columns
+    if column not in header:
+        print(f"ERROR: Column {column!r} not in {input_file.name}")
+        print(f"Available columns: {list(header)}")
+        sys.exit(1)
+
+    locations = pd.read_csv(input_file, usecols=[column])[column].dropna()
+    locations = locations.astype(str).drop_duplicates().tolist()
+
+    if restart:
+        output_file.unlink(missing_ok=True)
+    columns = ENTITY_FIELDS + (["parser"] if rules_first else []) + ["original"]
+    output = EntityOutput(output_file, columns)
+    todo = [text for text in locations if text not in output.done]
+    if output.done:
+        print(
+            f"Resuming {output_file.name}: {len(locations) - len(todo):,} of "
+            f"{len(locations):,} strings already extracted"
+        )
+    if not todo:
+        output.close()
+        print("Nothing to extract")
+        return
+    print(f"Extracting {len(todo):,} locations with {config.description}")
+
+    # Only real model answers are worth caching
+    cache = None
+    if cache_path and config.backend == "ollama":
+        cache = ExtractionCache(cache_path)
+    try:
+        run = await run_extraction(
+            config,
+            todo,
+            ollama_url=ollama_url,
+            concurrency=concurrency,
+            cache=cache,
+            batch_size=batch_size,
+            rules_first=rules_first,
+            on_result=output.append,
+        )
+    finally:
+        output.close()
+        if cache is not None:
+            cache.close()
+
+    print(f"\nSaved to: {output_file}")
+    print(f"Extracted {output.written:,} strings in {run.seconds:.1f}s")
+    if output.failed:
+        print(f"WARNING: {output.failed:,} strings failed, re-run to retry them")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Extract entities from voting location strings",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Models:\n"
+        + "\n".join(
+            f"  {name:<10} {config.description}"
+            for name, config in MODEL_CONFIGS.items()
+        ),
+    )
+    parser.add_argument(
+        "--model",
+        choices=list(MODEL_CONFIGS),
+        default="typhoon2",
+        help="Extraction backend (default: typhoon2)",
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=INPUT_FILE,
+        help="CSV with the location strings "
+        "(default: inputs/vote69_early_voting_เลือกตั้งล่วงหน้า.csv)",
+    )
+    parser.add_argument(
+        "--column",
+        default=LOCATION_COLUMN,
+        help=f"Column with the location strings (default: {LOCATION_COLUMN})",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Output CSV, appended to and resumed from "
+        f"(default: intermediate/{OUTPUT_STEM}_<model>.csv)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard an existing output file instead of resuming from it",
+    )
+    parser.add_argument(
+        "--ollama-url",
+        default=DEFAULT_OLLAMA_URL,
+        help=f"Ollama base URL, or set $OLLAMA_URL (default: {DEFAULT_OLLAMA_URL})",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Concurrent requests, match the server's OLLAMA_NUM_PARALLEL "
+        f"(default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=DEFAULT_CACHE_PATH,
+        help="Extraction cache file (default: .cache/llm_extractions.sqlite)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Query the model for every string, without reading or writing the cache",
+    )
+    parser.add_argument(
+        "--rules-first",
+        action="store_true",
+        help="Parse with the rule-based parser and send only low-confidence "
+        "strings to the LLM",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Locations per request, answered as a schema-constrained JSON array; "
+        "invalid items are retried one by one (default: 1)",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            model=args.model,
+            input_file=args.input,
+            output_file=args.output,
+            column=args.column,
+            ollama_url=args.ollama_url,
+            concurrency=args.concurrency,
+            cache_path=None if args.no_cache else args.cache,
+            rules_first=args.rules_first,
+            batch_size=args.batch_size,
+            restart=args.restart,
+        )
+    )
@@ -20,23 +20,41 @@ Output:
 
 import argparse
 import io
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import pandas as pd
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
 # Add parent dir to path for lib imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from lib.git_utils import get_commit_list, get_commit_metadata, get_file_at_commit
-from lib.models import CommitInfo, RowChange
+from lib.git_utils import (
+    GitBlobReader,
+    get_blob_diff,
+    is_ancestor,
+    iter_commits,
+    run_git,
+)
+from lib.models import (
+    COMMIT_INFO_SCHEMA,
+    COMMIT_INFO_VALUES,
+    ROW_CHANGE_SCHEMA,
+    ROW_CHANGE_VALUES,
+    CommitInfo,
+    ExtractionWatermark,
+    RecordColumns,
+)
 
 # Constants
 START_COMMIT = "1be4945dce44986c64a1b6ee2fb627b39104b2c0"
 CSV_FILE = "station66_distinct_clean.csv"
+WATERMARK_FILE = "extraction_watermark.json"
 
 # Classification thresholds
 ROW_COUNT_SCRIPTED = 100  # >100 rows = scripted
@@ -57,12 +75,31 @@ KEY_COLUMNS = [
     "electorate",
     "location",
 ]
+COORD_COLUMNS = ["latitude", "longitude"]
 
-
-def parse_csv_content(content: str) -> pd.DataFrame:
-    """Parse CSV content string to DataFrame."""
+# Natural key in the output / row change schema, and the change columns that
+# become source attribution
+OUTPUT_KEY_COLUMNS = [
+    "province_number",
+    "registrar_code",
+    "subdis_code",
+    "electorate",
+    "location",
+]
+ATTRIBUTION_COLUMNS = {
+    "commit_hash": "source_commit",
+    "author_name": "source_author",
+    "classification": "source_classification",
+    "timestamp": "source_timestamp",
+}
+SOURCE_CLASSIFICATIONS = ["manual", "scripted", "uncertain", "none"]
+
+
+def parse_csv_content(content: str | bytes) -> pd.DataFrame:
+    """Parse CSV content (string or raw blob bytes) to DataFrame."""
+    buffer = io.BytesIO(content) if isinstance(content, bytes) else io.StringIO(content)
     return pd.read_csv(
-        io.StringIO(content),
+        buffer,
         dtype={
             "provinceNumber": int,
             "registrar_code": int,
@@ -78,75 +115,184 @@ def parse_csv_content(content: str) -> pd.DataFrame:
 def convert_coord_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Convert latitude/longitude from string to float, handling empty values."""
     df = df.copy()
-    for col in ["latitude", "longitude"]:
+    for col in COORD_COLUMNS:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
     return df
 
 
+def load_csv_snapshot(
+    reader: GitBlobReader, blob_id: str, cache_dir: Path
+) -> pd.DataFrame:
+    """
+    Parsed CSV version for a blob id, cached on disk as parquet.
+
+    Blob ids are content addresses, so a cached snapshot stays valid across
+    runs and commit ranges.
+    """
+    cache_path = cache_dir / f"{blob_id}.parquet"
+    if cache_path.exists():
+        return pd.read_parquet(cache_path)
+
+    df = convert_coord_columns(parse_csv_content(reader.read_blob(blob_id)))
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp_path, index=False)
+    tmp_path.replace(cache_path)
+    return df
+
+
 def find_coordinate_changes(
     df_before: pd.DataFrame, df_after: pd.DataFrame
 ) -> list[dict]:
     """
     Find rows where coordinates changed between two states.
 
+    Rows are matched on KEY_COLUMNS (compared as strings; the last duplicate
+    in df_before wins) with a single merge, and added or changed coordinates
+    are selected with boolean masks.
+
     Returns list of dicts with key columns and before/after coordinates.
     """
-    changes = []
-
-    # Create composite key for matching
-    df_before = df_before.copy()
-    df_after = df_after.copy()
-
-    df_before["_key"] = df_before[KEY_COLUMNS].astype(str).agg("|".join, axis=1)
-    df_after["_key"] = df_after[KEY_COLUMNS].astype(str).agg("|".join, axis=1)
-
-    # Create lookup from before state
-    before_coords = {}
-    for _, row in df_before.iterrows():
-        lat = row.get("latitude")
-        lng = row.get("longitude")
-        has_coords = pd.notna(lat) and pd.notna(lng)
-        before_coords[row["_key"]] = (
-            lat if has_coords else None,
-            lng if has_coords else None,
-        )
+    key_names = [f"_key_{col}" for col in KEY_COLUMNS]
+
+    def with_keys(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.reindex(columns=KEY_COLUMNS + COORD_COLUMNS)
+        keys = df[KEY_COLUMNS].astype(str)
+        keys.columns = key_names
+        return pd.concat([df, keys], axis=1)
+
+    before = with_keys(df_before).drop_duplicates(key_names, keep="last")
+    merged = with_keys(df_after).merge(
+        before[key_names + COORD_COLUMNS],
+        on=key_names,
+        how="inner",
+        suffixes=("_after", "_before"),
+    )
+
+    before_has_coords = (
+        merged["latitude_before"].notna() & merged["longitude_before"].notna()
+    )
+    after_has_coords = (
+        merged["latitude_after"].notna() & merged["longitude_after"].notna()
+    )
+    coords_moved = (merged["latitude_before"] != merged["latitude_after"]) | (
+        merged["longitude_before"] != merged["longitude_after"]
+    )
+    # Coordinates added, or changed on a row that already had them
+    changed = after_has_coords & (~before_has_coords | coords_moved)
+
+    rows = merged[changed]
+    changes = rows[KEY_COLUMNS].assign(
+        lat_before=rows["latitude_before"].where(before_has_coords[changed]),
+        lng_before=rows["longitude_before"].where(before_has_coords[changed]),
+        lat_after=rows["latitude_after"],
+        lng_after=rows["longitude_after"],
+    )
+    return changes.astype(object).where(changes.notna(), None).to_dict("records")
+
 
-    # Check each row in after state
-    for _, row in df_after.iterrows():
-        key = row["_key"]
-        lat_after = row.get("latitude")
-        lng_after = row.get("longitude")
-        after_has_coords = pd.notna(lat_after) and pd.notna(lng_after)
-
-        if key in before_coords:
-            lat_before, lng_before = before_coords[key]
-            before_has_coords = lat_before is not None
-
-            # Check if coordinates changed
-            coords_added = not before_has_coords and after_has_coords
-            coords_changed = (
-                before_has_coords
-                and after_has_coords
-                and (lat_before != lat_after or lng_before != lng_after)
+def read_csv_header(reader: GitBlobReader, blob_id: str) -> str:
+    """First line (column names) of a CSV blob."""
+    header = reader.read_blob(blob_id).split(b"\n", 1)[0]
+    return header.decode("utf-8-sig").rstrip("\r")
+
+
+def find_hunk_changes(
+    repo_path: Path, header: str, old_blob: str, new_blob: str
+) -> list[dict] | None:
+    """
+    Find coordinate changes from only the lines that differ between two versions.
+
+    The removed and added lines of `git diff --unified=0` are parsed as rows
+    under the CSV header and matched on KEY_COLUMNS by find_coordinate_changes.
+    Rows on untouched lines cannot have changed, so they are not compared.
+    This differs from comparing the full snapshots (--snapshot-diff) for keys
+    that repeat in the CSV: there every row of a repeated key is matched
+    against its last duplicate in the old version, so untouched duplicates of
+    an edited row are reported too, while here only the edited lines are.
+
+    Returns:
+        List of changes, or None if the diff can't be read line by line (header
+        edited, unparseable lines) and full snapshots must be compared instead
+    """
+    removed, added = get_blob_diff(repo_path, old_blob, new_blob)
+    if any(line_number == 1 for line_number, _ in removed + added):
+        return None
+    if not removed or not added:
+        return []
+
+    try:
+        before, after = (
+            convert_coord_columns(
+                parse_csv_content("\n".join([header, *(line for _, line in lines)]))
             )
+            for lines in (removed, added)
+        )
+    except ValueError:
+        return None
+    return find_coordinate_changes(before, after)
 
-            if coords_added or coords_changed:
-                changes.append(
-                    {
-                        "provinceNumber": row["provinceNumber"],
-                        "registrar_code": row["registrar_code"],
-                        "subdis_code": row["subdis_code"],
-                        "electorate": row["electorate"],
-                        "location": row["location"],
-                        "lat_before": lat_before,
-                        "lng_before": lng_before,
-                        "lat_after": lat_after if after_has_coords else None,
-                        "lng_after": lng_after if after_has_coords else None,
-                    }
-                )
 
-    return changes
+def diff_csv_versions(
+    reader: GitBlobReader,
+    old_blob: str,
+    new_blob: str,
+    cache_dir: Path,
+    use_hunks: bool = True,
+) -> list[dict]:
+    """
+    Coordinate changes between two versions of the CSV, given by blob id.
+
+    Reads `git diff` hunks when use_hunks is set, falling back to comparing
+    the full (cached) snapshots when the hunks can't be read line by line.
+    """
+    if use_hunks:
+        header = read_csv_header(reader, old_blob)
+        changes = find_hunk_changes(reader.repo_path, header, old_blob, new_blob)
+        if changes is not None:
+            return changes
+    return find_coordinate_changes(
+        load_csv_snapshot(reader, old_blob, cache_dir),
+        load_csv_snapshot(reader, new_blob, cache_dir),
+    )
+
+
+# Per-process state of the phase B worker pool (one blob reader per worker)
+_worker: dict = {}
+
+
+def _init_worker(repo_path: Path, cache_dir: Path, use_hunks: bool):
+    _worker["reader"] = GitBlobReader(repo_path)
+    _worker["cache_dir"] = cache_dir
+    _worker["use_hunks"] = use_hunks
+
+
+def _diff_pair(pair: tuple[str, str]) -> list[dict] | Exception:
+    try:
+        return diff_csv_versions(
+            _worker["reader"], *pair, _worker["cache_dir"], _worker["use_hunks"]
+        )
+    except Exception as e:
+        return e
+
+
+def diff_version_pairs(
+    repo_path: Path,
+    pairs: list[tuple[str, str]],
+    cache_dir: Path,
+    use_hunks: bool,
+    workers: int,
+) -> dict[tuple[str, str], list[dict] | Exception]:
+    """Diff (old_blob, new_blob) pairs across a process pool."""
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(repo_path, cache_dir, use_hunks),
+    ) as pool:
+        results = pool.map(_diff_pair, pairs)
+        return dict(
+            zip(pairs, tqdm(results, total=len(pairs), desc="Diffing versions"))
+        )
 
 
 def has_thai_location(message: str) -> bool:
@@ -206,88 +352,210 @@ def classify_commit(
     return "uncertain", f"no_clear_signal ({row_count} rows)"
 
 
-def phase_a_extract_commits(repo_path: Path, output_dir: Path) -> list[CommitInfo]:
-    """Phase A: Extract commit metadata from repository."""
+def load_watermark(repo_path: Path, output_dir: Path) -> ExtractionWatermark | None:
+    """
+    Load the previous run's watermark if an incremental run can resume from it.
+
+    Returns None (full extraction) if there is no watermark, it was written for
+    another START_COMMIT, its head was rewritten out of the source history, or
+    the intermediate parquet files no longer match it.
+    """
+    watermark_path = output_dir / "intermediate" / WATERMARK_FILE
+    if not watermark_path.exists():
+        return None
+
+    watermark = ExtractionWatermark.model_validate_json(watermark_path.read_text())
+    commits_path = output_dir / "intermediate" / "commits_metadata.parquet"
+    changes_path = output_dir / "intermediate" / "row_changes.parquet"
+    row_change_count = (
+        pq.read_metadata(changes_path).num_rows if changes_path.exists() else 0
+    )
+
+    reason = None
+    if watermark.start_commit != START_COMMIT:
+        reason = "START_COMMIT changed"
+    elif not is_ancestor(repo_path, watermark.head_commit, "HEAD"):
+        reason = f"{watermark.head_commit[:8]} is no longer in the source history"
+    elif (
+        not commits_path.exists()
+        or pq.read_metadata(commits_path).num_rows != watermark.commit_count
+        or row_change_count != watermark.row_change_count
+    ):
+        reason = "intermediate files don't match the watermark"
+
+    if reason:
+        print(f"Warning: {reason}, running a full extraction")
+        return None
+    return watermark
+
+
+def commits_frame(commits: list[CommitInfo]) -> pd.DataFrame:
+    """Commit metadata as a DataFrame, built columnar with COMMIT_INFO_SCHEMA."""
+    columns = RecordColumns(COMMIT_INFO_SCHEMA, allowed=COMMIT_INFO_VALUES)
+    for commit in commits:
+        # Model fields as stored, without model_dump()'s per-commit copy
+        columns.append(**vars(commit))
+    return columns.to_pandas()
+
+
+def save_watermark(output_dir: Path, watermark: ExtractionWatermark):
+    watermark_path = output_dir / "intermediate" / WATERMARK_FILE
+    watermark_path.write_text(watermark.model_dump_json(indent=2))
+    print(f"Saved watermark ({watermark.head_commit[:8]}) to {watermark_path}")
+
+
+def phase_a_extract_commits(
+    repo_path: Path, output_dir: Path, head: str = "HEAD", since: str | None = None
+) -> list[CommitInfo]:
+    """
+    Phase A: Extract commit metadata from repository.
+
+    With since (the head of a previous run), only the commits added after it
+    are extracted; phase B saves them together with the existing metadata.
+
+    Commits are returned in topological order (parents first). Unlike author
+    timestamps, which put commits of a merged PR branch before older commits
+    of the main line, this order does not change when the range is extracted
+    in several runs, so incremental runs append the same commits a full run
+    would process at the end.
+    """
     print("\n=== Phase A: Extracting commit metadata ===")
 
-    commit_hashes = get_commit_list(repo_path, START_COMMIT)
-    print(f"Found {len(commit_hashes)} commits from {START_COMMIT[:8]}..HEAD")
-
-    commits = []
-    for commit_hash in tqdm(commit_hashes, desc="Extracting metadata"):
-        meta = get_commit_metadata(repo_path, commit_hash)
-
-        commit = CommitInfo(
-            commit_hash=meta["hash"],
-            author_name=meta["author_name"],
-            author_email=meta["author_email"],
-            timestamp=meta["timestamp"],
-            datetime_utc=datetime.fromtimestamp(meta["timestamp"], tz=timezone.utc),
-            message=meta["message"],
-            is_merge=meta["is_merge"],
-            parent_hash=meta["parents"][0] if meta["parents"] else None,
+    # One git log process for all commits instead of one per commit
+    start = since or f"{START_COMMIT}^"
+    commits = list(
+        tqdm(
+            iter_commits(repo_path, "--topo-order", f"{start}..{head}"),
+            desc="Extracting metadata",
         )
-        commits.append(commit)
+    )
+    print(f"Found {len(commits)} commits from {start[:8]}..{head[:8]}")
 
-    # Sort by timestamp (oldest first) for processing
-    commits.sort(key=lambda c: c.timestamp)
+    # Oldest first for processing
+    commits.reverse()
 
-    # Save to parquet
-    commits_df = pd.DataFrame([c.model_dump() for c in commits])
-    commits_path = output_dir / "intermediate" / "commits_metadata.parquet"
-    commits_df.to_parquet(commits_path, index=False)
-    print(f"Saved {len(commits)} commits to {commits_path}")
+    if since is None:
+        # Save to parquet
+        commits_df = commits_frame(commits)
+        commits_path = output_dir / "intermediate" / "commits_metadata.parquet"
+        commits_df.to_parquet(commits_path, index=False)
+        print(f"Saved {len(commits)} commits to {commits_path}")
 
     return commits
 
 
 def phase_b_parse_and_classify(
-    repo_path: Path, commits: list[CommitInfo], output_dir: Path
-) -> pd.DataFrame:
-    """Phase B: Parse CSV changes and classify each commit."""
+    reader: GitBlobReader,
+    commits: list[CommitInfo],
+    output_dir: Path,
+    cache_dir: Path,
+    use_hunks: bool = True,
+    workers: int = 1,
+    watermark: ExtractionWatermark | None = None,
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Phase B: Parse CSV changes and classify each commit.
+
+    With use_hunks, changes are read from `git diff --unified=0` between
+    consecutive CSV versions; otherwise (or when a diff can't be read line by
+    line) the full snapshots are compared.
+
+    Each (previous version, version) diff is independent, so with workers > 1
+    they are computed up front in a process pool. Classification, which
+    depends on commit order and timing, is then stitched together in the
+    same sequential pass as the single-process mode, so both give identical
+    results.
+
+    With a watermark, commits are the ones added since the previous run: the
+    walk continues from the watermark's last commit and CSV version, and the
+    results are appended to the existing intermediate files.
+
+    Returns:
+        Tuple of (all row changes, state for the next watermark)
+    """
     print("\n=== Phase B: Parsing changes and classifying ===")
 
-    all_row_changes = []
-    prev_commit = None
-    prev_df = None
+    all_row_changes = RecordColumns(ROW_CHANGE_SCHEMA, allowed=ROW_CHANGE_VALUES)
+    prev_commit_hash = None
+    prev_timestamp = None
+    prev_blob_id = None
+    skipped = 0
 
     # Filter out merge commits
     non_merge_commits = [c for c in commits if not c.is_merge]
     print(f"Processing {len(non_merge_commits)} non-merge commits")
 
+    if watermark is not None:
+        # Continue from where the previous run stopped
+        prev_commit_hash = watermark.last_commit_hash
+        prev_timestamp = watermark.last_commit_timestamp
+        prev_blob_id = watermark.csv_blob_id
+        print(f"Continuing from {watermark.head_commit[:8]}")
     # Get initial state from parent of first commit
-    if non_merge_commits:
+    elif non_merge_commits:
         first_commit = non_merge_commits[0]
         if first_commit.parent_hash:
             try:
-                parent_content = get_file_at_commit(
-                    repo_path, first_commit.parent_hash, CSV_FILE
-                )
-                prev_df = convert_coord_columns(parse_csv_content(parent_content))
+                prev_blob_id = reader.blob_id(first_commit.parent_hash, CSV_FILE)
+                if prev_blob_id is None:
+                    raise FileNotFoundError(f"{CSV_FILE} not found")
                 print(f"Loaded parent state from {first_commit.parent_hash[:8]}")
             except Exception as e:
                 print(f"Warning: Could not get parent state: {e}")
 
+    # CSV version (blob id) of every commit, one cat-file round trip each
+    blob_ids = {
+        c.commit_hash: reader.blob_id(c.commit_hash, CSV_FILE)
+        for c in non_merge_commits
+    }
+
+    diffs: dict[tuple[str, str], list[dict] | Exception] = {}
+    if workers > 1:
+        # Pairs of consecutive versions, assuming every diff succeeds; if one
+        # fails, the pass below diffs the following version in-process
+        pairs = []
+        prev = prev_blob_id
+        for blob_id in blob_ids.values():
+            if blob_id is not None:
+                if prev is not None and blob_id != prev:
+                    pairs.append((prev, blob_id))
+                prev = blob_id
+        pairs = list(dict.fromkeys(pairs))
+        print(f"Diffing {len(pairs)} CSV versions with {workers} workers")
+        diffs = diff_version_pairs(
+            reader.repo_path, pairs, cache_dir, use_hunks, workers
+        )
+
     for commit in tqdm(non_merge_commits, desc="Processing commits"):
-        # Calculate time since previous commit
+        # Calculate time since previous commit; a PR branch commit authored
+        # before the previous commit has no meaningful gap
         time_since_prev = None
-        if prev_commit:
-            time_since_prev = commit.timestamp - prev_commit.timestamp
+        if prev_timestamp is not None and commit.timestamp >= prev_timestamp:
+            time_since_prev = commit.timestamp - prev_timestamp
 
-        # Get CSV state at this commit
+        # Find changes against the previous CSV state, if we have one; a
+        # commit that leaves the file at the same blob cannot change any row
+        row_changes = []
         try:
-            csv_content = get_file_at_commit(repo_path, commit.commit_hash, CSV_FILE)
-            current_df = convert_coord_columns(parse_csv_content(csv_content))
+            blob_id = blob_ids[commit.commit_hash]
+            if blob_id is None:
+                raise FileNotFoundError(f"{CSV_FILE} not found")
+            if blob_id == prev_blob_id:
+                skipped += 1
+            elif prev_blob_id is not None:
+                pair = (prev_blob_id, blob_id)
+                if pair not in diffs:
+                    diffs[pair] = diff_csv_versions(
+                        reader, *pair, cache_dir, use_hunks
+                    )
+                if isinstance(diffs[pair], Exception):
+                    raise diffs[pair]
+                row_changes = diffs[pair]
         except Exception as e:
             print(f"Warning: Could not read CSV at {commit.commit_hash[:8]}: {e}")
-            prev_commit = commit
+            prev_commit_hash, prev_timestamp = commit.commit_hash, commit.timestamp
             continue
 
-        # Find changes if we have a previous state
-        row_changes = []
-        if prev_df is not None:
-            row_changes = find_coordinate_changes(prev_df, current_df)
-
         # Classify the commit
         row_count = len(row_changes)
         classification, reason = classify_commit(commit, row_count, time_since_prev)
@@ -298,45 +566,48 @@ def phase_b_parse_and_classify(
         commit.classification_reason = reason
         commit.time_since_prev_seconds = time_since_prev
 
-        # Record row-level changes
-        for change in row_changes:
-            row_change = RowChange(
-                province_number=change["provinceNumber"],
-                registrar_code=change["registrar_code"],
-                subdis_code=change["subdis_code"],
-                electorate=change["electorate"],
-                location=change["location"],
-                lat_before=change["lat_before"],
-                lng_before=change["lng_before"],
-                lat_after=change["lat_after"],
-                lng_after=change["lng_after"],
-                commit_hash=commit.commit_hash,
-                author_name=commit.author_name,
-                author_email=commit.author_email,
-                timestamp=commit.timestamp,
-                classification=classification
-                if classification != "none"
-                else "uncertain",
-            )
-            all_row_changes.append(row_change)
+        # Record row-level changes, columnar; the schema is checked on save
+        all_row_changes.extend(
+            row_changes,
+            aliases={"province_number": "provinceNumber"},
+            commit_hash=commit.commit_hash,
+            author_name=commit.author_name,
+            author_email=commit.author_email,
+            timestamp=commit.timestamp,
+            classification=classification
+            if classification != "none"
+            else "uncertain",
+        )
+
+        prev_commit_hash, prev_timestamp = commit.commit_hash, commit.timestamp
+        prev_blob_id = blob_id
 
-        prev_commit = commit
-        prev_df = current_df
+    print(f"Skipped {skipped} commits that left {CSV_FILE} unchanged")
 
     # Save updated commits metadata
-    commits_df = pd.DataFrame([c.model_dump() for c in commits])
+    commits_df = commits_frame(commits)
     commits_path = output_dir / "intermediate" / "commits_metadata.parquet"
+    if watermark is not None:
+        commits_df = pd.concat(
+            [pd.read_parquet(commits_path), commits_df], ignore_index=True
+        )
     commits_df.to_parquet(commits_path, index=False)
 
     # Save row changes
+    changes_df = all_row_changes.to_pandas()
+    changes_path = output_dir / "intermediate" / "row_changes.parquet"
+    if watermark is not None and changes_path.exists():
+        changes_df = pd.concat(
+            [pd.read_parquet(changes_path), changes_df], ignore_index=True
+        )
     if all_row_changes:
-        changes_df = pd.DataFrame([rc.model_dump() for rc in all_row_changes])
-        changes_path = output_dir / "intermediate" / "row_changes.parquet"
         changes_df.to_parquet(changes_path, index=False)
-        print(f"Saved {len(all_row_changes)} row changes to {changes_path}")
+        print(f"Saved {len(all_row_changes)} new row changes to {changes_path}")
     else:
-        changes_df = pd.DataFrame()
         print("No row changes found")
+        if watermark is None:
+            # Don't leave the changes of an earlier run behind a full run
+            changes_path.unlink(missing_ok=True)
 
     # Print classification summary
     class_counts = commits_df["classification"].value_counts()
@@ -344,18 +615,30 @@ def phase_b_parse_and_classify(
     for cls, count in class_counts.items():
         print(f"  {cls}: {count}")
 
-    return changes_df
+    state = {
+        "last_commit_hash": prev_commit_hash,
+        "last_commit_timestamp": prev_timestamp,
+        "csv_blob_id": prev_blob_id,
+        "commit_count": len(commits_df),
+    }
+    return changes_df, state
 
 
 def phase_c_build_output(
-    repo_path: Path, changes_df: pd.DataFrame, output_dir: Path
+    reader: GitBlobReader,
+    changes_df: pd.DataFrame,
+    output_dir: Path,
+    cache_dir: Path,
+    head: str = "HEAD",
 ) -> pd.DataFrame:
     """Phase C: Build final output with source attribution."""
     print("\n=== Phase C: Building final output ===")
 
     # Get latest CSV state
-    csv_content = get_file_at_commit(repo_path, "HEAD", CSV_FILE)
-    final_df = convert_coord_columns(parse_csv_content(csv_content))
+    head_blob_id = reader.blob_id(head, CSV_FILE)
+    if head_blob_id is None:
+        raise FileNotFoundError(f"{CSV_FILE} not found at {head}")
+    final_df = load_csv_snapshot(reader, head_blob_id, cache_dir)
     print(f"Loaded {len(final_df)} rows from current CSV")
 
     # Rename columns to match output schema
@@ -378,65 +661,32 @@ def phase_c_build_output(
     final_df["has_coords"] = (
         final_df["latitude"].notna() & final_df["longitude"].notna()
     )
-    final_df["source_commit"] = None
-    final_df["source_author"] = None
-    final_df["source_classification"] = "none"
-    final_df["source_timestamp"] = None
 
+    # Latest change for each row (by timestamp), joined onto the snapshot
+    attribution = pd.DataFrame(
+        columns=OUTPUT_KEY_COLUMNS + list(ATTRIBUTION_COLUMNS.values())
+    )
     if not changes_df.empty:
-        # Create lookup key for matching
-        final_df["_key"] = (
-            final_df["province_number"].astype(str)
-            + "|"
-            + final_df["registrar_code"].astype(str)
-            + "|"
-            + final_df["subdis_code"].astype(str)
-            + "|"
-            + final_df["electorate"].astype(str)
-            + "|"
-            + final_df["location"].astype(str)
-        )
-
-        changes_df["_key"] = (
-            changes_df["province_number"].astype(str)
-            + "|"
-            + changes_df["registrar_code"].astype(str)
-            + "|"
-            + changes_df["subdis_code"].astype(str)
-            + "|"
-            + changes_df["electorate"].astype(str)
-            + "|"
-            + changes_df["location"].astype(str)
-        )
-
-        # Get latest change for each row (by timestamp)
-        latest_changes = (
-            changes_df.sort_values("timestamp").groupby("_key").last().reset_index()
+        attribution = (
+            changes_df.sort_values("timestamp")
+            .drop_duplicates(OUTPUT_KEY_COLUMNS, keep="last")
+            .rename(columns=ATTRIBUTION_COLUMNS)
         )
+    final_df = final_df.merge(
+        attribution[OUTPUT_KEY_COLUMNS + list(ATTRIBUTION_COLUMNS.values())],
+        on=OUTPUT_KEY_COLUMNS,
+        how="left",
+    )
 
-        # Create attribution lookup
-        attribution = {}
-        for _, row in latest_changes.iterrows():
-            attribution[row["_key"]] = {
-                "source_commit": row["commit_hash"],
-                "source_author": row["author_name"],
-                "source_classification": row["classification"],
-                "source_timestamp": row["timestamp"],
-            }
-
-        # Apply attribution
-        for idx, row in final_df.iterrows():
-            key = row["_key"]
-            if key in attribution:
-                attr = attribution[key]
-                final_df.at[idx, "source_commit"] = attr["source_commit"]
-                final_df.at[idx, "source_author"] = attr["source_author"]
-                final_df.at[idx, "source_classification"] = attr[
-                    "source_classification"
-                ]
-                final_df.at[idx, "source_timestamp"] = attr["source_timestamp"]
-
-        final_df = final_df.drop(columns=["_key"])
+    # Compact column types: few distinct authors/classes, nullable timestamps
+    final_df["source_author"] = final_df["source_author"].astype("category")
+    final_df["source_classification"] = (
+        final_df["source_classification"]
+        .astype(object)
+        .fillna("none")
+        .astype(pd.CategoricalDtype(SOURCE_CLASSIFICATIONS))
+    )
+    final_df["source_timestamp"] = final_df["source_timestamp"].astype("Int64")
 
     # Save output
     output_path = output_dir / "outputs" / "station66_with_source.parquet"
@@ -446,7 +696,7 @@ def phase_c_build_output(
     # Print summary
     source_counts = final_df["source_classification"].value_counts()
     print("\nSource attribution summary:")
-    for src, count in source_counts.items():
+    for src, count in source_counts[source_counts > 0].items():
         print(f"  {src}: {count}")
 
     coords_count = final_df["has_coords"].sum()
@@ -473,6 +723,30 @@ def main():
         default=Path(__file__).parent.parent,
         help="Output directory (default: ect69-geo-decoding)",
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the saved watermark and re-extract everything from START_COMMIT",
+    )
+    parser.add_argument(
+        "--snapshot-diff",
+        action="store_true",
+        help="Compare full CSV snapshots for every commit instead of reading "
+        "git diff hunks",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for diffing CSV versions in phase B (default: 1)",
+    )
+    parser.add_argument(
+        "--snapshot-cache",
+        type=Path,
+        default=None,
+        help="Directory for parsed CSV snapshots keyed by blob id "
+        "(default: <output-dir>/intermediate/csv_snapshots)",
+    )
 
     args = parser.parse_args()
 
@@ -487,11 +761,46 @@ def main():
     # Ensure output directories exist
     (args.output_dir / "intermediate").mkdir(parents=True, exist_ok=True)
     (args.output_dir / "outputs").mkdir(parents=True, exist_ok=True)
+    cache_dir = args.snapshot_cache or args.output_dir / "intermediate" / "csv_snapshots"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Process commits up to the current HEAD, resuming from the last run
+    head = run_git(args.source_repo, "rev-parse", "HEAD").strip()
+    watermark = None if args.full else load_watermark(args.source_repo, args.output_dir)
+    if watermark is not None and watermark.head_commit == head:
+        print(f"\nAlready up to date at {head[:8]}, nothing to do")
+        return
 
     # Run ETL phases
-    commits = phase_a_extract_commits(args.source_repo, args.output_dir)
-    changes_df = phase_b_parse_and_classify(args.source_repo, commits, args.output_dir)
-    phase_c_build_output(args.source_repo, changes_df, args.output_dir)
+    commits = phase_a_extract_commits(
+        args.source_repo,
+        args.output_dir,
+        head,
+        since=watermark.head_commit if watermark else None,
+    )
+    # Phases B and C read every CSV version through one pair of git processes
+    with GitBlobReader(args.source_repo) as reader:
+        changes_df, state = phase_b_parse_and_classify(
+            reader,
+            commits,
+            args.output_dir,
+            cache_dir,
+            use_hunks=not args.snapshot_diff,
+            workers=args.workers,
+            watermark=watermark,
+        )
+        phase_c_build_output(reader, changes_df, args.output_dir, cache_dir, head)
+
+    save_watermark(
+        args.output_dir,
+        ExtractionWatermark(
+            start_commit=START_COMMIT,
+            head_commit=head,
+            row_change_count=len(changes_df),
+            updated_at=datetime.now(timezone.utc),
+            **state,
+        ),
+    )
 
     print("\n=== ETL Complete ===")
 
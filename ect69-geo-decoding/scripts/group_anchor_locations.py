@@ -0,0 +1,148 @@
+"""
+Group main-day voting units into anchor locations.
+
+Each unit name is split into an anchor location and a sub-location (tent,
+parking lot, ศาลา 1, unit number, directions), and units of the same tambon
+are grouped into one anchor when their anchor names match after
+normalization, or when consecutive units' names extend one another
+(lib/anchor_locations.py). Geocoding and validation then run once per
+anchor; lib.anchor_locations.fan_out() maps their results back to units.
+
+Requirements:
+  - inputs/ect69-voting-units-20260121.csv (dvc pull)
+
+Output:
+  - intermediate/voting_unit_anchors.parquet (every unit with its anchor_id,
+    anchor name and sub-location)
+  - intermediate/anchor_locations.csv (one row per anchor)
+
+Usage:
+    uv run python ect69-geo-decoding/scripts/group_anchor_locations.py
+    uv run python ect69-geo-decoding/scripts/group_anchor_locations.py --similarity 0.85
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from lib.anchor_locations import (
+    DEFAULT_NAME_COLUMN,
+    DEFAULT_NUMBER_COLUMN,
+    anchor_locations,
+    group_anchor_locations,
+)
+from lib.unit_clustering import DEFAULT_BLOCK_COLUMNS, DEFAULT_SIMILARITY
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_INPUT = BASE_DIR / "inputs" / "ect69-voting-units-20260121.csv"
+UNITS_PATH = BASE_DIR / "intermediate" / "voting_unit_anchors.parquet"
+ANCHORS_PATH = BASE_DIR / "intermediate" / "anchor_locations.csv"
+
+
+def main(
+    input_file: Path,
+    block_columns: list[str],
+    id_column: str,
+    number_column: str,
+    name_column: str,
+    similarity: float,
+):
+    if not input_file.exists():
+        print(f"ERROR: {input_file} not found")
+        print("Run `dvc pull` or pass --input")
+        sys.exit(1)
+
+    df = pd.read_csv(input_file)
+    columns = [*block_columns, id_column, number_column, name_column]
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        print(f"ERROR: Columns {missing} not in {input_file.name}")
+        print(f"Available columns: {list(df.columns)}")
+        sys.exit(1)
+    print(f"Loaded {len(df):,} units from {input_file.name}")
+    duplicated = df[id_column].duplicated().sum()
+    if duplicated:
+        print(f"WARNING: {duplicated:,} duplicate {id_column} values")
+
+    grouped = group_anchor_locations(
+        df[columns], name_column, block_columns, number_column, similarity
+    )
+    anchors = anchor_locations(grouped, block_columns)
+
+    n_units = len(grouped)
+    n_anchors = len(anchors)
+    print(f"Distinct raw names: {grouped[name_column].nunique():,}")
+    print(f"Anchors: {n_anchors:,} ({n_units / max(n_anchors, 1):.1f} units each)")
+    print(f"Units with a sub-location: {grouped['sub_location'].notna().sum():,}")
+    print("\nAnchors by location type:")
+    print(anchors["location_type"].value_counts().to_string())
+
+    UNITS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    grouped.to_parquet(UNITS_PATH, index=False)
+    anchors.to_csv(ANCHORS_PATH, index=False)
+    print(f"\nSaved units to {UNITS_PATH}")
+    print(f"Saved anchors to {ANCHORS_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Group main-day voting units into anchor locations",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run python ect69-geo-decoding/scripts/group_anchor_locations.py
+  uv run python ect69-geo-decoding/scripts/group_anchor_locations.py --similarity 0.85
+  uv run python ect69-geo-decoding/scripts/group_anchor_locations.py \\
+      --input units.csv --block-columns province,amphoe,tambon \\
+      --id-column id --number-column number --name-column name
+        """,
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=DEFAULT_INPUT,
+        help="Voting units CSV (default: inputs/ect69-voting-units-20260121.csv)",
+    )
+    parser.add_argument(
+        "--block-columns",
+        type=lambda value: [c.strip() for c in value.split(",") if c.strip()],
+        default=DEFAULT_BLOCK_COLUMNS,
+        help="Comma-separated columns units must share to share an anchor "
+        f"(default: {','.join(DEFAULT_BLOCK_COLUMNS)})",
+    )
+    parser.add_argument(
+        "--id-column",
+        default="unitId",
+        help="Column with the unit id (default: unitId)",
+    )
+    parser.add_argument(
+        "--number-column",
+        default=DEFAULT_NUMBER_COLUMN,
+        help="Column with the unit number, for the order of consecutive units "
+        f"(default: {DEFAULT_NUMBER_COLUMN})",
+    )
+    parser.add_argument(
+        "--name-column",
+        default=DEFAULT_NAME_COLUMN,
+        help=f"Column with the unit name (default: {DEFAULT_NAME_COLUMN})",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=DEFAULT_SIMILARITY,
+        help="Minimum edit similarity for near-duplicate anchor names "
+        f"(default: {DEFAULT_SIMILARITY})",
+    )
+    args = parser.parse_args()
+
+    main(
+        input_file=args.input,
+        block_columns=args.block_columns,
+        id_column=args.id_column,
+        number_column=args.number_column,
+        name_column=args.name_column,
+        similarity=args.similarity,
+    )
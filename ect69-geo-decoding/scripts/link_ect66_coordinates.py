@@ -0,0 +1,212 @@
+"""
+Propose ECT66 coordinates for ECT69 voting units before geocoding.
+
+ECT69 units are linked to Tier A+ places of `ect66_geocoded_validated.parquet`
+in the same province, amphoe and tambon by normalized anchor name similarity
+(lib/ect66_linkage.py). Accepted links carry the ECT66 coordinates and
+PlaceId; only units without one need a geocoding API call.
+
+Every link records its provenance: the ECT66 unit it came from, its score
+and status, the source file with the md5 of its DVC-tracked version, and the
+date of the run.
+
+Requirements:
+  - inputs/ect69-voting-units-20260121.csv (dvc pull)
+  - ../ect66-geo-decoding/outputs/ect66_geocoded_validated.parquet (dvc pull)
+
+Output:
+  - intermediate/ect66_links.parquet (every unit with its link columns)
+  - intermediate/ect66_link_review.csv (distinct names to review, one row per
+    proposed link below the accept threshold)
+
+Usage:
+    uv run python ect69-geo-decoding/scripts/link_ect66_coordinates.py
+    uv run python ect69-geo-decoding/scripts/link_ect66_coordinates.py --accept 0.95
+"""
+
+import argparse
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from lib.ect66_linkage import DEFAULT_ACCEPT, DEFAULT_REVIEW, link_units
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_INPUT = BASE_DIR / "inputs" / "ect69-voting-units-20260121.csv"
+DEFAULT_ECT66 = (
+    BASE_DIR.parent / "ect66-geo-decoding" / "outputs" / "ect66_geocoded_validated.parquet"
+)
+LINKS_PATH = BASE_DIR / "intermediate" / "ect66_links.parquet"
+REVIEW_PATH = BASE_DIR / "intermediate" / "ect66_link_review.csv"
+
+
+def dvc_md5(path: Path) -> str | None:
+    """md5 of the DVC-tracked version of path, from its .dvc file."""
+    dvc_file = path.with_name(path.name + ".dvc")
+    if not dvc_file.exists():
+        return None
+    match = re.search(r"md5:\s*([0-9a-f]{32})", dvc_file.read_text())
+    return match.group(1) if match else None
+
+
+def main(
+    input_file: Path,
+    ect66_file: Path,
+    province_column: str,
+    district_column: str,
+    subdistrict_column: str,
+    name_column: str,
+    accept: float,
+    review: float,
+):
+    for path in [input_file, ect66_file]:
+        if not path.exists():
+            print(f"ERROR: {path} not found")
+            print("Run `dvc pull` or pass --input/--ect66")
+            sys.exit(1)
+
+    units = pd.read_csv(input_file)
+    columns = [province_column, district_column, subdistrict_column, name_column]
+    missing = [c for c in columns if c not in units.columns]
+    if missing:
+        print(f"ERROR: Columns {missing} not in {input_file.name}")
+        print(f"Available columns: {list(units.columns)}")
+        sys.exit(1)
+    ect66 = pd.read_parquet(ect66_file)
+    print(f"Loaded {len(units):,} ECT69 units from {input_file.name}")
+    print(
+        f"Loaded {len(ect66):,} ECT66 units "
+        f"({(ect66['TierLocation'] == 'A+').sum():,} Tier A+) from {ect66_file.name}"
+    )
+
+    links = link_units(
+        units,
+        ect66,
+        province_column=province_column,
+        district_column=district_column,
+        subdistrict_column=subdistrict_column,
+        name_column=name_column,
+        accept=accept,
+        review=review,
+    )
+
+    # Provenance of every proposed link
+    linked = links["link_status"].notna()
+    links["link_source"] = None
+    links.loc[linked, "link_source"] = ect66_file.name
+    links["link_source_md5"] = None
+    links.loc[linked, "link_source_md5"] = dvc_md5(ect66_file)
+    links["linked_at"] = None
+    links.loc[linked, "linked_at"] = date.today().isoformat()
+
+    status = links["link_status"].value_counts()
+    n_accepted = status.get("accepted", 0)
+    n_review = status.get("review", 0)
+    print(f"\nAccepted links: {n_accepted:,} units (similarity >= {accept})")
+    print(f"For review:     {n_review:,} units (similarity >= {review})")
+    print(
+        f"Still to geocode: {len(links) - n_accepted:,} of {len(links):,} units "
+        f"({(len(links) - n_accepted) / max(len(links), 1):.1%})"
+    )
+
+    review_pairs = (
+        links[links["link_status"] == "review"]
+        .drop_duplicates(
+            [province_column, district_column, subdistrict_column, name_column]
+        )[
+            [
+                province_column,
+                district_column,
+                subdistrict_column,
+                name_column,
+                "ect66_unit_name",
+                "link_score",
+                "ect66_lat",
+                "ect66_lng",
+            ]
+        ]
+        .sort_values("link_score", ascending=False)
+    )
+
+    LINKS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    links.to_parquet(LINKS_PATH, index=False)
+    review_pairs.to_csv(REVIEW_PATH, index=False)
+    print(f"\nSaved links to {LINKS_PATH}")
+    print(f"Saved {len(review_pairs):,} names to review to {REVIEW_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Propose ECT66 coordinates for ECT69 voting units",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  uv run python ect69-geo-decoding/scripts/link_ect66_coordinates.py
+  uv run python ect69-geo-decoding/scripts/link_ect66_coordinates.py --accept 0.95 --review 0.8
+  uv run python ect69-geo-decoding/scripts/link_ect66_coordinates.py \\
+      --input units.csv --province-column province --district-column amphoe \\
+      --subdistrict-column tambon
+        """,
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        default=DEFAULT_INPUT,
+        help="ECT69 voting units CSV (default: inputs/ect69-voting-units-20260121.csv)",
+    )
+    parser.add_argument(
+        "--ect66",
+        type=Path,
+        default=DEFAULT_ECT66,
+        help="ECT66 validated units "
+        "(default: ../ect66-geo-decoding/outputs/ect66_geocoded_validated.parquet)",
+    )
+    parser.add_argument(
+        "--province-column",
+        default="provinceName",
+        help="Province column of the ECT69 units (default: provinceName)",
+    )
+    parser.add_argument(
+        "--district-column",
+        default="districtName",
+        help="Amphoe column of the ECT69 units (default: districtName)",
+    )
+    parser.add_argument(
+        "--subdistrict-column",
+        default="subDistrictName",
+        help="Tambon column of the ECT69 units (default: subDistrictName)",
+    )
+    parser.add_argument(
+        "--name-column",
+        default="unitName",
+        help="Unit name column of the ECT69 units (default: unitName)",
+    )
+    parser.add_argument(
+        "--accept",
+        type=float,
+        default=DEFAULT_ACCEPT,
+        help=f"Minimum name similarity to accept a link (default: {DEFAULT_ACCEPT})",
+    )
+    parser.add_argument(
+        "--review",
+        type=float,
+        default=DEFAULT_REVIEW,
+        help="Minimum name similarity to propose a link for review "
+        f"(default: {DEFAULT_REVIEW})",
+    )
+    args = parser.parse_args()
+
+    main(
+        input_file=args.input,
+        ect66_file=args.ect66,
+        province_column=args.province_column,
+        district_column=args.district_column,
+        subdistrict_column=args.subdistrict_column,
+        name_column=args.name_column,
+        accept=args.accept,
+        review=args.review,
+    )
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from lib.anchor_locations import group_anchor_locations
+
+
+def units(names: list[str]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "provinceName": "สมุทรปราการ",
+            "districtName": "บางพลี",
+            "subDistrictName": "บางพลีใหญ่",
+            "unitNumber": range(1, len(names) + 1),
+            "unitName": names,
+        }
+    )
+
+
+def anchor_ids(names: list[str]) -> list[int]:
+    return group_anchor_locations(units(names))["anchor_id"].tolist()
+
+
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["วิทยาลัยศิลปหัตถกรรมกรุงเทพ", "วิทยาลัยศิลปหัตถกรรมกรุงเทพ ถนนลาดพร้าว"],
+        ["โรงเรียนวัดบางนา", "โรงเรียนวัดบางนาถนนสุขุมวิท"],
+        [
+            "เต็นท์ โรงเรียนวัดบางนา (1)",
+            "โรงเรียนวัดบางนา ซอยวัดบางนา",
+            "โรงเรียนวัดบางนา",
+        ],
+    ],
+)
+def test_consecutive_extensions_share_an_anchor(names):
+    assert set(anchor_ids(names)) == {0}
+
+
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["ศาลาประชาคมหมู่ 1", "ศาลาประชาคมหมู่ 12"],
+        ["โรงเรียนบ้านนา", "โรงเรียนบ้านนาเหนือ"],
+        ["วัดบางพลี", "วัดบางพลีใหญ่ใน"],
+    ],
+)
+def test_longer_names_of_other_places_stay_apart(names):
+    assert anchor_ids(names) == [0, 1]
+
+
+def test_only_consecutive_units_are_merged():
+    names = ["วัดบางพลี", "โรงเรียนบ้านนา", "วัดบางพลี ถนนเทพารักษ์"]
+
+    assert anchor_ids(names) == [0, 1, 2]
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from lib.ect66_linkage import link_units
+
+
+def ect66(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "ProvinceName": province,
+                "DistrictName": district,
+                "SubDistrictName": tambon,
+                "UnitName": name,
+                "UnitId": unit_id,
+                "TierLocation": tier,
+                "Lat": 13.0 + unit_id / 100,
+                "Lng": 100.0 + unit_id / 100,
+                "PlaceId": f"place-{unit_id}",
+            }
+            for unit_id, (province, district, tambon, name, tier) in enumerate(rows, 1)
+        ]
+    )
+
+
+def units(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows, columns=["provinceName", "districtName", "subDistrictName", "unitName"]
+    )
+
+
+def test_links_need_the_same_province_amphoe_and_tambon():
+    # ตำบลบ้านใหม่ exists in both amphoes
+    links = link_units(
+        units(
+            [
+                ("ปทุมธานี", "เมือง", "บ้านใหม่", "โรงเรียนวัดบ้านใหม่"),
+                ("ปทุมธานี", "ลำลูกกา", "บ้านใหม่", "วัดสายไหม"),
+            ]
+        ),
+        ect66(
+            [
+                ("จ.ปทุมธานี", "อำเภอเมือง", "ต.บ้านใหม่", "โรงเรียนวัดบ้านใหม่", "A+"),
+                ("จ.ปทุมธานี", "อำเภอสามโคก", "ตำบลบ้านใหม่", "วัดสายไหม", "A+"),
+            ]
+        ),
+    )
+
+    assert links["link_status"].tolist() == ["accepted", None]
+    assert links["ect66_unit_id"].tolist() == [1, pd.NA]
+
+
+def test_tier_d_points_are_never_reused():
+    links = link_units(
+        units([("ปทุมธานี", "ลำลูกกา", "บ้านใหม่", "วัดสายไหม")]),
+        ect66([("ปทุมธานี", "ลำลูกกา", "บ้านใหม่", "วัดสายไหม", "D")]),
+    )
+
+    assert links["link_status"].tolist() == [None]
+
+
+def test_names_with_different_numbers_never_link():
+    links = link_units(
+        units([("ปทุมธานี", "ลำลูกกา", "บ้านใหม่", "ศาลาประชาคมหมู่ 1")]),
+        ect66([("ปทุมธานี", "ลำลูกกา", "บ้านใหม่", "ศาลาประชาคมหมู่ 12", "A+")]),
+    )
+
+    assert links["link_status"].tolist() == [None]
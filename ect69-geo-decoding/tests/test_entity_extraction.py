@@ -0,0 +1,56 @@
+from lib.entity_extraction import EntityOutput
+
+COLUMNS = ["location_name", "original"]
+
+
+def read(path) -> list[str]:
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_resume_skips_done_strings_and_keeps_the_header(tmp_path):
+    path = tmp_path / "entities.csv"
+    with EntityOutput(path, COLUMNS) as output:
+        output.append(["วัดบางนา"], [{"location_name": "บางนา"}])
+
+    with EntityOutput(path, ["original", "location_name"]) as output:
+        assert output.done == {"วัดบางนา"}
+        output.append(
+            ["วัดบางนา", "โรงเรียนบ้านนา"],
+            [{"location_name": "บางนา"}, {"location_name": "บ้านนา"}],
+        )
+
+    assert read(path) == [
+        "location_name,original",
+        "บางนา,วัดบางนา",
+        "บ้านนา,โรงเรียนบ้านนา",
+    ]
+
+
+def test_failed_strings_are_not_written(tmp_path):
+    path = tmp_path / "entities.csv"
+    with EntityOutput(path, COLUMNS) as output:
+        output.append(["วัดบางนา"], [{"error": "timeout"}])
+
+    assert output.failed == 1
+    assert read(path) == ["location_name,original"]
+
+
+def test_partial_last_row_is_dropped(tmp_path):
+    path = tmp_path / "entities.csv"
+    path.write_text("location_name,original\nบางนา,วัดบางนา\nบ้านนา,โรง", "utf-8")
+
+    with EntityOutput(path, COLUMNS) as output:
+        assert output.done == {"วัดบางนา"}
+
+    assert read(path) == ["location_name,original", "บางนา,วัดบางนา"]
+
+
+def test_partial_header_is_rewritten(tmp_path):
+    path = tmp_path / "entities.csv"
+    path.write_text("location_na", "utf-8")
+
+    with EntityOutput(path, COLUMNS) as output:
+        assert output.done == set()
+        output.append(["วัดบางนา"], [{"location_name": "บางนา"}])
+
+    assert read(path) == ["location_name,original", "บางนา,วัดบางนา"]
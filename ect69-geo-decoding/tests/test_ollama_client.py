@@ -0,0 +1,86 @@
+import asyncio
+
+import lib.ollama_client
+from lib.llm_cache import ExtractionCache, cache_key
+from lib.ollama_client import (
+    BATCH_FORMAT,
+    BATCH_PROMPT,
+    SINGLE_PROMPT,
+    OllamaClient,
+    extract_entities,
+)
+from lib.ollama_stub import OllamaStub
+
+TEXTS = [f"โรงเรียนบ้าน {i}" for i in range(30)]
+
+
+def extract(stub: OllamaStub, texts=TEXTS, **kwargs) -> list[dict]:
+    async def run():
+        async with OllamaClient("http://stub", transport=stub.transport()) as client:
+            return await extract_entities(client, "model", "system", texts, **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_batch_and_single_answers_have_different_keys():
+    single = cache_key("model", "system", "วัดบางนา", None, SINGLE_PROMPT)
+    batch = cache_key("model", "system", "วัดบางนา", None, BATCH_PROMPT, BATCH_FORMAT)
+
+    assert single != batch
+
+
+def test_batch_run_does_not_reuse_single_answers(tmp_path):
+    with ExtractionCache(tmp_path / "cache.sqlite") as cache:
+        extract(OllamaStub(), cache=cache)
+        stub = OllamaStub()
+        entities = extract(stub, cache=cache, batch_size=10)
+
+    assert [e["location_name"] for e in entities] == TEXTS
+    assert stub.stats.requests == 3
+
+
+def test_batch_run_reuses_its_own_answers(tmp_path):
+    with ExtractionCache(tmp_path / "cache.sqlite") as cache:
+        extract(OllamaStub(), cache=cache, batch_size=10)
+        stub = OllamaStub()
+        entities = extract(stub, cache=cache, batch_size=10)
+
+    assert [e["location_name"] for e in entities] == TEXTS
+    assert stub.stats.requests == 0
+
+
+def test_dropped_batch_items_are_retried_one_by_one():
+    stub = OllamaStub(drop_rate=0.3, seed=1)
+    entities = extract(stub, batch_size=10)
+
+    assert [e["location_name"] for e in entities] == TEXTS
+    # 3 batch requests plus one single request per dropped item
+    assert 3 < stub.stats.requests < 3 + len(TEXTS)
+
+
+def test_requests_are_bounded_by_client_concurrency(monkeypatch):
+    extract_entity = lib.ollama_client.extract_entity
+    running, peak = 0, 0
+
+    async def counted(*args, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            return await extract_entity(*args, **kwargs)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(lib.ollama_client, "extract_entity", counted)
+
+    async def run():
+        transport = OllamaStub().transport()
+        async with OllamaClient(
+            "http://stub", concurrency=3, transport=transport
+        ) as client:
+            return await extract_entities(client, "model", "system", TEXTS)
+
+    entities = asyncio.run(run())
+
+    assert [e["location_name"] for e in entities] == TEXTS
+    assert peak == 3
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from lib.release_diff import diff_releases, inherit_results, work_list
+
+
+def units(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "unitId",
+            "provinceName",
+            "districtName",
+            "subDistrictName",
+            "unitName",
+        ],
+    )
+
+
+OLD = units(
+    [
+        (1, "ชลบุรี", "เมือง", "บางปลาสร้อย", "โรงเรียนวัดใหญ่"),
+        (2, "ชลบุรี", "เมือง", "บางปลาสร้อย", "วัดโพธิ์ทองพุทธาราม"),
+        (3, "ชลบุรี", "เมือง", "บางปลาสร้อย", "ศาลาประชาคมหมู่ 1"),
+        (4, "ชลบุรี", "เมือง", "บ้านสวน", "โรงเรียนบ้านสวน"),
+        (5, "ชลบุรี", "เมือง", "บ้านสวน", "วัดเขาบางทราย"),
+        (6, "ชลบุรี", "เมือง", "มะขามหย่ง", "เต็นท์หน้าตลาด"),
+    ]
+)
+NEW = units(
+    [
+        # Same place, # and spacing differences only
+        (1, "ชลบุรี", "เมือง", "บางปลาสร้อย", "#โรงเรียน วัดใหญ่"),
+        # Spelling fix
+        (2, "ชลบุรี", "เมือง", "บางปลาสร้อย", "วัดโพธิ์ทองพุทธารามม"),
+        # Different place under the same id
+        (3, "ชลบุรี", "เมือง", "บางปลาสร้อย", "ศาลาประชาคมหมู่ 2"),
+        # Same name in another tambon
+        (4, "ชลบุรี", "เมือง", "เสม็ด", "โรงเรียนบ้านสวน"),
+        # New id for an existing place
+        (50, "ชลบุรี", "เมือง", "บ้านสวน", "วัดเขาบางทราย"),
+        (7, "ชลบุรี", "เมือง", "เหมือง", "โรงเรียนวัดเหมือง"),
+    ]
+)
+
+
+def changes(diff: pd.DataFrame) -> dict:
+    return dict(zip(diff["unitId"], diff["change"]))
+
+
+def test_units_are_classified():
+    diff = diff_releases(OLD, NEW)
+
+    assert changes(diff) == {
+        1: "unchanged",
+        2: "renamed",
+        3: "moved",
+        4: "moved",
+        50: "unchanged",
+        7: "added",
+        6: "removed",
+    }
+
+
+def test_new_ids_are_matched_by_name():
+    diff = diff_releases(OLD, NEW).set_index("unitId")
+
+    assert diff.loc[50, "match"] == "name"
+    assert diff.loc[50, "old_unitId"] == 5
+    assert diff.loc[1, "match"] == "id"
+    assert diff.loc[7, "match"] is None
+
+
+def test_removed_units_keep_their_old_name():
+    diff = diff_releases(OLD, NEW).set_index("unitId")
+
+    assert diff.loc[6, "unitName"] == "เต็นท์หน้าตลาด"
+    assert diff.loc[6, "subDistrictName"] == "มะขามหย่ง"
+
+
+def test_work_list_has_only_units_to_process():
+    todo = work_list(diff_releases(OLD, NEW))
+
+    assert sorted(todo["unitId"]) == [2, 3, 4, 7]
+
+
+def test_unchanged_units_inherit_prior_results():
+    prior = pd.DataFrame({"unitId": [1, 2, 5], "lat": [13.1, 13.2, 13.5]})
+    inherited = inherit_results(diff_releases(OLD, NEW), prior)
+
+    assert dict(zip(inherited["unitId"], inherited["lat"])) == {1: 13.1, 50: 13.5}
+
+
+def test_repeated_ids_are_refused():
+    new = pd.concat([NEW, NEW.iloc[[0]]], ignore_index=True)
+
+    with pytest.raises(ValueError, match="repeat in the new release"):
+        diff_releases(OLD, new)
+
+
+def test_repeated_prior_results_are_refused():
+    prior = pd.DataFrame({"unitId": [1, 1, 5], "lat": [13.1, 13.15, 13.5]})
+
+    with pytest.raises(ValueError, match="repeat in the prior results"):
+        inherit_results(diff_releases(OLD, NEW), prior)
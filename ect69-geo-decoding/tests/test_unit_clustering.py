@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from lib.unit_clustering import cluster_unit_names, is_near_duplicate
+
+BLOCK = ["provinceName", "districtName", "subDistrictName"]
+
+
+def units(names: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "provinceName": "สมุทรปราการ",
+            "districtName": "บางพลี",
+            "subDistrictName": "บางพลีใหญ่",
+            "unitName": names,
+        }
+    )
+
+
+def test_near_duplicates_cluster():
+    clustered = cluster_unit_names(
+        units(["โรงเรียนอัสสัมชัญ แผนกประถม#", "โรงเรียนอัสสัมชัญแผนกประถม", "วัดบางพลี"])
+    )
+
+    assert clustered["cluster_id"].tolist() == [0, 0, 1]
+    assert clustered["cluster_size"].tolist() == [2, 2, 1]
+
+
+def test_different_numbers_never_cluster():
+    assert not is_near_duplicate("ซอยสุขุมวิท26", "ซอยสุขุมวิท28")
+    clustered = cluster_unit_names(
+        units(["ศาลาประชาคมหมู่ 1", "ศาลาประชาคมหมู่ 12", "ศาลาประชาคมหมู่1"])
+    )
+
+    assert clustered["cluster_id"].tolist() == [0, 1, 0]
+
+
+def test_blocks_are_separate():
+    df = units(["วัดบางพลี", "วัดบางพลี"])
+    df.loc[1, "subDistrictName"] = "บางแก้ว"
+
+    assert cluster_unit_names(df)["cluster_id"].tolist() == [0, 1]
+
+
+def test_representative_drops_tent_numbers():
+    clustered = cluster_unit_names(
+        units(["เต็นท์ (1) วัดบางนา", "เต็นท์ (2) วัดบางนา", "เต็นท์ (3) วัดบางนา#"])
+    )
+
+    assert clustered["cluster_id"].nunique() == 1
+    assert set(clustered["representative"]) == {"เต็นท์ วัดบางนา"}
+
+
+def test_missing_names_are_singletons():
+    clustered = cluster_unit_names(units([np.nan, "", " # ", "วัดบางนา", np.nan]))
+
+    assert clustered["cluster_id"].nunique() == 5
+    assert (clustered["cluster_size"] == 1).all()
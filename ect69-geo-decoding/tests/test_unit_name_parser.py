@@ -0,0 +1,87 @@
+import ast
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from lib.unit_name_parser import ENTITY_FIELDS, parse_unit_name, parse_unit_names
+
+GOLD_PATH = Path(__file__).parent.parent / "inputs" / "vote69_early_voting_entities.csv"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # A building that is not one, split off before the main venue
+        "หอประชุมอำเภอบางปะกง และบริเวณลานหน้าที่ว่าการอำเภอบางปะกง",
+        # Two venues: the dome or the SAO office
+        "โดมหน้าที่ทำการองค์การบริหารส่วนตำบลคลองขลุง",
+        # Leftover descriptor in front of the venue
+        "บริเวณสนามหน้าที่ว่าการอำเภอปราณบุรี อำเภอปราณบุรี",
+        # Hall in front of the venue: area_prefix or buildings?
+        "อาคารอเนกประสงค์โรงเรียนตะโหมด",
+        # District glued to a named hall
+        "หอประชุมกาญจนาภิเษกอำเภอบาเจาะ",
+        # Province and abbreviated district markers
+        "ศาลาประชาคมจังหวัดพะเยา",
+        "หอประชุม อ.โพทะเล",
+    ],
+)
+def test_misread_strings_are_low_confidence(text):
+    assert parse_unit_name(text)["confidence"] == "low"
+
+
+def test_simple_venue_is_high_confidence():
+    parsed = parse_unit_name("บริเวณสำนักงานเขตคลองเตย แขวงคลองเตย")
+
+    assert parsed["location_name"] == "สำนักงานเขตคลองเตย"
+    assert parsed["area_prefix"] == "บริเวณ"
+    assert parsed["district"] == "คลองเตย"
+    assert parsed["confidence"] == "high"
+
+
+def test_district_hall_is_named_like_the_gold_file():
+    parsed = parse_unit_name("หอประชุมอำเภอท่าม่วง")
+
+    assert parsed["location_name"] == "อำเภอท่าม่วง"
+    assert parsed["location_type"] == "assembly_hall"
+    assert parsed["district"] is None
+    assert parsed["confidence"] == "high"
+
+
+def test_province_is_not_a_temple():
+    parsed = parse_unit_name("ประรำหน้าอาคารอเนกประสงค์กองร้อยอาสารักษาดินแดนจังหวัดนครปฐม")
+
+    assert parsed["location_type"] != "temple"
+    assert parsed["confidence"] == "low"
+
+
+def comparable(field: str, value):
+    """Same comparison as scripts/benchmark_extraction.py (normalize)."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if field == "buildings":
+        if isinstance(value, str):
+            value = ast.literal_eval(value)
+        return tuple(sorted(str(v).strip() for v in value if str(v).strip()))
+    return str(value).strip() or None
+
+
+def test_high_confidence_precision_on_gold_file():
+    gold = pd.read_csv(GOLD_PATH).dropna(subset=["original", "location_name"])
+    parsed = parse_unit_names(gold["original"])
+    high = (parsed["confidence"] == "high").to_numpy()
+    matches = pd.DataFrame(
+        {
+            field: [
+                comparable(field, expected) == comparable(field, value)
+                for expected, value in zip(gold[field], parsed[field])
+            ]
+            for field in ENTITY_FIELDS
+        }
+    )[high]
+
+    # Measured: 156 of 424 rows high, 0.82 location_name / 0.73 record
+    assert high.sum() >= 120
+    assert matches["location_name"].mean() >= 0.8
+    assert matches.all(axis=1).mean() >= 0.7